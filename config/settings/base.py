@@ -65,6 +65,8 @@ LOCAL_APPS = [
     'users',
     'transactions',
     'trade',
+    'outbox',
+    'changes',
     'celery',
 ]
 
@@ -114,6 +116,19 @@ IPDB_API_ROOT = env('IPDB_API_ROOT', default='')
 IPDB_APP_ID = env('IPDB_APP_ID', default='')
 IPDB_APP_KEY = env('IPDB_APP_KEY', default='')
 
+# Snapshots are anchored in the blockchain by a Celery task, in batches,
+# retried up to BLOCKCHAIN_ANCHOR_MAX_RETRIES times, after RETRY_DELAY
+# seconds, doubled each time, and then by the periodic pass.
+BLOCKCHAIN_ANCHOR_BATCH_SIZE = env.int('BLOCKCHAIN_ANCHOR_BATCH_SIZE', default=50)
+BLOCKCHAIN_ANCHOR_RETRY_DELAY = env.int('BLOCKCHAIN_ANCHOR_RETRY_DELAY', default=30)
+BLOCKCHAIN_ANCHOR_MAX_RETRIES = env.int('BLOCKCHAIN_ANCHOR_MAX_RETRIES', default=5)
+
+# 'snapshot': a transaction per snapshot; 'merkle': a transaction per window,
+# anchoring the Merkle root of the snapshots saved within it.
+BLOCKCHAIN_ANCHOR_MODE = env('BLOCKCHAIN_ANCHOR_MODE', default='snapshot')
+BLOCKCHAIN_ANCHOR_WINDOW = env.int('BLOCKCHAIN_ANCHOR_WINDOW', default=300)
+BLOCKCHAIN_MERKLE_BATCH_SIZE = env.int('BLOCKCHAIN_MERKLE_BATCH_SIZE', default=10000)
+
 # MANAGER CONFIGURATION
 # ------------------------------------------------------------------------------
 # See: https://docs.djangoproject.com/en/dev/ref/settings/#admins
@@ -342,6 +357,63 @@ CELERY_BROKER_URL = env('CELERY_BROKER_URL')
 CELERY_BROKER_BACKEND = env('CELERY_BROKER_BACKEND')
 
 
+# Side effects of saves are delivered from the outbox by manage.py relay_outbox.
+# A failed event is retried after OUTBOX_RETRY_DELAY seconds, doubled on every
+# attempt up to OUTBOX_MAX_RETRY_DELAY, and parked after OUTBOX_MAX_ATTEMPTS
+# attempts (see --unpark).
+OUTBOX_BATCH_SIZE = env.int('OUTBOX_BATCH_SIZE', default=200)
+OUTBOX_MAX_ATTEMPTS = env.int('OUTBOX_MAX_ATTEMPTS', default=20)
+OUTBOX_RETRY_DELAY = env.float('OUTBOX_RETRY_DELAY', default=2)
+OUTBOX_MAX_RETRY_DELAY = env.float('OUTBOX_MAX_RETRY_DELAY', default=3600)
+OUTBOX_POLL_INTERVAL = env.float('OUTBOX_POLL_INTERVAL', default=0.5)
+OUTBOX_RETENTION_DAYS = env.int('OUTBOX_RETENTION_DAYS', default=7)
+
+
+# Comment notification digests are sent hourly, and daily at DIGEST_DAILY_HOUR
+# (UTC), to DIGEST_BATCH_SIZE users per SMTP connection.
+DIGEST_DAILY_HOUR = env.int('DIGEST_DAILY_HOUR', default=8)
+DIGEST_BATCH_SIZE = env.int('DIGEST_BATCH_SIZE', default=200)
+
+
+# Page sizes of the change feed (GET /changes/).
+CHANGES_PAGE_SIZE = env.int('CHANGES_PAGE_SIZE', default=500)
+CHANGES_MAX_PAGE_SIZE = env.int('CHANGES_MAX_PAGE_SIZE', default=5000)
+
+
+# Levels walked by the topic tree and ancestors endpoints, which also
+# ends the walk of cycles in the parents graph.
+TOPIC_TREE_MAX_DEPTH = env.int('TOPIC_TREE_MAX_DEPTH', default=32)
+
+
+# Bulk uploads of instances are stored in INGEST_ROOT, which the Celery
+# workers share, and loaded by INGEST_PARTS parallel tasks, INGEST_CHUNK_SIZE
+# lines at a time. Their jobs keep the first INGEST_MAX_ERRORS errors, and
+# the tasks not heard of for INGEST_STALE_AFTER seconds are queued again,
+# up to INGEST_MAX_ATTEMPTS times a part, before the job fails.
+INGEST_ROOT = env('INGEST_ROOT', default=str(APPS_DIR('media/ingest')))
+INGEST_PARTS = env.int('INGEST_PARTS', default=4)
+INGEST_CHUNK_SIZE = env.int('INGEST_CHUNK_SIZE', default=1000)
+INGEST_MAX_ERRORS = env.int('INGEST_MAX_ERRORS', default=100)
+INGEST_STALE_AFTER = env.int('INGEST_STALE_AFTER', default=300)
+INGEST_MAX_ATTEMPTS = env.int('INGEST_MAX_ATTEMPTS', default=3)
+
+# Instance.data is normalized into Instance.info NORMALIZE_CHUNK_SIZE
+# instances at a time, by NORMALIZE_WORKERS processes (0: one per CPU).
+NORMALIZE_CHUNK_SIZE = env.int('NORMALIZE_CHUNK_SIZE', default=500)
+NORMALIZE_WORKERS = env.int('NORMALIZE_WORKERS', default=0)
+
+
+# Changes for the sync database (see src/syncdb) are queued in the broker,
+# and a drain task writes them SYNCDB_FLUSH_AGE seconds after the first, in
+# batches of up to SYNCDB_BATCH_SIZE, acknowledged once written. A failed
+# drain is retried up to SYNCDB_MAX_RETRIES times, after RETRY_DELAY
+# seconds, doubled on every retry.
+SYNCDB_BATCH_SIZE = env.int('SYNCDB_BATCH_SIZE', default=500)
+SYNCDB_FLUSH_AGE = env.float('SYNCDB_FLUSH_AGE', default=5.)
+SYNCDB_MAX_RETRIES = env.int('SYNCDB_MAX_RETRIES', default=5)
+SYNCDB_RETRY_DELAY = env.int('SYNCDB_RETRY_DELAY', default=5)
+
+
 # CACHING
 # ------------------------------------------------------------------------------
 CACHE_REDIS_LOCATION = env('CACHE_REDIS_LOCATION')
@@ -372,6 +444,11 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Comment events are sent to websocket groups every WEBSOCKET_COALESCE_WINDOW
+# seconds (0 to send right away), keeping up to WEBSOCKET_MAX_QUEUE per group.
+WEBSOCKET_COALESCE_WINDOW = env.float('WEBSOCKET_COALESCE_WINDOW', default=0.25)
+WEBSOCKET_MAX_QUEUE = env.int('WEBSOCKET_MAX_QUEUE', default=100)
+
 # STRIPE
 STRIPE_LIVE_PUBLIC_KEY = env("STRIPE_LIVE_PUBLIC_KEY", default="<your publishable key>")
 STRIPE_LIVE_SECRET_KEY = env("STRIPE_LIVE_SECRET_KEY", default="<your secret key>")
@@ -0,0 +1,87 @@
+import base64
+from unittest import mock
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from django.core.urlresolvers import reverse
+
+from changes.models import Change
+from core.models import Topic, Comment
+from users.models import User
+
+
+class ChangeFeedTestCase(APITestCase):
+
+    def setUp(self):
+        self.testuser = User.objects.create_user('testuser', 'test@test.com')
+
+    def changes(self, **params):
+        response = self.client.get(reverse('changes'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_incremental_sync(self):
+
+        topic = Topic.objects.create(title='Changes', owner=self.testuser)
+        Comment.objects.create(topic=topic, text='First', owner=self.testuser)
+
+        feed = self.changes()
+        self.assertEqual(
+            sorted((c['model'], c['op']) for c in feed['results']),
+            [('comment', 'c'), ('topic', 'u')])
+        self.assertFalse(feed['more'])
+
+        topic.delete()
+
+        feed = self.changes(cursor=feed['cursor'])
+        self.assertEqual(
+            sorted((c['model'], c['op'], c['url']) for c in feed['results']),
+            [('comment', 'd', None), ('topic', 'd', None)])
+
+        self.assertEqual(self.changes(cursor=feed['cursor'])['results'], [])
+
+    def test_limit_and_models(self):
+
+        for i in range(3):
+            Topic.objects.create(title='Topic {}'.format(i), owner=self.testuser)
+
+        feed = self.changes(limit=2, models='topic')
+        self.assertEqual(len(feed['results']), 2)
+        self.assertTrue(feed['more'])
+
+        feed = self.changes(limit=2, models='topic', cursor=feed['cursor'])
+        self.assertEqual(len(feed['results']), 1)
+        self.assertFalse(feed['more'])
+
+    def test_invalid_cursor(self):
+
+        response = self.client.get(reverse('changes'), {'cursor': 'nope'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_negative_limit(self):
+
+        Topic.objects.create(title='Limit', owner=self.testuser)
+
+        self.assertEqual(len(self.changes(limit=-1)['results']), 1)
+
+    def test_running_transactions_hold_back(self):
+
+        Topic.objects.create(title='Running', owner=self.testuser)
+        txid = Change.objects.get().txid
+
+        # As if an older transaction was still running.
+        with mock.patch.object(Change, 'visible_before', return_value=txid):
+            feed = self.changes()
+        self.assertEqual(feed['results'], [])
+
+        feed = self.changes(cursor=feed['cursor'])
+        self.assertEqual(len(feed['results']), 1)
+
+    def test_id_cursor(self):
+
+        # Cursors of ids only are not served anymore.
+        cursor = base64.urlsafe_b64encode(b'v1:1').decode().rstrip('=')
+
+        response = self.client.get(reverse('changes'), {'cursor': cursor})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,208 @@
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from meta.models import IngestJob, IngestPart, Instance, Schema
+from users.models import User
+from api.v1.meta.ingest import (
+    PartTaken, load_chunk, load_part, load_part_chunk, prepare, read_range,
+    store
+)
+
+
+def jl(*lines):
+    return '\n'.join(
+        line if isinstance(line, str) else json.dumps(line)
+        for line in lines).encode()
+
+
+def jl_gz(*lines):
+    return gzip.compress(jl(*lines))
+
+
+class IngestTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('thinker', password='password')
+        self.client.force_login(self.user)
+
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        settings = override_settings(INGEST_ROOT=self.root, INGEST_CHUNK_SIZE=2)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def create_job(self, data):
+        job = IngestJob.objects.create(owner=self.user)
+        store(job, SimpleUploadedFile('file.jl.gz', data))
+        return job
+
+    def test_read_range(self):
+        data = jl({'a': 1}, '', '{broken', {'b': 2})
+        lines = list(read_range(io.BytesIO(data), 0, len(data)))
+
+        self.assertEqual(lines[0], (0, 9, {'a': 1}, None))
+        self.assertEqual([line[0] for line in lines], [0, 10, 18])
+        self.assertIsNone(lines[1][2])
+        self.assertEqual(lines[2][2], {'b': 2})
+
+        # A range starts and ends at line boundaries.
+        self.assertEqual(
+            [line[2] for line in read_range(io.BytesIO(data), 18, len(data))],
+            [{'b': 2}])
+
+    def test_parts_and_errors(self):
+        job = self.create_job(jl_gz(
+            {'identifiers': 'a', 'description': '.:en\nFirst'},
+            {'identifiers': 'b', 'role': 'agent'},
+            '{broken',
+            {'identifiers': 'c'},
+            {'identifiers': 'd'}))
+
+        job = prepare(job.pk, parts=2)
+        self.assertEqual(job.status, IngestJob.RUNNING)
+        self.assertEqual(job.parts.count(), 2)
+
+        for part in job.parts.all():
+            load_part(part.pk)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, IngestJob.DONE)
+        self.assertEqual((job.lines, job.loaded, job.failed), (5, 3, 2))
+        self.assertEqual(job.processed, job.size)
+        self.assertEqual(len(job.errors), 2)
+        self.assertFalse(os.listdir(self.root))
+
+        instance = Instance.objects.get(identifiers='a')
+        self.assertEqual(instance.languages, ['en'])
+        self.assertEqual(instance.translations['description'], {'en': 'First'})
+
+    def test_resume(self):
+        job = prepare(self.create_job(jl_gz(
+            {'identifiers': 'a'},
+            {'identifiers': 'b'},
+            {'identifiers': 'c'})).pk, parts=1)
+        part = job.parts.get()
+
+        # A worker saved the first chunk, and was lost.
+        with open(job.path[:-len('.gz')], 'rb') as f:
+            chunk = list(read_range(f, part.start, part.end))[:2]
+        load_part_chunk(part, chunk)
+
+        load_part(part.pk)
+
+        self.assertEqual(
+            sorted(Instance.objects.values_list('identifiers', flat=True)),
+            ['a', 'b', 'c'])
+        job.refresh_from_db()
+        self.assertEqual(job.status, IngestJob.DONE)
+        self.assertEqual(job.loaded, 3)
+
+    def test_part_taken(self):
+        job = prepare(self.create_job(jl_gz(
+            {'identifiers': 'a'}, {'identifiers': 'b'})).pk, parts=1)
+        part = job.parts.get()
+        stale = IngestPart.objects.get(pk=part.pk)
+
+        load_part(part.pk)
+
+        with open(job.path[:-len('.gz')], 'rb') as f:
+            chunk = list(read_range(f, stale.start, stale.end))
+        with self.assertRaises(PartTaken):
+            load_part_chunk(stale, chunk)
+
+        self.assertEqual(Instance.objects.count(), 2)
+
+    def test_related_fields(self):
+        schema = Schema.objects.create(name='people', version='1')
+        job = prepare(self.create_job(jl_gz(
+            {'identifiers': 'a',
+             'schema': 'http://testserver/schemas/{}/'.format(schema.pk)},
+            {'identifiers': 'b', 'data': {'name': 'nul \u0000'}},
+            {'identifiers': 'c'})).pk, parts=1)
+
+        load_part(job.parts.get().pk)
+
+        self.assertEqual(Instance.objects.get(identifiers='a').schema, schema)
+        job.refresh_from_db()
+        self.assertEqual(job.status, IngestJob.DONE)
+        self.assertEqual((job.loaded, job.failed), (2, 1))
+
+    def test_related_resolved_once(self):
+        schema = Schema.objects.create(name='people', version='1')
+        url = 'http://testserver/schemas/{}/'.format(schema.pk)
+        chunk = [(i, i + 1, {'identifiers': str(i), 'schema': url}, None)
+                 for i in range(3)]
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(load_chunk(chunk), (3, []))
+
+        self.assertEqual(
+            len([q for q in queries if 'FROM "meta_schema"' in q['sql']]), 1)
+
+    @override_settings(INGEST_MAX_ATTEMPTS=2)
+    def test_give_up(self):
+        job = prepare(self.create_job(jl_gz({'identifiers': 'a'})).pk)
+        part = job.parts.get()
+        os.remove(job.path[:-len('.gz')])
+
+        with self.assertRaises(OSError):
+            load_part(part.pk)
+        load_part(part.pk)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, IngestJob.FAILED)
+        self.assertEqual(IngestPart.objects.get(pk=part.pk).attempts, 2)
+
+    def test_not_gzip(self):
+        job = prepare(self.create_job(b'{"identifiers": "a"}').pk)
+
+        self.assertEqual(job.status, IngestJob.FAILED)
+        self.assertFalse(job.parts.exists())
+        self.assertFalse(os.listdir(self.root))
+
+    def test_claimed_once(self):
+        job = self.create_job(jl_gz({'identifiers': 'a'}))
+        IngestJob.objects.filter(pk=job.pk).update(status=IngestJob.PREPARING)
+
+        job = prepare(job.pk)
+        self.assertEqual(job.status, IngestJob.PREPARING)
+        self.assertFalse(job.parts.exists())
+
+        # The worker that claimed it was lost.
+        IngestJob.objects.filter(pk=job.pk).update(
+            updated_date=job.updated_date - timedelta(
+                seconds=settings.INGEST_STALE_AFTER + 1))
+
+        job = prepare(job.pk)
+        self.assertEqual(job.status, IngestJob.RUNNING)
+        self.assertEqual(job.parts.count(), 1)
+
+    def test_upload(self):
+        upload = SimpleUploadedFile(
+            'file.jl.gz', jl_gz({'identifiers': 'a'}, {'identifiers': 'b'}))
+
+        response = self.client.post(
+            '/instances_bulk/',
+            {'file.jl.gz': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], IngestJob.PENDING)
+
+        job = IngestJob.objects.get(pk=response.data['id'])
+        self.assertTrue(os.path.exists(job.path))
+
+        response = self.client.get(reverse('ingestjob-detail', args=(job.pk,)))
+        self.assertIsNone(response.data['eta'])
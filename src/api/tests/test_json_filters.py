@@ -0,0 +1,42 @@
+from rest_framework.test import APITestCase
+
+from meta.models import Instance, Schema
+from users.models import User
+
+
+class JSONContainsFilterTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('thinker', password='password')
+        self.client.force_login(self.user)
+
+        self.schema = Schema.objects.create(name='people', version='1')
+        Instance.objects.create(identifiers='max', schema=self.schema, info={
+            'Q82799': 'Max', 'Q319608': {'Q1413235': 14},
+            'Q7569': [{'Q82799': 'Mike'}, {'Q82799': 'Tom'}]})
+        Instance.objects.create(identifiers='lin', schema=self.schema, info={
+            'Q82799': 'Lin', 'Q319608': {'Q1413235': '14'}})
+        Instance.objects.create(identifiers='other', info={'Q82799': 'Max'})
+
+    def identifiers(self, **params):
+        response = self.client.get('/instances/', params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(instance['identifiers'] for instance in response.data['results'])
+
+    def test_contains(self):
+        self.assertEqual(self.identifiers(info__Q82799='Max'), ['max', 'other'])
+        self.assertEqual(
+            self.identifiers(schema=self.schema.pk, info__Q82799='Max'), ['max'])
+
+        self.assertEqual(self.identifiers(info__Q319608__Q1413235='14'), ['max'])
+        self.assertEqual(self.identifiers(info__Q319608__Q1413235='"14"'), ['lin'])
+
+        self.assertEqual(
+            self.identifiers(info__contains='{"Q7569": [{"Q82799": "Tom"}]}'), ['max'])
+        self.assertEqual(
+            self.identifiers(info__Q82799='Max', info__Q319608__Q1413235='14'), ['max'])
+        self.assertEqual(self.identifiers(data__Q82799='Max'), [])
+
+    def test_invalid(self):
+        response = self.client.get('/instances/', {'info__contains': '{broken'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,44 @@
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from core.models import Topic, Comment
+from generic.models import LanguageCount
+from users.models import User
+
+
+class LanguageCountTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('thinker', password='password')
+        self.topic = Topic.objects.create(
+            title='.:en:Water\n.:ru:Вода', owner=self.user)
+        self.comment = Comment.objects.create(
+            topic=self.topic, text='.:en:Hello', owner=self.user)
+
+    def counts(self):
+        return self.client.get(reverse('language-counts')).data
+
+    def test_counted_on_save(self):
+        counts = self.counts()
+
+        self.assertEqual(counts['topic'], {'en': 1, 'ru': 1})
+        self.assertEqual(counts['comment'], {'en': 1})
+        self.assertEqual(counts['type'], {})
+
+    def test_updated_languages(self):
+        topic = Topic.objects.get(pk=self.topic.pk)
+        topic.title = '.:ru:Вода'
+        topic.save()
+
+        self.assertEqual(self.counts()['topic'], {'ru': 1})
+
+    def test_deleted(self):
+        Comment.objects.filter(pk=self.comment.pk).delete()
+
+        self.assertEqual(self.counts()['comment'], {})
+
+    def test_rebuild(self):
+        LanguageCount.objects.all().delete()
+        LanguageCount.rebuild(Topic)
+
+        self.assertEqual(self.counts()['topic'], {'en': 1, 'ru': 1})
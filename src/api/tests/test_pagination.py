@@ -0,0 +1,70 @@
+from rest_framework.test import APITestCase
+
+from django.core.urlresolvers import reverse
+
+from core.models import Topic
+from users.models import User
+
+
+class KeysetPaginationTestCase(APITestCase):
+
+    def setUp(self):
+        self.testuser = User.objects.create_user('testuser', 'test@test.com')
+        self.topics = [
+            Topic.objects.create(title='Topic {}'.format(i), owner=self.testuser)
+            for i in range(7)]
+
+    def pages(self, url):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([topic['id'] for topic in response.data['results']])
+            url = response.data['next']
+        return pages
+
+    def test_pages_by_pk(self):
+
+        pages = self.pages(reverse('topic-list') + '?page_size=3&cursor=')
+        ids = sorted((topic.pk for topic in self.topics), reverse=True)
+
+        self.assertEqual(pages, [ids[0:3], ids[3:6], ids[6:]])
+
+    def test_pages_by_created_date(self):
+
+        pages = self.pages(reverse('topic-list') + '?page_size=3&order=created&cursor=')
+        ids = [topic.pk for topic in self.topics]
+
+        self.assertEqual(pages, [ids[0:3], ids[3:6], ids[6:]])
+
+    def test_previous(self):
+
+        first = self.client.get(reverse('topic-list'), {'page_size': 3, 'cursor': ''})
+        second = self.client.get(first.data['next'])
+        previous = self.client.get(second.data['previous'])
+
+        self.assertIsNone(first.data['previous'])
+        self.assertEqual(previous.data['results'], first.data['results'])
+
+    def test_estimated_count(self):
+
+        response = self.client.get(
+            reverse('topic-list'), {'page_size': 3, 'cursor': '', 'estimate': 1})
+
+        self.assertIn('estimated_count', response.data)
+        self.assertNotIn('count', response.data)
+
+    def test_invalid_cursor(self):
+
+        response = self.client.get(reverse('topic-list'), {'cursor': 'nope'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_page_numbers_without_cursor(self):
+
+        response = self.client.get(
+            reverse('topic-list'), {'page_size': 3, 'page': 3})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 7)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
@@ -0,0 +1,91 @@
+import json
+
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from core.models import Topic, Comment
+from meta.models import Type
+from trade.models import Payment
+from transactions.models import (
+    Currency,
+    HourPriceSnapshot,
+    CurrencyPriceSnapshot,
+)
+from users.models import User
+
+
+class ListQueriesTestCase(APITestCase):
+    """
+    Guards that the number of queries of a list endpoint does not grow
+    with page size, e.g., because of a missing select/prefetch plan.
+    """
+
+    def setUp(self):
+        self.eur = Currency(label='eur'); self.eur.save()
+        self.usd = Currency(label='usd'); self.usd.save()
+
+        HourPriceSnapshot(
+            name='FRED',
+            base=self.usd,
+            data=json.loads("""
+{"realtime_start":"2017-07-28","realtime_end":"2017-07-28","observation_start":"1600-01-01","observation_end":"9999-12-31","units":"lin","output_type":1,"file_type":"json","order_by":"observation_date","sort_order":"desc","count":136,"offset":0,"limit":1,"observations":[{"realtime_start":"2017-07-28","realtime_end":"2017-07-28","date":"2017-06-01","value":"26.25"}]}"""),
+            endpoint='https://api.stlouisfed.org/fred/series/observations?series_id=CES0500000003&api_key=0a90ca7b5204b2ed6e998d9f6877187e&limit=1&sort_order=desc&file_type=json',
+        ).save()
+        CurrencyPriceSnapshot(
+            name='FIXER',
+            base=self.eur,
+            data=json.loads("""
+{"base":"EUR","date":"2017-07-28","rates":{"USD":1.1729}}"""),
+            endpoint='https://api.fixer.io/latest?base=eur',
+        ).save()
+
+        category = Type.objects.create(name='.:en:Science', is_category=True)
+
+        for i in range(10):
+            user = User.objects.create_user(
+                'user{}'.format(i), 'user{}@test.com'.format(i))
+            Payment.objects.create(
+                request={"amount": "10", "currency": "usd"},
+                platform=0, provider=0, owner=user)
+
+            topic = Topic.objects.create(
+                title='.:en:Topic {}'.format(i), owner=user)
+            topic.editors.add(user)
+            topic.categories.add(category)
+            if i:
+                topic.parents.add(Topic.objects.get(title='.:en:Topic {}'.format(i - 1)))
+
+            comment = Comment(topic=topic, text='{1}{?1} comment', owner=user)
+            comment.save()
+            comment.invest(0.5, 'eur', user)
+
+        self.client.force_authenticate(user=user)
+
+    def assertQueriesConstant(self, url_name, page_param):
+        counts = []
+
+        for size in (2, 8):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(
+                    reverse(url_name), {page_param: size, 'lang': 'en'})
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(queries))
+
+        self.assertEqual(counts[0], counts[1], url_name)
+
+    def test_topics(self):
+        self.assertQueriesConstant('topic-list', 'page_size')
+
+    def test_comments(self):
+        self.assertQueriesConstant('comment-list', 'page_size')
+
+    def test_transactions(self):
+        self.assertQueriesConstant('transaction-list', 'limit')
+
+    def test_contributions(self):
+        self.assertQueriesConstant('contributioncertificate-list', 'limit')
+
+    def test_reserves(self):
+        self.assertQueriesConstant('reserve-list', 'limit')
@@ -0,0 +1,93 @@
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+from test_plus.test import TestCase
+
+from core.models import Topic, Comment
+from core.search import get_config, search
+from users.models import User
+
+
+class TestSearchVector(TestCase):
+
+    def setUp(self):
+        self.thinker = self.make_user('thinker')
+        self.topic = Topic.objects.create(
+            title='.:en:Running water\n.:ru:Текущая вода',
+            body='.:en\nPipes for the villages',
+            owner=self.thinker)
+
+    def test_updated_on_save(self):
+        self.topic.refresh_from_db()
+        self.assertIn("'run'", self.topic.search_vector)
+        self.assertIn("'вод'", self.topic.search_vector)
+
+        self.topic.title = '.:en:Clean air'
+        self.topic.save()
+        self.topic.refresh_from_db()
+
+        self.assertNotIn("'run'", self.topic.search_vector)
+        self.assertIn("'air'", self.topic.search_vector)
+
+    def test_stemmed_in_language(self):
+        found = search(Topic.objects.all(), 'runs', lang='en')
+        self.assertEqual(list(found), [self.topic])
+
+        self.assertFalse(search(Topic.objects.all(), 'runs', lang='xx'))
+        self.assertEqual(get_config('xx'), 'simple')
+
+    def test_only_in_language(self):
+        Topic.objects.create(title='.:ru:Running', owner=self.thinker)
+
+        self.assertEqual(
+            list(search(Topic.objects.all(), 'running', lang='en',
+                        fields=['title'])),
+            [self.topic])
+
+    def test_any_language(self):
+        self.assertEqual(
+            list(search(Topic.objects.all(), 'village')), [self.topic])
+        self.assertEqual(
+            list(search(Topic.objects.all(), 'воды')), [self.topic])
+
+    def test_substring(self):
+        found = search(Topic.objects.all(), 'ater', fields=['title'])
+        self.assertEqual(list(found), [self.topic])
+
+
+class TestSearchAPI(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('thinker', password='password')
+        self.topic = Topic.objects.create(
+            title='.:en:Water', owner=self.user)
+        self.other = Topic.objects.create(
+            title='.:en:Roads', body='.:en\nRoads along the water',
+            owner=self.user)
+        Comment.objects.create(
+            topic=self.topic, text='.:en:More water filters {1}',
+            owner=self.user)
+
+    def test_ranked(self):
+        response = self.client.get(
+            reverse('topic-search'), {'search': 'water', 'lang': 'en'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [topic['id'] for topic in response.data],
+            [self.topic.pk, self.other.pk])
+
+    def test_limit(self):
+        response = self.client.get(
+            reverse('topic-search'), {'search': 'water', 'limit': 1})
+
+        self.assertEqual(len(response.data), 1)
+
+    def test_list_filtered(self):
+        response = self.client.get(
+            reverse('comment-list'), {'search': 'filter', 'lang': 'en'})
+
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_no_search(self):
+        response = self.client.get(reverse('topic-search'))
+        self.assertEqual(response.data, [])
@@ -98,6 +98,7 @@ class UserSerializer(serializers.HyperlinkedModelSerializer):
             'last_name',
             'email',
             'username',
+            'digest',
             'auth_token',
         )
 
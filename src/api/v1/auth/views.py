@@ -213,7 +213,7 @@ class UnsubscribedView(views.APIView):
                 topic = Topic.objects.get(pk=topic)
                 user = User.objects.get(email=signer.unsign(sign))
 
-                topic.unsubscribed.add(user)
+                topic.unsubscribe(user)
 
                 data = {'status': 'successfully unsubscribed from topic #{}'.format(topic.pk)}
             except:
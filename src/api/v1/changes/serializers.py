@@ -0,0 +1,29 @@
+from rest_framework import serializers
+from rest_framework.reverse import reverse
+
+from changes.models import Change
+
+
+class ChangeSerializer(serializers.ModelSerializer):
+
+    VIEW_NAMES = {
+        'topic': 'topic-detail',
+        'comment': 'comment-detail',
+        'transaction': 'transaction-detail',
+        'contribution': 'contributioncertificate-detail',
+    }
+
+    id = serializers.IntegerField(source='object_id')
+    url = serializers.SerializerMethodField()
+
+    def get_url(self, obj):
+        if obj.op == Change.DELETED:
+            return None
+
+        return reverse(
+            self.VIEW_NAMES[obj.model], kwargs={'pk': obj.object_id},
+            request=self.context.get('request'))
+
+    class Meta:
+        model = Change
+        fields = ('model', 'id', 'op', 'url', 'created_date')
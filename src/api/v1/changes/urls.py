@@ -0,0 +1,8 @@
+from django.conf.urls import url
+
+from api.v1.changes import views
+
+
+urlpatterns = [
+    url(r'^changes/$', views.ChangeFeedView.as_view(), name="changes"),
+]
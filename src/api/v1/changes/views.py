@@ -0,0 +1,87 @@
+import base64
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework import views, exceptions
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from changes.models import Change
+from api.v1.changes.serializers import ChangeSerializer
+
+
+def encode_cursor(txid, change_id):
+    return base64.urlsafe_b64encode(
+        'v2:{}:{}'.format(txid, change_id).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    The (txid, id) of the last change a client has seen, from its cursor.
+    """
+    if not cursor:
+        return 0, 0
+
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        parts = base64.urlsafe_b64decode(padded.encode()).decode().split(':')
+        assert parts[0] == 'v2'
+        return int(parts[1]), int(parts[2])
+    except Exception:
+        raise exceptions.ValidationError({'cursor': 'Invalid cursor.'})
+
+
+class ChangeFeedView(views.APIView):
+    """
+    Topics, comments, transactions and contributions created, updated
+    or deleted after the cursor, oldest first, at most once per object:
+
+    GET /changes/?cursor=<cursor>&limit=<n>&models=topic,comment
+
+    Pass the returned cursor to get the next changes; "more" tells if
+    there are more right away. Changes of transactions that are still
+    running, or of ones that began after them, are held back until those
+    finish, so that no change is ever behind a cursor, when it shows up.
+    """
+    permission_classes = (AllowAny, )
+
+    def get(self, request, *args, **kwargs):
+        after_txid, after_id = decode_cursor(request.GET.get('cursor'))
+
+        try:
+            limit = max(1, min(
+                int(request.GET.get('limit', settings.CHANGES_PAGE_SIZE)),
+                settings.CHANGES_MAX_PAGE_SIZE))
+        except ValueError:
+            raise exceptions.ValidationError({'limit': 'Not a number.'})
+
+        queryset = Change.objects.filter(
+            Q(txid__gt=after_txid) | Q(txid=after_txid, id__gt=after_id),
+            txid__lt=Change.visible_before(),
+        ).order_by('txid', 'id')
+
+        models = request.GET.get('models')
+        if models:
+            queryset = queryset.filter(model__in=models.split(','))
+
+        changes = list(queryset[:limit + 1])
+        more = len(changes) > limit
+        changes = changes[:limit]
+
+        # The last change of each object, in the order of last changes.
+        latest = OrderedDict()
+        for change in changes:
+            key = (change.model, change.object_id)
+            latest.pop(key, None)
+            latest[key] = change
+
+        return Response({
+            'results': ChangeSerializer(
+                latest.values(), many=True,
+                context={'request': request}).data,
+            'cursor': encode_cursor(
+                changes[-1].txid, changes[-1].id) if changes
+            else encode_cursor(after_txid, after_id),
+            'more': more,
+        })
@@ -6,15 +6,61 @@ from langsplit import splitter
 from rest_framework import fields, serializers
 
 
-def get_langsplit(lang, value):
-    split = splitter.split(value, title=True)
+def get_langsplit(lang, value, split=None):
+    if split is None:
+        split = splitter.split(value, title=True)
     return split.get(lang) or 'languages: {}'.format(list(split.keys()))
 
+
+def first_language(value, split):
+    """
+    The language of the first section of a canonical value, as converted
+    on save, e.g., 'en' of '.:en:Title', else any of the split ones.
+    """
+    sep = splitter.settings.SEP
+    if value.startswith(sep) and value[len(sep):len(sep) + 2] in split:
+        return value[len(sep):len(sep) + 2]
+    return next(iter(split))
+
+
 class UserField(serializers.CharField):
     def to_representation(self, value):
         return {"id": value.pk, "username": value.username}
 
 
+class CachedHyperlinkedRelatedField(serializers.HyperlinkedRelatedField):
+    """
+    Resolves each URL once, into the 'related_cache' dict of the context,
+    if there is one, e.g., once per chunk of a bulk upload.
+    """
+
+    def get_object(self, view_name, view_args, view_kwargs):
+        cache = self.context.get('related_cache')
+        if cache is None:
+            return super().get_object(view_name, view_args, view_kwargs)
+
+        key = (view_name, view_kwargs[self.lookup_url_kwarg])
+        if key not in cache:
+            cache[key] = super().get_object(view_name, view_args, view_kwargs)
+        return cache[key]
+
+
+class AnnotatedField(serializers.ReadOnlyField):
+    """
+    Reads a queryset annotation, e.g., from Topic.objects.with_hours(),
+    if the instance has it, else the source (model method) value.
+    """
+
+    def __init__(self, annotation, **kwargs):
+        self.annotation = annotation
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        if hasattr(instance, self.annotation):
+            return getattr(instance, self.annotation)
+        return super().get_attribute(instance)
+
+
 class CategoryNameField(serializers.RelatedField):
     """
     Topic categories string representation field
@@ -40,27 +86,40 @@ class CategoryNameField(serializers.RelatedField):
         value = obj.name
 
         if lang and value:
-            return get_langsplit(lang, value)
+            return get_langsplit(lang, value, obj.get_translations('name'))
 
         return value
 
 
 class LangSplitField(fields.CharField):
-    """Langsplit CharField"""
+    """
+    Langsplit CharField, reading the translations of the instance,
+    split on save (see generic.models.GenericTranslationModel).
+    """
 
     def to_internal_value(self, data):
         return super().to_internal_value(data)
 
-    def to_representation(self, value):
+    def get_attribute(self, instance):
+        value = super().get_attribute(instance)
+        get_translations = getattr(instance, 'get_translations', None)
+        return value, get_translations and get_translations(self.source)
+
+    def to_representation(self, data):
+        value, langs = data
         lang = self.context['request'].query_params.get('lang')
 
         if lang and value:
+            # Not split on save yet
+            if langs is None:
+                langs = splitter.split(value, title=True)
+            if not langs:
+                return value
             # Return given language, if exists
-            langs = splitter.split(value, title=True)
-            if lang in langs.keys():
+            if lang in langs:
                 return langs[lang]
             # else first language defined in doc.
             else:
-                return list(langs.items())[0][-1]
+                return langs[first_language(value, langs)]
 
         return value
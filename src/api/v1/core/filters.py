@@ -1,6 +1,8 @@
 from django_filters import rest_framework as filters
+from rest_framework.filters import SearchFilter
 
 from core.models import Topic
+from core.search import search
 
 
 class OwnerFilter(filters.CharFilter):
@@ -19,3 +21,22 @@ class TopicFilter(filters.FilterSet):
     class Meta:
         model = Topic
         fields = ['owner', 'parents', 'children', 'type', 'categories', 'is_draft', 'editors']
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    Matches ?search= against the search_vector of the rows, in the text
+    search configuration of ?lang=, of the rows in it, or in any, or as a
+    substring of the view search_fields (trigram indexed), see core.search.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        text = ' '.join(self.get_search_terms(request))
+
+        if not text:
+            return queryset
+
+        return search(
+            queryset, text,
+            lang=request.query_params.get('lang'),
+            fields=getattr(view, 'search_fields', ()))
@@ -3,6 +3,7 @@ from langsplit import splitter
 from rest_framework import serializers
 
 from api.v1.core.fields import (
+    AnnotatedField,
     LangSplitField,
     UserField,
     CategoryNameField
@@ -10,11 +11,11 @@ from api.v1.core.fields import (
 from core.models import (
     Topic,
     Comment,
+    TopicRollup,
 )
 from meta.models import Type
-from transactions.models import ContributionCertificate, Transaction
+from transactions.models import Transaction, UserBalance
 from users.models import (User, LanguageName)
-from trade.models import Reserve
 from decimal import Decimal
 
 
@@ -25,6 +26,29 @@ class TopicParentsSerializer(serializers.ModelSerializer):
                   'languages', 'is_draft')
 
 
+class TopicRollupSerializer(serializers.ModelSerializer):
+    """
+    Hours of the topic subtree, see core.models.TopicRollup.
+    """
+    class Meta:
+        model = TopicRollup
+        fields = ('declared', 'matched', 'funds', 'updated_date')
+
+
+class TopicNodeSerializer(serializers.ModelSerializer):
+    """
+    A topic of Topic.walk(), with its depth and parent ids.
+    """
+    title = LangSplitField(read_only=True)
+    depth = serializers.IntegerField(read_only=True)
+    parents = serializers.ListField(source='parent_ids', read_only=True)
+
+    class Meta:
+        model = Topic
+        fields = ('id', 'url', 'type', 'title', 'owner', 'languages',
+                  'is_draft', 'comment_count', 'depth', 'parents')
+
+
 class TypeParentsSerializer(serializers.ModelSerializer):
     class Meta:
         model = Type
@@ -79,11 +103,19 @@ class TopicSerializer(serializers.HyperlinkedModelSerializer):
         source='categories',
     )
 
+    # Read from Topic.objects.with_hours() annotations, when available
+    matched = AnnotatedField('matched_hours')
+    declared = AnnotatedField('declared_hours')
+    funds = AnnotatedField('funds_hours')
+
+    rollup = TopicRollupSerializer(read_only=True)
+
     class Meta:
         model = Topic
         fields = ('id', 'url', 'type', 'title', 'body', 'owner', 'editors',
                   'parents', 'children', 'categories', 'categories_str', 'categories_names', 'languages', 'is_draft', 'comment_count',
-                  'blockchain', 'matched', 'declared', 'created_date', 'updated_date', 'funds','data')
+                  'blockchain', 'matched', 'declared', 'created_date', 'updated_date', 'funds','data',
+                  'rollup')
 
     def process_categories(self, validated_data):
         categories_str = validated_data.pop('categories_str', [])
@@ -131,6 +163,11 @@ class CommentSerializer(serializers.HyperlinkedModelSerializer):
         view_name='topic-detail', queryset=Topic.objects.all())
     owner = UserField(read_only=True)
 
+    # Read from Comment.objects.with_hours() annotations, when available
+    matched = AnnotatedField('matched_hours')
+    donated = AnnotatedField('donated_hours')
+    remains = AnnotatedField('remains_hours')
+
     def get_text(self, obj):
         lang = self.context['request'].query_params.get('lang')
 
@@ -149,6 +186,10 @@ class CommentSerializer(serializers.HyperlinkedModelSerializer):
 
 
 class UserBalanceSerializer(serializers.HyperlinkedModelSerializer):
+    """
+    Reads the materialized UserBalance row of each user,
+    see transactions.models.UserBalance.
+    """
 
     balance = serializers.SerializerMethodField('matched')
     quota = serializers.SerializerMethodField('compute_quota')
@@ -158,16 +199,18 @@ class UserBalanceSerializer(serializers.HyperlinkedModelSerializer):
     claimed = serializers.SerializerMethodField('compute_claimed')
 
     def matched(self, obj):
-        return ContributionCertificate.user_matched(obj)
+        return UserBalance.for_user(obj).matched
 
     def compute_claimed(self, obj):
-        return Comment.user_claimed(obj)
+        return UserBalance.for_user(obj).claimed
 
     def compute_quota(self, obj):
-        return Transaction.user_quota_remains_today(obj)
+        if not hasattr(obj, '_quota_remains_today'):
+            obj._quota_remains_today = Transaction.user_quota_remains_today(obj)
+        return obj._quota_remains_today
 
     def compute_reserve(self, obj):
-        return Reserve.user_reserve_remains(obj)
+        return UserBalance.for_user(obj).reserve
 
     def compute_credit(self, obj):
         return self.compute_quota(obj) + self.compute_reserve(obj)
@@ -1,3 +1,4 @@
+from django.conf.urls import url
 from rest_framework import routers
 from api.v1.core import views
 
@@ -9,4 +10,6 @@ router.register(r'topics', views.TopicViewSet)
 router.register(r'user_balance', views.UserBalanceViewSet)
 router.register(r'language_names', views.LanguageNameViewSet)
 
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    url(r'^language_counts/$', views.LanguageCountView.as_view(), name='language-counts'),
+]
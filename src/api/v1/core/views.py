@@ -1,8 +1,13 @@
+from django.db.models import F
+from rest_framework.decorators import detail_route, list_route
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
-from rest_framework import viewsets, filters
+from rest_framework.response import Response
+from rest_framework import views, viewsets, filters
 
 from django_filters.rest_framework import DjangoFilterBackend
 
+from generic.models import LanguageCount
+from meta.models import Type
 from users.models import User, LanguageName
 
 from core.models import Topic, Comment
@@ -11,6 +16,7 @@ from api.v1.generic.viewsets import CustomViewSet
 
 from api.v1.core.serializers import (
     TopicSerializer,
+    TopicNodeSerializer,
     CommentSerializer,
 
     UserBalanceSerializer,
@@ -18,32 +24,91 @@ from api.v1.core.serializers import (
 )
 
 from api.v1.generic.pagination_classes import (
-    StandardResultsSetPagination,
-    LargeResultsSetPagination
+    KeysetPagination,
+    LargeKeysetPagination
 )
 from rest_framework.pagination import LimitOffsetPagination
 
-from api.v1.core.filters import TopicFilter
+from api.v1.core.filters import FullTextSearchFilter, TopicFilter
 
 
-class TopicViewSet(CustomViewSet):
+class SearchMixin(object):
+    """
+    Best ranked matches of ?search=, e.g.:
+
+    GET /topics/search/?search=water&lang=en&limit=10
+    """
+    search_limit = 25
+    max_search_limit = 100
+
+    @list_route(methods=['get'])
+    def search(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        if 'search_rank' not in queryset.query.annotations:
+            return Response([])
+
+        try:
+            limit = min(int(request.query_params['limit']),
+                        self.max_search_limit)
+        except (KeyError, ValueError):
+            limit = self.search_limit
+
+        queryset = queryset.order_by(
+            F('search_rank').desc(nulls_last=True), '-pk')[:max(limit, 0)]
+
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+
+class TopicViewSet(SearchMixin, CustomViewSet):
 
     # serializer_class = LimitOffsetPagination
     serializer_class = TopicSerializer
-    pagination_class = StandardResultsSetPagination
+    pagination_class = KeysetPagination
     permission_classes = (IsAuthenticatedOrReadOnly,)
     queryset = Topic.objects.all()
+    select_related_fields = ('owner', 'rollup')
+    prefetch_related_fields = ('editors', 'parents', 'children', 'categories')
     search_fields = ['title']
     filter_backends = (DjangoFilterBackend,
-                       filters.SearchFilter,)
+                       FullTextSearchFilter,)
     filter_class = TopicFilter
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
+    def walk(self, ancestors):
+        try:
+            depth = int(self.request.query_params['depth'])
+        except (KeyError, ValueError):
+            depth = None
+
+        topics = self.get_object().walk(ancestors=ancestors, max_depth=depth)
+        serializer = TopicNodeSerializer(
+            topics, many=True, context=self.get_serializer_context())
+        return Response(serializer.data)
+
+    @detail_route(methods=['get'])
+    def tree(self, request, pk=None):
+        """
+        The topic and its descendants, to ?depth= levels, in one query.
+        """
+        return self.walk(ancestors=False)
+
+    @detail_route(methods=['get'])
+    def ancestors(self, request, pk=None):
+        """
+        The topic and its ancestors, to ?depth= levels, in one query.
+        """
+        return self.walk(ancestors=True)
+
     def get_queryset(self):
         qs = super(TopicViewSet, self).get_queryset()
 
+        if self.action in ('list', 'retrieve', 'search'):
+            qs = qs.with_hours()
+
         TYPE = self.request.query_params.get('type', None)
 
         if TYPE:
@@ -59,15 +124,16 @@ class TopicViewSet(CustomViewSet):
         return qs
 
 
-class CommentViewSet(CustomViewSet):
+class CommentViewSet(SearchMixin, CustomViewSet):
 
     serializer_class = CommentSerializer
-    pagination_class = LargeResultsSetPagination
+    pagination_class = LargeKeysetPagination
     permission_classes = (IsAuthenticatedOrReadOnly,)
     queryset = Comment.objects.all()
+    select_related_fields = ('owner',)
     search_fields = ['text']
     filter_backends = (DjangoFilterBackend,
-                       filters.SearchFilter,)
+                       FullTextSearchFilter,)
 
     filter_fields = ('topic',)
 
@@ -77,6 +143,9 @@ class CommentViewSet(CustomViewSet):
     def get_queryset(self):
         qs = super(CommentViewSet, self).get_queryset()
 
+        if self.action in ('list', 'retrieve', 'search'):
+            qs = qs.with_hours()
+
         lang = self.request.query_params.get('lang', None)
         only = self.request.query_params.get('only', None)
 
@@ -94,7 +163,7 @@ class UserBalanceViewSet(viewsets.ReadOnlyModelViewSet):
     filter_fields = ('username', 'id',)
 
     serializer_class = UserBalanceSerializer
-    queryset = User.objects.all()
+    queryset = User.objects.select_related('user_balance')
     permission_classes = (IsAuthenticatedOrReadOnly,)
 
 
@@ -102,3 +171,15 @@ class LanguageNameViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = LanguageNameSerializer
     queryset = LanguageName.objects.all()
     permission_classes = (IsAuthenticatedOrReadOnly,)
+
+
+class LanguageCountView(views.APIView):
+    """
+    Topics, comments and types per language, e.g.:
+
+    {"topic": {"en": 120, "ru": 40}, "comment": {...}, "type": {...}}
+    """
+    permission_classes = (IsAuthenticatedOrReadOnly,)
+
+    def get(self, request):
+        return Response(LanguageCount.facets(Topic, Comment, Type))
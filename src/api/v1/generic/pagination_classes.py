@@ -1,4 +1,14 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from collections import OrderedDict
+
+from django.db import connection
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    BasePagination, LimitOffsetPagination, PageNumberPagination
+)
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class LargeResultsSetPagination(PageNumberPagination):
@@ -11,3 +21,187 @@ class StandardResultsSetPagination(PageNumberPagination):
     page_size = 25
     page_size_query_param = 'page_size'
     max_page_size = 50
+
+
+class KeysetPagination(BasePagination):
+    """
+    Pages by the key of the last row seen, instead of OFFSET, so that
+    every page takes the same time, and without COUNT(*), when the
+    request has a cursor (empty for the first page):
+
+    GET /topics/?cursor=&order=created&page_size=25
+    GET /topics/?cursor=<cursor>
+
+    The order is one of .orderings, all of whose fields go in the same
+    direction (backed by an index on them). With ?estimate=1, the
+    response includes the planner's estimated_count.
+
+    Without a cursor, the request is paginated by .fallback_class, as it
+    was before, with count and ?page=.
+    """
+    fallback_class = StandardResultsSetPagination
+    fallback = None
+
+    page_size = 25
+    page_size_query_param = 'page_size'
+    max_page_size = 50
+
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'order'
+    estimate_query_param = 'estimate'
+
+    orderings = OrderedDict([
+        ('-pk', ('-pk',)),
+        ('created', ('created_date', 'pk')),
+    ])
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params:
+            self.fallback = self.fallback_class()
+            return self.fallback.paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.queryset = queryset
+        self.page_size = self.get_page_size(request)
+
+        self.order, keys, reverse = self.decode_cursor(request)
+        ordering = self.orderings[self.order]
+        model = queryset.model
+
+        self.fields = [
+            model._meta.pk if name.lstrip('-') == 'pk'
+            else model._meta.get_field(name.lstrip('-'))
+            for name in ordering]
+
+        descending = ordering[0].startswith('-')
+        if reverse:
+            descending = not descending
+
+        queryset = queryset.order_by(*[
+            ('-' if descending else '') + name.lstrip('-')
+            for name in ordering])
+
+        if keys is not None:
+            queryset = queryset.extra(
+                where=['({}) {} ({})'.format(
+                    ', '.join('"{}"."{}"'.format(
+                        model._meta.db_table, field.column)
+                        for field in self.fields),
+                    '<' if descending else '>',
+                    ', '.join(['%s'] * len(keys)))],
+                params=keys)
+
+        rows = list(queryset[:self.page_size + 1])
+        more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, more
+        else:
+            self.has_next, self.has_previous = more, keys is not None
+
+        self.rows = rows
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+            if size > 0:
+                return min(size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def encode_cursor(self, row, reverse):
+        data = {
+            'o': self.order,
+            'k': [field.value_to_string(row) for field in self.fields],
+            'r': int(reverse),
+        }
+        return base64.urlsafe_b64encode(
+            json.dumps(data).encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        """
+        Returns (order, key values or None, reverse).
+        """
+        cursor = request.query_params.get(self.cursor_query_param)
+
+        if not cursor:
+            order = request.query_params.get(self.ordering_query_param)
+            if order not in self.orderings:
+                order = next(iter(self.orderings))
+            return order, None, False
+
+        try:
+            data = json.loads(base64.urlsafe_b64decode(
+                (cursor + '=' * (-len(cursor) % 4)).encode()).decode())
+            ordering = self.orderings[data['o']]
+            model = self.queryset.model
+            keys = [
+                (model._meta.pk if name.lstrip('-') == 'pk'
+                 else model._meta.get_field(name.lstrip('-'))).to_python(value)
+                for name, value in zip(ordering, data['k'])]
+            assert len(keys) == len(ordering)
+            return data['o'], keys, bool(data['r'])
+        except Exception:
+            raise NotFound('Invalid cursor.')
+
+    def get_link(self, row, reverse):
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param, self.encode_cursor(row, reverse))
+
+    def estimated_count(self):
+        """
+        The number of rows in the table, according to pg_class.reltuples,
+        or, if filtered, the planner's estimate of the rows.
+        """
+        with connection.cursor() as cursor:
+            if not self.queryset.query.where:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                    [self.queryset.model._meta.db_table])
+                return max(cursor.fetchone()[0], 0)
+
+            sql, params = self.queryset.query.sql_with_params()
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            return cursor.fetchone()[0][0]['Plan']['Plan Rows']
+
+    @property
+    def display_page_controls(self):
+        return getattr(self.fallback, 'display_page_controls', False)
+
+    def to_html(self):
+        return self.fallback.to_html()
+
+    def get_schema_fields(self, view):
+        return self.fallback_class().get_schema_fields(view)
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+
+        response = OrderedDict([
+            ('next', self.get_link(self.rows[-1], False)
+             if self.has_next and self.rows else None),
+            ('previous', self.get_link(self.rows[0], True)
+             if self.has_previous and self.rows else None),
+        ])
+
+        if self.request.query_params.get(self.estimate_query_param):
+            response['estimated_count'] = self.estimated_count()
+
+        response['results'] = data
+        return Response(response)
+
+
+class LargeKeysetPagination(KeysetPagination):
+    fallback_class = LargeResultsSetPagination
+    page_size = 100
+    max_page_size = 10000
+
+
+class LimitOffsetKeysetPagination(LargeKeysetPagination):
+    fallback_class = LimitOffsetPagination
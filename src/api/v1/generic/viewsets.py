@@ -1,7 +1,34 @@
 from rest_framework import viewsets, mixins
 
 
+class QuerysetPlanMixin(object):
+    """
+    Declarative plan of the related objects, that the serializer of a
+    viewset renders, applied to the viewset queryset, e.g.:
+
+        select_related_fields = ('owner',)
+        prefetch_related_fields = ('editors', 'parents')
+
+    Related fields, that are rendered as hyperlinks or primary keys
+    only, don't need to be in the plan.
+    """
+    select_related_fields = ()
+    prefetch_related_fields = ()
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+
+        if self.select_related_fields:
+            qs = qs.select_related(*self.select_related_fields)
+
+        if self.prefetch_related_fields:
+            qs = qs.prefetch_related(*self.prefetch_related_fields)
+
+        return qs
+
+
 class CustomViewSet(
+        QuerysetPlanMixin,
         mixins.CreateModelMixin,
         mixins.RetrieveModelMixin,
         mixins.UpdateModelMixin,
@@ -1,4 +1,8 @@
+import json
+
 from django_filters import rest_framework as filters
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
 
 from meta.models import Type
 
@@ -11,3 +15,47 @@ class TypeFilter(filters.FilterSet):
         fields = ['is_category', 'parents']
 
 
+class JSONContainsFilter(BaseFilterBackend):
+    """
+    Filters the JSON fields of the view json_filter_fields by containment
+    (@>), which the GIN (jsonb_path_ops) indexes of meta.indexes serve:
+
+    ?info__Q82799=Max                       info @> {"Q82799": "Max"}
+    ?info__Q319608__Q1413235=14             info @> {"Q319608": {"Q1413235": 14}}
+    ?info__contains={"Q7569": [{"Q82799": "Tom"}]}
+
+    Values are parsed as JSON, or taken as strings, if they are not
+    (?info__Q1413235="14" for the string). Filters are combined with AND,
+    and with ?schema=, for the index of the schema.
+    """
+    contains = 'contains'
+
+    def filter_queryset(self, request, queryset, view):
+        fields = getattr(view, 'json_filter_fields', ())
+
+        for param, values in request.query_params.lists():
+            name, _, path = param.partition('__')
+            if name not in fields or not path:
+                continue
+
+            for value in values:
+                queryset = queryset.filter(**{
+                    '{}__contains'.format(name): self.get_document(param, path, value)})
+
+        return queryset
+
+    def get_document(self, param, path, value):
+        if path == self.contains:
+            try:
+                return json.loads(value)
+            except ValueError:
+                raise ValidationError({param: ['Invalid JSON.']})
+
+        try:
+            document = json.loads(value)
+        except ValueError:
+            document = value
+
+        for key in reversed(path.split('__')):
+            document = {key: document}
+        return document
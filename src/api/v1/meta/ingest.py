@@ -0,0 +1,348 @@
+"""
+Ingest of bulk uploads of instances (file.jl.gz), in the background:
+
+1. store() copies the upload to INGEST_ROOT, as is, for meta/tasks.py;
+2. prepare() claims the job, decompresses the file next to it, outside of
+   any transaction, and splits it into INGEST_PARTS byte ranges at line
+   boundaries, an IngestPart each, loaded in parallel;
+3. load_part() parses, validates and saves the lines of a part a chunk at
+   a time, with bulk_create, and moves the offset of the part in the same
+   transaction, so a part resumes after its last saved chunk, and a part
+   taken over by another worker meanwhile is rolled back. A part failing
+   INGEST_MAX_ATTEMPTS times fails its job.
+
+Memory stays flat, whatever the size of the file.
+"""
+import gzip
+import json
+import logging
+import os
+import shutil
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import F, Q
+from django.utils.timezone import now
+from rest_framework.exceptions import ValidationError
+
+from meta.models import IngestJob, IngestPart, Instance
+from api.v1.meta.serializers import InstanceSerializer
+
+
+logger = logging.getLogger(__name__)
+
+
+class PartTaken(Exception):
+    """
+    The offset of the part was moved by another worker.
+    """
+
+
+def read_range(fileobj, start, end):
+    """
+    (offset, next offset, data, error) of each line from start to end of
+    the JSON lines file, where data is None, if the line is not JSON.
+    """
+    fileobj.seek(start)
+    offset = start
+
+    while offset < end:
+        line = fileobj.readline()
+        if not line:
+            break
+
+        next_offset = offset + len(line)
+        if line.strip():
+            try:
+                yield offset, next_offset, json.loads(line.decode('utf-8')), None
+            except ValueError as e:
+                yield offset, next_offset, None, {'non_field_errors': [str(e)]}
+
+        offset = next_offset
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def load_chunk(chunk, context=None):
+    """
+    Saves the valid lines of the chunk, and returns the number of lines
+    saved, and the [{offset, errors}] of the invalid ones.
+    """
+    # Without a request, hyperlinks (e.g., schema) are resolved by path,
+    # each once per chunk, see CachedHyperlinkedRelatedField.
+    context = dict(context or {})
+    context.setdefault('related_cache', {})
+    serializer = InstanceSerializer(context=context)
+    instances = []
+    errors = []
+
+    for offset, _, data, error in chunk:
+        if error is None:
+            try:
+                validated_data = serializer.run_validation(data)
+            except ValidationError as e:
+                error = e.detail
+            else:
+                instance = Instance(**validated_data)
+                # bulk_create skips save(), see GenericTranslationModel
+                instance.translations, instance.languages = \
+                    instance.split_translations()
+                instances.append(instance)
+                continue
+
+        errors.append({'offset': offset, 'errors': error})
+
+    Instance.objects.bulk_create(instances)
+    return len(instances), errors
+
+
+def jl_path(job):
+    return job.path[:-len('.gz')]
+
+
+def remove_files(job):
+    for path in (job.path, jl_path(job)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def fail(job, error):
+    IngestJob.objects.filter(pk=job.pk).update(
+        status=IngestJob.FAILED,
+        errors=(job.errors + [{'offset': None, 'errors': {
+            'non_field_errors': [str(error)]}}]),
+        finished_date=now(), updated_date=now())
+    remove_files(job)
+
+
+def store(job, upload):
+    """
+    Copies the uploaded file to INGEST_ROOT.
+    """
+    os.makedirs(settings.INGEST_ROOT, exist_ok=True)
+    job.path = os.path.join(settings.INGEST_ROOT, '{}.jl.gz'.format(job.pk))
+
+    with open(job.path, 'wb') as f:
+        for data in upload.chunks():
+            f.write(data)
+
+    job.save(update_fields=['path', 'updated_date'])
+
+
+def split(path, size, parts):
+    """
+    [(start, end)] of up to parts byte ranges of the file, at line ends.
+    """
+    starts = [0]
+    with open(path, 'rb') as f:
+        for i in range(1, parts):
+            f.seek(size * i // parts)
+            f.readline()
+            if starts[-1] < f.tell() < size:
+                starts.append(f.tell())
+
+    return list(zip(starts, starts[1:] + [size]))
+
+
+def claim(job_id):
+    """
+    Moves the pending job, or the job whose preparation was not heard of
+    for INGEST_STALE_AFTER seconds, to preparing, and returns the date of
+    the claim, or None, if it's not to be prepared by this worker.
+    """
+    stale = now() - timedelta(seconds=settings.INGEST_STALE_AFTER)
+    claimed_date = now()
+
+    claimed = IngestJob.objects.filter(
+        Q(status=IngestJob.PENDING) |
+        Q(status=IngestJob.PREPARING, updated_date__lt=stale),
+        pk=job_id,
+    ).update(status=IngestJob.PREPARING, updated_date=claimed_date)
+
+    return claimed_date if claimed else None
+
+
+def prepare(job_id, parts=None):
+    """
+    Decompresses the file of a pending job, and creates its parts.
+    Returns the job, running, unless the file can't be read.
+    """
+    claimed_date = claim(job_id)
+    job = IngestJob.objects.get(pk=job_id)
+    if claimed_date is None:
+        return job
+
+    # Outside of any transaction, in a file of its own, in case the job is
+    # claimed again meanwhile.
+    path = jl_path(job)
+    tmp_path = '{}.{}.tmp'.format(path, uuid.uuid4().hex)
+    try:
+        with gzip.open(job.path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+        os.replace(tmp_path, path)
+    except (OSError, EOFError) as e:
+        # Not gzip, truncated, or missing.
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        fail(job, e)
+        job.refresh_from_db()
+        return job
+
+    size = os.path.getsize(path)
+    ranges = split(path, size, parts or settings.INGEST_PARTS)
+
+    with transaction.atomic():
+        started = IngestJob.objects.filter(
+            pk=job.pk, status=IngestJob.PREPARING, updated_date=claimed_date
+        ).update(
+            status=IngestJob.RUNNING, size=size, started_date=now(),
+            updated_date=now())
+
+        if started:
+            IngestPart.objects.bulk_create([
+                IngestPart(job=job, start=start, end=end, offset=start)
+                for start, end in ranges
+            ])
+
+    if started:
+        finish(job.pk)
+    job.refresh_from_db()
+    return job
+
+
+def load_lines(chunk, context=None):
+    """
+    load_chunk() a line at a time, for the chunks the database rejects,
+    so that only the lines it rejects (e.g., with \\u0000 in jsonb) fail.
+    """
+    loaded, errors = 0, []
+    context = dict(context or {}, related_cache={})
+
+    for line in chunk:
+        try:
+            with transaction.atomic():
+                line_loaded, line_errors = load_chunk([line], context)
+        except (DatabaseError, ValueError) as e:
+            line_loaded, line_errors = 0, [{
+                'offset': line[0], 'errors': {'non_field_errors': [str(e)]}}]
+
+        loaded += line_loaded
+        errors += line_errors
+
+    return loaded, errors
+
+
+def load_part(part_id, chunk_size=None, context=None):
+    """
+    Loads the lines of the part after its offset, chunk by chunk.
+    """
+    chunk_size = chunk_size or settings.INGEST_CHUNK_SIZE
+
+    IngestPart.objects.filter(pk=part_id).update(attempts=F('attempts') + 1)
+    part = IngestPart.objects.select_related('job').get(pk=part_id)
+
+    if part.job.status != IngestJob.RUNNING:
+        return
+
+    if part.attempts > settings.INGEST_MAX_ATTEMPTS:
+        give_up(part, 'Part {} failed {} times.'.format(
+            part.pk, settings.INGEST_MAX_ATTEMPTS))
+        return
+
+    try:
+        with open(jl_path(part.job), 'rb') as f:
+            for chunk in chunked(
+                    read_range(f, part.offset, part.end), chunk_size):
+                load_part_chunk(part, chunk, context)
+
+        # Past empty lines at the end.
+        IngestPart.objects.filter(pk=part.pk, offset=part.offset).update(
+            offset=part.end, updated_date=now())
+
+    except PartTaken:
+        logger.info('Ingest part %s was taken by another worker.', part.pk)
+        return
+
+    except Exception as e:
+        if part.attempts >= settings.INGEST_MAX_ATTEMPTS:
+            give_up(part, e)
+            return
+        # Resumed by resume_ingest_jobs_task.
+        raise
+
+    finish(part.job_id)
+
+
+def give_up(part, error):
+    """
+    Fails the job of the part, unless it is done already.
+    """
+    logger.warning('Ingest part %s failed: %s', part.pk, error)
+
+    with transaction.atomic():
+        job = IngestJob.objects.select_for_update().get(pk=part.job_id)
+        if job.status == IngestJob.RUNNING:
+            fail(job, error)
+
+
+def load_part_chunk(part, chunk, context=None):
+    offset = chunk[-1][1]
+
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                loaded, errors = load_chunk(chunk, context)
+        except (DatabaseError, ValueError):
+            # ValueError: NUL characters in text, from psycopg2.
+            loaded, errors = load_lines(chunk, context)
+
+        moved = IngestPart.objects.filter(
+            pk=part.pk, offset=part.offset).update(
+                offset=offset, attempts=0, updated_date=now())
+        if not moved:
+            raise PartTaken()
+
+        job = IngestJob.objects.select_for_update().get(pk=part.job_id)
+        job.processed += offset - part.offset
+        job.lines += len(chunk)
+        job.loaded += loaded
+        job.failed += len(errors)
+        job.chunks += 1
+        job.errors = (job.errors + errors)[:settings.INGEST_MAX_ERRORS]
+        job.save(update_fields=[
+            'processed', 'lines', 'loaded', 'failed', 'chunks', 'errors',
+            'updated_date'])
+
+    part.offset = offset
+    part.attempts = 0
+
+
+def finish(job_id):
+    """
+    Marks the running job done, when all its parts are.
+    """
+    with transaction.atomic():
+        job = IngestJob.objects.select_for_update().get(pk=job_id)
+
+        if job.status != IngestJob.RUNNING or \
+                job.parts.filter(offset__lt=F('end')).exists():
+            return
+
+        job.status = IngestJob.DONE
+        job.processed = job.size
+        job.finished_date = now()
+        job.save(update_fields=[
+            'status', 'processed', 'finished_date', 'updated_date'])
+
+    remove_files(job)
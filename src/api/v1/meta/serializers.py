@@ -4,10 +4,11 @@ from meta.models import (
     Type,
     Schema,
     Instance,
+    IngestJob,
 )
 
 
-from api.v1.core.fields import LangSplitField
+from api.v1.core.fields import CachedHyperlinkedRelatedField, LangSplitField
 
 
 class TypeSerializer(serializers.HyperlinkedModelSerializer):
@@ -26,6 +27,23 @@ class SchemaSerializer(serializers.HyperlinkedModelSerializer):
 
 
 class InstanceSerializer(serializers.HyperlinkedModelSerializer):
+    serializer_related_field = CachedHyperlinkedRelatedField
+
     class Meta:
         model = Instance
         fields = '__all__'
+
+
+class IngestJobSerializer(serializers.HyperlinkedModelSerializer):
+    status = serializers.ChoiceField(
+        choices=IngestJob.STATUSES, read_only=True)
+    rows_per_second = serializers.ReadOnlyField()
+    eta = serializers.ReadOnlyField()
+
+    class Meta:
+        model = IngestJob
+        fields = ('id', 'url', 'status', 'size', 'processed', 'lines',
+                  'loaded', 'failed', 'chunks', 'errors', 'rows_per_second',
+                  'eta', 'created_date', 'updated_date', 'started_date',
+                  'finished_date')
+        read_only_fields = fields
@@ -7,5 +7,6 @@ router.register(r'types', views.TypeViewSet)
 router.register(r'schemas', views.SchemaViewSet)
 router.register(r'instances', views.InstanceViewSet)
 router.register(r'instances_bulk', views.InstanceBulkViewSet)
+router.register(r'ingest_jobs', views.IngestJobViewSet)
 
 urlpatterns = router.urls
@@ -1,5 +1,4 @@
-import json_lines
-import gzip
+from django.db import transaction
 from rest_framework import status, mixins, viewsets, filters
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.parsers import FileUploadParser
@@ -13,7 +12,8 @@ from api.v1.generic.permissions import (
     IsOwner
 )
 
-from meta.models import Type, Schema, Instance
+from meta.models import Type, Schema, Instance, IngestJob
+from meta.tasks import prepare_ingest_async
 
 from api.v1.generic.viewsets import CustomViewSet
 
@@ -21,14 +21,17 @@ from api.v1.meta.serializers import (
     TypeSerializer,
     SchemaSerializer,
     InstanceSerializer,
+    IngestJobSerializer,
 )
+from api.v1.meta.ingest import store
 
 from api.v1.generic.pagination_classes import (
     StandardResultsSetPagination,
-    LargeResultsSetPagination
+    LargeResultsSetPagination,
+    KeysetPagination,
 )
 
-from api.v1.meta.filters import TypeFilter
+from api.v1.meta.filters import TypeFilter, JSONContainsFilter
 
 
 class TypeViewSet(CustomViewSet):
@@ -69,8 +72,10 @@ class SchemaViewSet(CustomViewSet):
 
 class InstanceViewSet(CustomViewSet):
     permission_classes = (IsAuthenticated,)
-    pagination_class = StandardResultsSetPagination
+    pagination_class = KeysetPagination
+    filter_backends = (DjangoFilterBackend, JSONContainsFilter)
     filter_fields = ('schema',)
+    json_filter_fields = ('info', 'data')
 
     def get_permissions(self):
         """
@@ -95,13 +100,29 @@ class InstanceBulkViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, viewse
 
     def create(self, request, *args, **kwargs):
         fp = request._request.FILES.get('file.jl.gz')
-        data = [line for line in json_lines.reader(gzip.GzipFile(fileobj=fp))]
+        if fp is None:
+            return Response(
+                {'file.jl.gz': ['No file was submitted.']},
+                status=status.HTTP_400_BAD_REQUEST)
+
+        job = IngestJob.objects.create(owner=request.user)
+        store(job, fp)
+        transaction.on_commit(lambda: prepare_ingest_async(job.pk))
+
+        serializer = IngestJobSerializer(
+            job, context=self.get_serializer_context())
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
 
-        serializer = self.get_serializer(data=data, many=True)
-        serializer.is_valid(raise_exception=True)
-        self.perform_bulk_create(serializer)
-        return Response(status=status.HTTP_201_CREATED)
 
-    def perform_bulk_create(self, serializer):
-        return self.perform_create(serializer)
+class IngestJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Bulk uploads of instances of the user, and their progress.
+    """
+    permission_classes = (IsAuthenticated,)
+    serializer_class = IngestJobSerializer
+    pagination_class = StandardResultsSetPagination
+    queryset = IngestJob.objects.all()
 
+    def get_queryset(self):
+        return super().get_queryset().filter(
+            owner=self.request.user).order_by('-pk')
@@ -1,8 +1,11 @@
+from rest_framework.decorators import detail_route
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.response import Response
 from rest_framework import filters
 
 from django_filters.rest_framework import DjangoFilterBackend
 
+from api.v1.generic.pagination_classes import LimitOffsetKeysetPagination
 from api.v1.generic.viewsets import CustomViewSet
 
 from transactions.models import (
@@ -41,6 +44,7 @@ class CurrencyViewSet(CustomViewSet):
 class TransactionViewSet(CustomViewSet):
 
     queryset = Transaction.objects.all()
+    select_related_fields = ('payment_recipient', 'payment_sender', 'hour_price')
     filter_backends = (DjangoFilterBackend,
                        filters.SearchFilter,)
     filter_fields = ('comment',)
@@ -67,10 +71,35 @@ class ContributionViewSet(CustomViewSet):
 
     permission_classes = (IsAuthenticatedOrReadOnly,)
     serializer_class = ContributionSerializer
+    pagination_class = LimitOffsetKeysetPagination
     queryset = ContributionCertificate.objects.all()
+    select_related_fields = ('received_by',)
 
 
-class TopicSnapshotViewSet(CustomViewSet):
+class SnapshotProofMixin(object):
+
+    @detail_route(methods=['get'])
+    def proof(self, request, pk=None):
+        """
+        Merkle inclusion proof of the snapshot, to verify it offline:
+        leaf = sha256(0x00 + canonical JSON of data), and, for every
+        [side, hash] in proof, node = sha256(0x01 + left + right),
+        up to the root, saved in the blockchain by anchor_tx.
+        """
+        snapshot = self.get_object()
+        anchor = snapshot.merkle_anchor
+
+        return Response({
+            'data': snapshot.data,
+            'leaf': snapshot.merkle_leaf,
+            'proof': snapshot.merkle_proof,
+            'root': anchor.root if anchor else None,
+            'anchor_tx': anchor.blockchain_tx if anchor else None,
+            'verified': snapshot.verify_anchor(),
+        })
+
+
+class TopicSnapshotViewSet(SnapshotProofMixin, CustomViewSet):
     filter_backends = (DjangoFilterBackend,
                        filters.SearchFilter,)
     filter_fields = ('topic',)
@@ -80,7 +109,7 @@ class TopicSnapshotViewSet(CustomViewSet):
     queryset = TopicSnapshot.objects.all()
 
 
-class CommentSnapshotViewSet(CustomViewSet):
+class CommentSnapshotViewSet(SnapshotProofMixin, CustomViewSet):
     filter_backends = (DjangoFilterBackend,
                        filters.SearchFilter,)
     filter_fields = ('comment',)
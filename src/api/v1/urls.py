@@ -9,4 +9,5 @@ urlpatterns = [
     url(r'^', include('api.v1.auth.urls')),
     url(r'^', include('api.v1.transactions.urls')),
     url(r'^', include('api.v1.trade.urls')),
+    url(r'^', include('api.v1.changes.urls')),
 ]
@@ -1,6 +1,7 @@
 from __future__ import absolute_import
 import os
 from celery import Celery
+from celery.schedules import crontab
 from django.apps import AppConfig
 from django.conf import settings
 
@@ -16,6 +17,40 @@ app = Celery(
 )
 app.autodiscover_tasks()
 
+app.conf.beat_schedule = {
+    # Digests of comment notifications (see users.models.User.digest),
+    # also sending leftovers of users, who switched to immediate ones.
+    'send-hourly-digests': {
+        'task': 'core.tasks.send_hourly_digests_task',
+        'schedule': crontab(minute=0),
+    },
+    'send-daily-digests': {
+        'task': 'core.tasks.send_daily_digests_task',
+        'schedule': crontab(minute=0, hour=settings.DIGEST_DAILY_HOUR),
+    },
+    # Snapshots left pending, after the anchoring task gave up.
+    'anchor-pending-snapshots': {
+        'task': 'transactions.tasks.anchor_pending_task',
+        'schedule': crontab(minute='*/15'),
+    },
+    # Changes for the sync database, left when a drain task gave up, or
+    # found another one running.
+    'flush-syncdb': {
+        'task': 'syncdb.flush_syncdb_task',
+        'schedule': crontab(),
+    },
+    # Bulk uploads of instances, whose workers were lost.
+    'resume-ingest-jobs': {
+        'task': 'meta.tasks.resume_ingest_jobs_task',
+        'schedule': crontab(minute='*/5'),
+    },
+    # Instance.info of the instances, whose data or schema changed.
+    'normalize-instances': {
+        'task': 'meta.tasks.normalize_schemas_task',
+        'schedule': crontab(minute=30),
+    },
+}
+
 
 class CeleryConfig(AppConfig):
     name = 'celery'
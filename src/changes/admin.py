@@ -0,0 +1,9 @@
+from django.contrib import admin
+
+from changes.models import Change
+
+
+@admin.register(Change)
+class ChangeAdmin(admin.ModelAdmin):
+    list_display = ('id', 'model', 'object_id', 'op', 'created_date')
+    list_filter = ('model', 'op')
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class ChangesConfig(AppConfig):
+    name = 'changes'
+
+    def ready(self):
+        import changes.signals
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.15 on 2018-09-14 12:06
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+LOGGED_MODELS = (
+    ('core', 'Topic', 'topic'),
+    ('core', 'Comment', 'comment'),
+    ('transactions', 'Transaction', 'transaction'),
+    ('transactions', 'ContributionCertificate', 'contribution'),
+)
+
+
+def log_existing(apps, schema_editor):
+    """
+    Logs existing objects as created, for clients to sync from the start.
+    """
+    Change = apps.get_model('changes', 'Change')
+
+    for app_label, model_name, name in LOGGED_MODELS:
+        ids = apps.get_model(app_label, model_name).objects.order_by(
+            'pk').values_list('pk', flat=True)
+
+        Change.objects.bulk_create(
+            (Change(model=name, object_id=pk, op='c') for pk in ids.iterator()),
+            batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('core', '0031_pendingnotification'),
+        ('transactions', '0009_snapshotanchor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('txid', models.BigIntegerField(default=0)),
+                ('model', models.CharField(max_length=32)),
+                ('object_id', models.PositiveIntegerField()),
+                ('op', models.CharField(choices=[('c', 'Created'), ('u', 'Updated'), ('d', 'Deleted')], max_length=1)),
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Change',
+                'verbose_name_plural': 'Changes',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='change',
+            index=models.Index(fields=['txid', 'id'], name='change_txid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='change',
+            index=models.Index(fields=['model', 'txid', 'id'], name='change_model_txid_idx'),
+        ),
+        migrations.RunPython(log_existing, migrations.RunPython.noop),
+    ]
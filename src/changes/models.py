@@ -0,0 +1,80 @@
+from django.db import connection, models
+from django.utils.translation import ugettext_lazy as _
+
+
+class Change(models.Model):
+    """
+    Append-only log of created, updated and deleted objects, for clients
+    to sync incrementally (see api/v1/changes).
+
+    Changes are ordered by (txid, id), where txid is the id of the database
+    transaction that logged them: ids are taken at insert, not at commit,
+    so a change may become visible after changes with greater ids were
+    served, but not after changes of transactions that began after its
+    own had finished (see visible_before()).
+    """
+    CREATED = 'c'
+    UPDATED = 'u'
+    DELETED = 'd'
+
+    OPS = [
+        (CREATED, _('Created')),
+        (UPDATED, _('Updated')),
+        (DELETED, _('Deleted')),
+    ]
+
+    # Logged models, by the name clients see.
+    MODELS = {
+        'core.topic': 'topic',
+        'core.comment': 'comment',
+        'transactions.transaction': 'transaction',
+        'transactions.contributioncertificate': 'contribution',
+    }
+
+    id = models.BigAutoField(primary_key=True)
+    txid = models.BigIntegerField(default=0)
+    model = models.CharField(max_length=32)
+    object_id = models.PositiveIntegerField()
+    op = models.CharField(max_length=1, choices=OPS)
+    created_date = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return "{} {} {}".format(
+            dict(self.OPS).get(self.op), self.model, self.object_id)
+
+    @classmethod
+    def record(cls, model, ids, op):
+        """
+        Logs the change of objects of the model (class), by their ids.
+        """
+        name = cls.MODELS[model._meta.label_lower]
+
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT txid_current()')
+            txid = cursor.fetchone()[0]
+
+        cls.objects.bulk_create([
+            cls(model=name, object_id=pk, op=op, txid=txid) for pk in ids
+        ])
+
+    @staticmethod
+    def visible_before():
+        """
+        The txid, before which every transaction other than the current
+        one has finished, so that no more changes can show up before it:
+        the oldest one still running, or else the next one to start.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT COALESCE('
+                '(SELECT MIN(xip) FROM txid_snapshot_xip(txid_current_snapshot()) AS xip), '
+                'txid_snapshot_xmax(txid_current_snapshot()))')
+            return cursor.fetchone()[0]
+
+    class Meta:
+        verbose_name = _("Change")
+        verbose_name_plural = _("Changes")
+        indexes = [
+            models.Index(fields=['txid', 'id'], name='change_txid_idx'),
+            models.Index(fields=['model', 'txid', 'id'], name='change_model_txid_idx'),
+        ]
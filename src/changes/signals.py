@@ -0,0 +1,23 @@
+from django.db import models
+from django.dispatch import receiver
+
+from changes.models import Change
+from core.models import Topic, Comment
+from transactions.models import Transaction, ContributionCertificate
+
+
+@receiver(models.signals.post_save, sender=Topic)
+@receiver(models.signals.post_save, sender=Comment)
+@receiver(models.signals.post_save, sender=Transaction)
+@receiver(models.signals.post_save, sender=ContributionCertificate)
+def log_save(sender, instance, created, *args, **kwargs):
+    Change.record(
+        sender, [instance.pk], Change.CREATED if created else Change.UPDATED)
+
+
+@receiver(models.signals.post_delete, sender=Topic)
+@receiver(models.signals.post_delete, sender=Comment)
+@receiver(models.signals.post_delete, sender=Transaction)
+@receiver(models.signals.post_delete, sender=ContributionCertificate)
+def log_delete(sender, instance, *args, **kwargs):
+    Change.record(sender, [instance.pk], Change.DELETED)
@@ -1,6 +1,8 @@
 from django.contrib import admin
 
-from core.models import Topic, Comment
+from core.models import (
+    Topic, Comment, TopicSubscription, PendingNotification, TopicRollup
+)
 from core.forms import TopicForm, CommentForm
 
 
@@ -12,3 +14,18 @@ class TopicAdmin(admin.ModelAdmin):
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
     form = CommentForm
+
+
+@admin.register(TopicSubscription)
+class TopicSubscriptionAdmin(admin.ModelAdmin):
+    pass
+
+
+@admin.register(PendingNotification)
+class PendingNotificationAdmin(admin.ModelAdmin):
+    pass
+
+
+@admin.register(TopicRollup)
+class TopicRollupAdmin(admin.ModelAdmin):
+    list_display = ('topic', 'declared', 'matched', 'funds', 'updated_date')
@@ -6,3 +6,4 @@ class CoreConfig(AppConfig):
 
     def ready(self):
         import core.signals
+        import core.handlers
@@ -0,0 +1,111 @@
+"""
+Side effects of topic, comment and transaction saves, delivered from the
+outbox (see core/signals.py, and outbox/relay.py) after commit.
+"""
+import json
+
+import boto3
+from django.conf import settings
+from django.core import serializers
+
+from core.models import Topic, Comment
+from transactions.models import Transaction
+from websocket.consumers import flush_dispatcher, ws_send_comment_changed
+
+from core.tasks import notify_subscribers_async
+from outbox.relay import flushes, handles
+from syncdb import update_syncdb_async
+
+
+def make_data(instance):
+    singular = instance.__class__.__name__.lower()
+    namespace = singular+'s'
+
+    data = json.loads(serializers.serialize('json', [instance]))[0]
+
+    protocol = 'https'
+    server = next(iter(settings.ALLOWED_HOSTS or []), None)
+    if server == '*':
+        protocol = 'http'
+        server = '0.0.0.0:8000'
+
+    location = '{protocol}://{server}/{namespace}/{pk}'.format(
+        protocol=protocol,
+        server=server,
+        namespace=namespace,
+        pk=data.get('pk'))
+
+    data.update({'-': location})
+    # normalization schema #
+    data.update({'*': 'https://github.com/wefindx/ooio/wiki/{}#infli'.format(singular)})
+
+    return data
+
+
+@handles('comment.saved')
+def broadcast_comment(id, created, fields=None):
+    comment = Comment.objects.filter(pk=id).first()
+
+    if comment:
+        # Broadcast over web-sockets, only the changed fields of updates
+        ws_send_comment_changed(comment, created, fields)
+
+
+@flushes
+def flush_comment_broadcasts():
+    # Sent before the relay marks their events sent, not only queued
+    flush_dispatcher()
+
+
+@handles('comment.saved')
+def notify_subscribers(id, created, fields=None):
+    # Send e-mail notification
+    notify_subscribers_async(id)
+
+
+@handles('comment.saved')
+def sync_comment(id, created, fields=None):
+    comment = Comment.objects.filter(pk=id).first()
+
+    if comment:
+        # Save or update its copy to MongoDB, if it's defined
+        update_syncdb_async('comments', make_data(comment))
+
+
+@handles('topic.saved')
+def sync_topic(id, created):
+    topic = Topic.objects.filter(pk=id).first()
+
+    if topic and topic.body:
+        # Save or update its copy to MongoDB, if it's defined
+        update_syncdb_async('topics', make_data(topic))
+
+
+@handles('topic.saved')
+def send_sns_notification(id, created):
+    if not created:
+        return
+
+    arn = getattr(settings, 'TOPIC_CREATED_ARN')
+    if not arn:
+        return
+
+    region = getattr(settings, 'AWS_DEFAULT_REGION')
+    if not region:
+        return
+
+    client = boto3.client('sns', region_name=region)
+    message = {"topic_id": id}
+    client.publish(
+        TopicArn=arn,
+        Message=json.dumps(message)
+    )
+
+
+@handles('transaction.saved')
+def sync_transaction(id, created):
+    transaction = Transaction.objects.filter(pk=id).first()
+
+    if transaction:
+        # Save or update its copy to MongoDB, if it's defined
+        update_syncdb_async('transactions', make_data(transaction))
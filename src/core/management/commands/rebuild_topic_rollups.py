@@ -0,0 +1,20 @@
+from django.core.management import BaseCommand
+
+from core.models import Topic, TopicRollup
+
+
+class Command(BaseCommand):
+    help = 'rebuild the hours rollups of topic subtrees from comments, certificates and reserves'
+
+    def add_arguments(self, parser):
+        parser.add_argument('topics', nargs='*', type=int, help='topic ids (default: all)')
+
+    def handle(self, *args, **options):
+
+        topics = Topic.objects.all().order_by('pk')
+        if options['topics']:
+            topics = topics.filter(pk__in=options['topics'])
+
+        TopicRollup.rebuild(topics.values_list('pk', flat=True), own=True)
+
+        print('Done.')
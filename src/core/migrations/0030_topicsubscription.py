@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.15 on 2018-09-11 16:40
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_subscriptions(apps, schema_editor):
+    """
+    Subscribes owners and commenters of each topic, unless unsubscribed.
+    """
+    Topic = apps.get_model('core', 'Topic')
+    Comment = apps.get_model('core', 'Comment')
+    TopicSubscription = apps.get_model('core', 'TopicSubscription')
+
+    for topic in Topic.objects.all().iterator():
+        users = {topic.owner_id}.union(
+            Comment.objects.filter(topic=topic).values_list(
+                'owner_id', flat=True).distinct())
+        users -= set(topic.unsubscribed.values_list('pk', flat=True))
+
+        TopicSubscription.objects.bulk_create([
+            TopicSubscription(topic=topic, user_id=user_id)
+            for user_id in users
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0029_topic_comment_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TopicSubscription',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+                ('updated_date', models.DateTimeField(auto_now=True)),
+                ('topic', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subscriptions', to='core.Topic')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='topic_subscriptions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Topic Subscription',
+                'verbose_name_plural': 'Topic Subscriptions',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='topicsubscription',
+            unique_together=set([('topic', 'user')]),
+        ),
+        migrations.RunPython(create_subscriptions, migrations.RunPython.noop),
+    ]
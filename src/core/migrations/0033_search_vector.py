@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.15 on 2018-09-16 09:30
+from __future__ import unicode_literals
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+from langsplit import splitter
+
+
+# Text search configurations of the languages, as of this migration
+# (see core.search).
+CONFIGS = {
+    'da': 'danish',
+    'de': 'german',
+    'en': 'english',
+    'es': 'spanish',
+    'fi': 'finnish',
+    'fr': 'french',
+    'hu': 'hungarian',
+    'it': 'italian',
+    'nl': 'dutch',
+    'no': 'norwegian',
+    'pt': 'portuguese',
+    'ro': 'romanian',
+    'ru': 'russian',
+    'sv': 'swedish',
+    'tr': 'turkish',
+}
+
+
+def sections(instance, name, title):
+    translations = getattr(instance, 'translations', None) or {}
+    if name in translations:
+        return translations[name]
+
+    value = getattr(instance, name)
+    if not value:
+        return {}
+    try:
+        return splitter.split(value, title=title) or {}
+    except Exception:
+        return {}
+
+
+def update_search_vectors(apps, schema_editor):
+    for name, translation_fields in (
+            ('Topic', (('title', True), ('body', False))),
+            ('Comment', (('text', False),))):
+        model = apps.get_model('core', name)
+
+        with schema_editor.connection.cursor() as cursor:
+            for instance in model.objects.iterator():
+                parts = []
+                params = []
+
+                for i, (field, title) in enumerate(translation_fields):
+                    for lang, text in sections(instance, field, title).items():
+                        if not text.strip():
+                            continue
+                        parts.append(
+                            'setweight(to_tsvector(%s::regconfig, %s), %s)')
+                        params.extend((
+                            CONFIGS.get(lang, 'simple'), text,
+                            'A' if i == 0 else 'B'))
+
+                if parts:
+                    cursor.execute(
+                        'UPDATE {} SET search_vector = {} WHERE id = %s'.format(
+                            model._meta.db_table, ' || '.join(parts)),
+                        params + [instance.pk])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0032_auto_20180915_1012'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='topic',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='topic',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='topic_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='comment_search_idx'),
+        ),
+        # icontains compares UPPER(field), see core.search.
+        migrations.RunSQL(
+            'CREATE INDEX topic_title_trgm_idx ON core_topic USING gin (UPPER(title) gin_trgm_ops);',
+            'DROP INDEX topic_title_trgm_idx;',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX comment_text_trgm_idx ON core_comment USING gin (UPPER(text) gin_trgm_ops);',
+            'DROP INDEX comment_text_trgm_idx;',
+        ),
+        migrations.RunPython(update_search_vectors, migrations.RunPython.noop),
+    ]
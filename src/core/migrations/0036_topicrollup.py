@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.15 on 2018-09-17 11:45
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_rollups(apps, schema_editor):
+    """
+    Own hours of each topic, as Topic.declared(), .matched() and .funds(),
+    then the sums over the subtrees (see TopicRollup.rebuild).
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO core_topicrollup (
+                topic_id, created_date, updated_date,
+                own_declared, own_matched, own_funds,
+                declared, matched, funds)
+            SELECT topic.id, now(), now(),
+                COALESCE((
+                    SELECT sum(comment.claimed_hours + comment.assumed_hours)
+                    FROM core_comment comment
+                    WHERE comment.topic_id = topic.id), 0),
+                COALESCE((
+                    SELECT sum(cert.hours)
+                    FROM transactions_contributioncertificate cert
+                    JOIN transactions_commentsnapshot snapshot
+                        ON snapshot.id = cert.comment_snapshot_id
+                    JOIN core_comment comment ON comment.id = snapshot.comment_id
+                    WHERE comment.topic_id = topic.id
+                        AND cert.matched AND NOT cert.broken), 0),
+                COALESCE((
+                    SELECT sum(reserve.hours) FROM trade_reserve reserve
+                    WHERE reserve.topic_id = topic.id), 0),
+                0, 0, 0
+            FROM core_topic topic
+        """)
+        cursor.execute("""
+            UPDATE core_topicrollup rollup
+            SET declared = subtree.declared, matched = subtree.matched,
+                funds = subtree.funds
+            FROM (
+                WITH RECURSIVE tree (root, id, depth) AS (
+                    SELECT id, id, 0 FROM core_topic
+                  UNION
+                    SELECT tree.root, link.from_topic_id, tree.depth + 1
+                    FROM core_topic_parents link JOIN tree ON link.to_topic_id = tree.id
+                    WHERE tree.depth < 32
+                )
+                SELECT nodes.root, sum(own.own_declared) AS declared,
+                    sum(own.own_matched) AS matched, sum(own.own_funds) AS funds
+                FROM (SELECT DISTINCT root, id FROM tree) nodes
+                JOIN core_topicrollup own ON own.topic_id = nodes.id
+                GROUP BY nodes.root
+            ) subtree
+            WHERE rollup.topic_id = subtree.root
+        """)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0035_languages_idx'),
+        ('trade', '0015_auto_20180507_1126'),
+        ('transactions', '0010_auto_20180915_1012'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TopicRollup',
+            fields=[
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+                ('updated_date', models.DateTimeField(auto_now=True)),
+                ('topic', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rollup', serialize=False, to='core.Topic')),
+                ('own_declared', models.DecimalField(decimal_places=8, default=0, max_digits=20)),
+                ('own_matched', models.DecimalField(decimal_places=8, default=0, max_digits=20)),
+                ('own_funds', models.DecimalField(decimal_places=8, default=0, max_digits=20)),
+                ('declared', models.DecimalField(decimal_places=8, default=0, max_digits=20)),
+                ('matched', models.DecimalField(decimal_places=8, default=0, max_digits=20)),
+                ('funds', models.DecimalField(decimal_places=8, default=0, max_digits=20)),
+            ],
+            options={
+                'verbose_name': 'Topic Rollup',
+                'verbose_name_plural': 'Topic Rollups',
+            },
+        ),
+        migrations.RunPython(create_rollups, migrations.RunPython.noop),
+    ]
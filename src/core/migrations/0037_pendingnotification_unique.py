@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.15 on 2018-09-27 16:10
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Min
+
+
+def remove_duplicates(apps, schema_editor):
+    """
+    Keeps the first pending notification of each user and comment.
+    """
+    PendingNotification = apps.get_model('core', 'PendingNotification')
+
+    PendingNotification.objects.exclude(
+        id__in=PendingNotification.objects.values(
+            'user', 'comment').annotate(first=Min('id')).values('first')
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0036_topicrollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='pendingnotification',
+            unique_together=set([('user', 'comment')]),
+        ),
+    ]
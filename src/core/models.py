@@ -1,21 +1,98 @@
 from decimal import Decimal
 from re import finditer
 
-from django.db import models
-from django.db.models import Sum
+from django.conf import settings
+from django.db import connection, models
+from django.db.models import (
+    DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value
+)
+from django.db.models.functions import Coalesce
+from django.db.transaction import atomic
 
 from django.contrib.postgres.fields import JSONField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.utils.translation import ugettext_lazy as _
 
-from generic.models import GenericTranslationModel
+from generic.models import (
+    GenericManager, GenericModel, GenericTranslationModel
+)
+from core.search import update_search_vector
 from users.models import User, CryptoKeypair
 from transactions.mixins import (
     TopicTransactionMixin,
     CommentTransactionMixin
 )
+from transactions.models import ContributionCertificate
 from trade.mixins import (
     TopicTradeMixin
 )
+from trade.models import Reserve
+
+
+def sum_subquery(queryset, group_by, expression):
+    """
+    Correlated SUM(expression) over queryset rows, grouped by the outer
+    row, for use in .annotate(), e.g.:
+
+    >>> sum_subquery(Reserve.objects.filter(topic=OuterRef('pk')), 'topic', 'hours')
+    """
+    return Coalesce(
+        Subquery(
+            queryset.order_by().values(group_by).annotate(
+                total=Sum(expression)).values('total'),
+            output_field=DecimalField()),
+        Value(0),
+        output_field=DecimalField())
+
+
+class TopicQuerySet(models.QuerySet):
+
+    def with_hours(self):
+        """
+        Annotates .matched(), .declared() and .funds() of each topic,
+        as matched_hours, declared_hours and funds_hours.
+        """
+        return self.annotate(
+            matched_hours=sum_subquery(
+                ContributionCertificate.objects.filter(
+                    comment_snapshot__comment__topic=OuterRef('pk'),
+                    matched=True,
+                    broken=False),
+                'comment_snapshot__comment__topic', 'hours'),
+            declared_hours=sum_subquery(
+                Comment.objects.filter(topic=OuterRef('pk')),
+                'topic', F('claimed_hours') + F('assumed_hours')),
+            funds_hours=sum_subquery(
+                Reserve.objects.filter(topic=OuterRef('pk')),
+                'topic', 'hours'),
+        )
+
+
+class CommentQuerySet(models.QuerySet):
+
+    def with_hours(self):
+        """
+        Annotates .matched(), .donated() and .remains() of each comment,
+        as matched_hours, donated_hours and remains_hours.
+        """
+        certificates = ContributionCertificate.objects.filter(
+            comment_snapshot__comment=OuterRef('pk'),
+            broken=False)
+
+        return self.annotate(
+            matched_hours=sum_subquery(
+                certificates.filter(matched=True),
+                'comment_snapshot__comment', 'hours'),
+            donated_hours=sum_subquery(
+                certificates.filter(matched=False),
+                'comment_snapshot__comment', 'hours'),
+        ).annotate(
+            remains_hours=ExpressionWrapper(
+                F('claimed_hours') + F('assumed_hours') -
+                F('matched_hours') - F('donated_hours'),
+                output_field=DecimalField()),
+        )
 
 
 class Topic(TopicTransactionMixin, TopicTradeMixin, GenericTranslationModel):
@@ -73,12 +150,19 @@ class Topic(TopicTransactionMixin, TopicTradeMixin, GenericTranslationModel):
 
     comment_count = models.PositiveIntegerField(default=0)
 
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    count_languages = True
+
+    objects = GenericManager.from_queryset(TopicQuerySet)()
+
     def __str__(self):
         return '[{}] {}'.format(
             dict(self.TOPIC_TYPES).get(self.type), self.title)
 
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
+        update_search_vector(self, kwargs.get('update_fields'))
         if self.blockchain:
             self.create_snapshot(blockchain=self.blockchain)
 
@@ -86,25 +170,85 @@ class Topic(TopicTransactionMixin, TopicTradeMixin, GenericTranslationModel):
         """
         Hours claimed and assumed in comments.
         """
-        qs = Comment.objects.filter(topic=self)
+        totals = Comment.objects.filter(topic=self).aggregate(
+            claimed=Sum('claimed_hours'),
+            assumed=Sum('assumed_hours'))
+
+        return Decimal(totals['claimed'] or 0.) + \
+            Decimal(totals['assumed'] or 0.)
 
-        declared_hours = \
-            Decimal(
-                qs.aggregate(
-                    total=Sum('claimed_hours')).get('total')
-                or 0.) + \
-            Decimal(
-                qs.aggregate(
-                    total=Sum('assumed_hours')).get('total')
-                or 0.)
+    def subscribe(self, user):
+        """
+        Notify the user of new comments (again).
+        """
+        self.unsubscribed.remove(user)
+        TopicSubscription.objects.get_or_create(topic=self, user=user)
 
-        return declared_hours
+    def unsubscribe(self, user):
+        self.unsubscribed.add(user)
+        TopicSubscription.objects.filter(topic=self, user=user).delete()
 
     def update_comment_count(self):
         qs = Comment.objects.filter(topic=self)
         self.comment_count=qs.count()
         self.save(update_fields=["comment_count"])
 
+    @staticmethod
+    def tree_sql(ancestors=False, max_depth=None):
+        """
+        WITH RECURSIVE tree (id, depth), of the topic (the first %s
+        parameter) and its descendants (or ancestors), which may repeat
+        with different depths, and the parameters after the topic id.
+        """
+        through = Topic.parents.through
+        child = through._meta.get_field('from_topic').column
+        parent = through._meta.get_field('to_topic').column
+
+        if ancestors:
+            child, parent = parent, child
+
+        if max_depth is None or max_depth > settings.TOPIC_TREE_MAX_DEPTH:
+            max_depth = settings.TOPIC_TREE_MAX_DEPTH
+
+        # UNION, not UNION ALL, so that topics reached by many paths of
+        # the same depth are walked once.
+        return """
+            WITH RECURSIVE tree (id, depth) AS (
+                SELECT %s, 0
+              UNION
+                SELECT link.{child}, tree.depth + 1
+                FROM {links} link JOIN tree ON link.{parent} = tree.id
+                WHERE tree.depth < %s
+            )
+            """.format(
+                links=through._meta.db_table, child=child, parent=parent
+            ), [max_depth]
+
+    def walk(self, ancestors=False, max_depth=None):
+        """
+        The topic and its descendants (or ancestors), in one recursive
+        query, ordered by depth, the least number of parents/children
+        links from the topic, and with the parent_ids of each.
+        """
+        through = Topic.parents.through
+        tree, params = self.tree_sql(ancestors, max_depth)
+
+        return Topic.objects.raw(
+            tree + """
+            SELECT topic.*, nodes.depth, ARRAY(
+                SELECT link.{to} FROM {links} link
+                WHERE link.{frm} = topic.id ORDER BY link.{to}
+            ) AS parent_ids
+            FROM (SELECT id, min(depth) AS depth FROM tree GROUP BY id) nodes
+            JOIN {topics} topic ON topic.id = nodes.id
+            ORDER BY nodes.depth, topic.id
+            """.format(
+                links=through._meta.db_table,
+                topics=Topic._meta.db_table,
+                frm=through._meta.get_field('from_topic').column,
+                to=through._meta.get_field('to_topic').column),
+            [self.pk] + params)
+
     class Meta:
         translation_fields = (
             ('title', True),
@@ -113,6 +257,11 @@ class Topic(TopicTransactionMixin, TopicTradeMixin, GenericTranslationModel):
         verbose_name = _("Topic")
         verbose_name_plural = _("Topics")
         ordering = ('-pk', )
+        indexes = [
+            models.Index(fields=['created_date', 'id'], name='topic_created_idx'),
+            GinIndex(fields=['search_vector'], name='topic_search_idx'),
+            GinIndex(fields=['languages'], name='topic_languages_idx'),
+        ]
 
 
 class Comment(CommentTransactionMixin, GenericTranslationModel):
@@ -141,6 +290,12 @@ class Comment(CommentTransactionMixin, GenericTranslationModel):
     source = models.TextField(null=True, blank=True)
     data = JSONField(null=True, blank=True)
 
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    count_languages = True
+
+    objects = GenericManager.from_queryset(CommentQuerySet)()
+
     def set_hours(self):
 
         parsed = self.parse_hours(self.text)
@@ -180,9 +335,33 @@ class Comment(CommentTransactionMixin, GenericTranslationModel):
     def __str__(self):
         return "Comment for {}".format(self.topic)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def changed_fields(self):
+        """
+        Attnames of fields changed since the comment was loaded, or None,
+        if it was not loaded from the database.
+        """
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return None
+
+        return [name for name, value in loaded.items()
+                if value is not models.DEFERRED and
+                getattr(self, name) != value]
+
     def save(self, *args, **kwargs):
         self.proceed_interaction()
+        self._changed_fields = self.changed_fields()
         super().save(*args, **kwargs)
+        update_search_vector(self, kwargs.get('update_fields'))
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields}
         if self.blockchain:
             self.create_snapshot(blockchain=self.blockchain)
 
@@ -200,3 +379,192 @@ class Comment(CommentTransactionMixin, GenericTranslationModel):
         translation_fields = (('text', False), )
         verbose_name = _("Comment")
         verbose_name_plural = _("Comments")
+        indexes = [
+            models.Index(fields=['created_date', 'id'], name='comment_created_idx'),
+            GinIndex(fields=['search_vector'], name='comment_search_idx'),
+            GinIndex(fields=['languages'], name='comment_languages_idx'),
+        ]
+
+
+class TopicSubscription(GenericModel):
+    """
+    Users notified of new comments of a topic: its owner and commenters,
+    unless they unsubscribed (see Topic.unsubscribed).
+    """
+    topic = models.ForeignKey(Topic, related_name='subscriptions')
+    user = models.ForeignKey(User, related_name='topic_subscriptions')
+
+    def __str__(self):
+        return "{} subscribed to {}".format(self.user, self.topic)
+
+    class Meta:
+        unique_together = ('topic', 'user')
+        verbose_name = _("Topic Subscription")
+        verbose_name_plural = _("Topic Subscriptions")
+
+
+class PendingNotification(GenericModel):
+    """
+    A comment to be included in the next digest of a user, who receives
+    notifications hourly or daily (see User.digest, and core/tasks.py),
+    once, however many times the comment is saved.
+    """
+    user = models.ForeignKey(User, related_name='pending_notifications')
+    comment = models.ForeignKey(Comment, related_name='pending_notifications')
+
+    def __str__(self):
+        return "{} for {}".format(self.comment, self.user)
+
+    class Meta:
+        unique_together = ('user', 'comment')
+        verbose_name = _("Pending Notification")
+        verbose_name_plural = _("Pending Notifications")
+
+
+class TopicRollup(GenericModel):
+    """
+    Hours of a topic (own_*), and of its subtree (the rest): the topic
+    and its descendants, each counted once (see Topic.tree_sql), so that
+    goals can be ranked by their whole plan trees in one read.
+
+    refresh() adds the changes of the own hours of a topic to the topic
+    and its ancestors, on changes of comments, certificates and reserves,
+    and rebuild() sums the subtrees anew, on changes of parents.
+    """
+    HOURS = ('declared', 'matched', 'funds')
+
+    topic = models.OneToOneField(
+        Topic, primary_key=True, related_name='rollup')
+
+    own_declared = models.DecimalField(
+        default=0, decimal_places=8, max_digits=20)
+    own_matched = models.DecimalField(
+        default=0, decimal_places=8, max_digits=20)
+    own_funds = models.DecimalField(
+        default=0, decimal_places=8, max_digits=20)
+
+    declared = models.DecimalField(
+        default=0, decimal_places=8, max_digits=20)
+    matched = models.DecimalField(
+        default=0, decimal_places=8, max_digits=20)
+    funds = models.DecimalField(
+        default=0, decimal_places=8, max_digits=20)
+
+    @staticmethod
+    def own_hours(topic_id):
+        topic = Topic(pk=topic_id)
+        return {
+            'declared': topic.declared(),
+            'matched': topic.matched(),
+            'funds': topic.funds(),
+        }
+
+    @staticmethod
+    def ancestor_ids(topic_id):
+        """
+        Ids of the topic and its ancestors.
+        """
+        tree, params = Topic.tree_sql(ancestors=True)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                tree + 'SELECT DISTINCT id FROM tree', [topic_id] + params)
+            return [row[0] for row in cursor.fetchall()]
+
+    @classmethod
+    def refresh(cls, topic_id):
+        tree, params = Topic.tree_sql(ancestors=True)
+        table = cls._meta.db_table
+
+        with atomic():
+            with connection.cursor() as cursor:
+                # Locked in the order of ids, as by any other refresh,
+                # before the own hours are read.
+                cursor.execute(
+                    tree + """
+                    SELECT topic_id FROM {} WHERE topic_id IN (SELECT id FROM tree)
+                    ORDER BY topic_id FOR UPDATE
+                    """.format(table), [topic_id] + params)
+
+                # Created with the topic, and deleted with it.
+                rollup = cls.objects.filter(topic_id=topic_id).first()
+                if rollup is None:
+                    return
+
+                own = cls.own_hours(topic_id)
+                deltas = [own[name] - getattr(rollup, 'own_' + name)
+                          for name in cls.HOURS]
+
+                if not any(deltas):
+                    return
+
+                cls.objects.filter(topic_id=topic_id).update(**{
+                    'own_' + name: own[name] for name in cls.HOURS})
+
+                cursor.execute(
+                    tree + """
+                    UPDATE {} SET {}, updated_date = now()
+                    WHERE topic_id IN (SELECT id FROM tree)
+                    """.format(table, ', '.join(
+                        '{0} = {0} + %s'.format(name) for name in cls.HOURS)),
+                    [topic_id] + params + deltas)
+
+    @classmethod
+    def rebuild(cls, topic_ids, own=False):
+        """
+        Sums the subtrees of the topics anew, after reading their own
+        hours, if own.
+        """
+        topic_ids = sorted(set(topic_ids))
+        if not topic_ids:
+            return
+
+        through = Topic.parents.through
+        table = cls._meta.db_table
+
+        with atomic():
+            for topic_id in topic_ids:
+                cls.objects.get_or_create(topic_id=topic_id)
+                if own:
+                    cls.objects.filter(topic_id=topic_id).update(**{
+                        'own_' + name: value
+                        for name, value in cls.own_hours(topic_id).items()})
+
+            list(cls.objects.select_for_update().filter(
+                topic_id__in=topic_ids).order_by('topic_id'))
+
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    UPDATE {table} rollup SET {set}, updated_date = now()
+                    FROM (
+                        WITH RECURSIVE tree (root, id, depth) AS (
+                            SELECT id, id, 0 FROM {topics} WHERE id = ANY(%s)
+                          UNION
+                            SELECT tree.root, link.{child}, tree.depth + 1
+                            FROM {links} link JOIN tree ON link.{parent} = tree.id
+                            WHERE tree.depth < %s
+                        )
+                        SELECT nodes.root, {sums}
+                        FROM (SELECT DISTINCT root, id FROM tree) nodes
+                        JOIN {table} own ON own.topic_id = nodes.id
+                        GROUP BY nodes.root
+                    ) subtree
+                    WHERE rollup.topic_id = subtree.root
+                    """.format(
+                        table=table,
+                        topics=Topic._meta.db_table,
+                        links=through._meta.db_table,
+                        child=through._meta.get_field('from_topic').column,
+                        parent=through._meta.get_field('to_topic').column,
+                        set=', '.join('{0} = subtree.{0}'.format(name)
+                                      for name in cls.HOURS),
+                        sums=', '.join('sum(own.own_{0}) AS {0}'.format(name)
+                                       for name in cls.HOURS)),
+                    [topic_ids, settings.TOPIC_TREE_MAX_DEPTH])
+
+    def __str__(self):
+        return "Rollup of {}".format(self.topic_id)
+
+    class Meta:
+        verbose_name = _("Topic Rollup")
+        verbose_name_plural = _("Topic Rollups")
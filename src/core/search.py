@@ -0,0 +1,123 @@
+"""
+Full-text search of topics and comments.
+
+Each langsplit section of the translation fields is parsed in the text
+search configuration of its language (or 'simple'), into the
+search_vector column of the row, weighted 'A' for the first field (e.g.,
+the title), and 'B' for the rest. Substring matches are backed by
+trigram indexes on UPPER(field), which is what icontains compares.
+"""
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector
+)
+from django.db.models import F, Q, TextField, Value
+from langsplit import splitter
+
+
+SIMPLE = 'simple'
+
+CONFIGS = {
+    'da': 'danish',
+    'de': 'german',
+    'en': 'english',
+    'es': 'spanish',
+    'fi': 'finnish',
+    'fr': 'french',
+    'hu': 'hungarian',
+    'it': 'italian',
+    'nl': 'dutch',
+    'no': 'norwegian',
+    'pt': 'portuguese',
+    'ro': 'romanian',
+    'ru': 'russian',
+    'sv': 'swedish',
+    'tr': 'turkish',
+}
+
+
+def get_config(lang):
+    return CONFIGS.get(lang, SIMPLE)
+
+
+def sections(instance, name, title=False):
+    """
+    {lang: text} of the translation field of the instance, as split on
+    save, or split now, if it was not.
+    """
+    translations = getattr(instance, 'translations', None) or {}
+    if name in translations:
+        return translations[name]
+
+    value = getattr(instance, name)
+    if not value:
+        return {}
+    try:
+        return splitter.split(value, title=title) or {}
+    except Exception:
+        return {}
+
+
+def search_vector(instance, translation_fields):
+    """
+    The tsvector expression of the instance, or None, if it has no text.
+    """
+    vector = None
+
+    for i, (name, title) in enumerate(translation_fields):
+        for lang, text in sections(instance, name, title).items():
+            if not text.strip():
+                continue
+
+            part = SearchVector(
+                Value(text, output_field=TextField()),
+                config=get_config(lang),
+                weight='A' if i == 0 else 'B')
+            vector = part if vector is None else vector + part
+
+    return vector
+
+
+def update_search_vector(instance, update_fields=None):
+    """
+    Updates the search_vector of the saved instance, unless none of its
+    translation fields were saved.
+    """
+    translation_fields = instance._meta.translation_fields
+
+    if update_fields is not None and not \
+            {name for name, _ in translation_fields}.intersection(update_fields):
+        return
+
+    type(instance).objects.filter(pk=instance.pk).update(
+        search_vector=search_vector(instance, translation_fields))
+
+
+def search_query(text, lang=None):
+    """
+    The query of text in the configuration of lang, or in any of them.
+    """
+    if lang:
+        return SearchQuery(text, config=get_config(lang))
+
+    query = SearchQuery(text, config=SIMPLE)
+    for config in sorted(set(CONFIGS.values())):
+        query = query | SearchQuery(text, config=config)
+    return query
+
+
+def search(queryset, text, lang=None, fields=()):
+    """
+    Rows matching the text, or containing it in one of the fields,
+    annotated with their search_rank, and in lang, if given.
+    """
+    query = search_query(text, lang)
+    if lang:
+        queryset = queryset.filter(languages__contains=[lang])
+
+    condition = Q(search_vector=query)
+    for name in fields:
+        condition |= Q(**{'{}__icontains'.format(name): text})
+
+    return queryset.annotate(
+        search_rank=SearchRank(F('search_vector'), query)
+    ).filter(condition)
@@ -1,50 +1,16 @@
-import json
-
-import boto3
 import mistune
 import bs4
 import yaml
-from django.conf import settings
 
 from django.db import models
 from django.dispatch import receiver
 
-from core.models import Topic, Comment
-from transactions.models import Transaction
-from users.models import User
-from websocket.consumers import ws_send_comment_changed
-
-from mail import send_mail_async
-from django.core.signing import Signer
-
-from django.core import serializers
-
-from syncdb import update_syncdb_async
-
-
-def make_data(instance):
-    singular = instance.__class__.__name__.lower()
-    namespace = singular+'s'
-
-    data = json.loads(serializers.serialize('json', [instance]))[0]
-
-    protocol = 'https'
-    server = next(iter(settings.ALLOWED_HOSTS or []), None)
-    if server == '*':
-        protocol = 'http'
-        server = '0.0.0.0:8000'
-
-    location = '{protocol}://{server}/{namespace}/{pk}'.format(
-        protocol=protocol,
-        server=server,
-        namespace=namespace,
-        pk=data.get('pk'))
-
-    data.update({'-': location})
-    # normalization schema #
-    data.update({'*': 'https://github.com/wefindx/ooio/wiki/{}#infli'.format(singular)})
-
-    return data
+from core.models import Topic, Comment, TopicRollup
+from outbox.models import OutboxEvent
+from trade.models import Reserve
+from transactions.models import (
+    CommentSnapshot, ContributionCertificate, Transaction
+)
 
 
 @receiver(models.signals.post_delete, sender=Comment)
@@ -56,85 +22,34 @@ def comment_post_delete(sender, instance, *args, **kwargs):
 @receiver(models.signals.post_save, sender=Comment)
 def comment_post_save(sender, instance, created, *args, **kwargs):
 
-    # Utils and constants
-    signer = Signer()
-
-    protocol = 'https'
-    server = next(iter(settings.ALLOWED_HOSTS or []), None)
-    if server == '*':
-        protocol = 'http'
-        server = '0.0.0.0:8000'
-
-    # client_server = server[4:] if server.startswith('.inf') else server
-
-    # Broadcast over web-sockets
-    ws_send_comment_changed(instance, created)
-
-    # Send e-mail notification
-
-    subscribers = {instance.topic.owner.pk}.union(set(
-        Comment.objects.filter(
-            topic=instance.topic).values_list(
-                'owner_id', flat=True).distinct()))
-
-    unsubscribed = {instance.owner.pk}.union(set(
-        instance.topic.unsubscribed.all().values_list('pk', flat=True)))
-
-    recipients = User.objects.filter(pk__in=subscribers-unsubscribed)
-
-    subject = '{} - {}'.format(settings.EMAIL_SUBJECT_PREFIX, instance.topic.title[5:])
-
-    for recipient in recipients:
-
-        body = """Comment by {author}:<br>
-<br>
-{body}<br>
-<br>
-To reply, visit: {protocol}://{client}/#/{lang}/@/topic/{topic_id}/comment/{comment_id}<br>
-<br>
---<br>
-To unsubscribe from this topic, visit:<br>
-https://{server}/unsubscribe/{topic_id}?sign={signed_email}<br>""".format(
-        protocol=protocol,
-        body=instance.text[5:],
-        server=server,
-        client=settings.CLIENT_DOMAIN,
-        lang=instance.topic.title[2:4],
-        topic_id=instance.topic.pk,
-        comment_id=instance.pk,
-        author=instance.owner.username,
-        signed_email=signer.sign(recipient.email))
-
-        send_mail_async(
-            subject,
-            body,
-            settings.DEFAULT_FROM_EMAIL,
-            [recipient.email],
-            [settings.DEFAULT_FROM_EMAIL],
-        )
+    # Broadcast, notify subscribers and sync, after commit (core/handlers.py)
+    OutboxEvent.publish(
+        'comment.saved', 'comment:{}'.format(instance.pk),
+        id=instance.pk, created=created,
+        fields=getattr(instance, '_changed_fields', None))
 
     # Subscribe the commenter (instance.owner) to the (instance.topic):
-    instance.topic.unsubscribed.remove(instance.owner)
+    instance.topic.subscribe(instance.owner)
     # (if previously was unsubscribed)
 
     # update comment count
     if created:
         instance.topic.update_comment_count()
 
-    # Save or update its copy to MongoDB, if it's defined
-    data = make_data(instance)
-    update_syncdb_async('comments', data)
-
 
 @receiver(models.signals.post_save, sender=Topic)
 def topic_post_save(sender, instance, created, *args, **kwargs):
 
-    if instance.body:
+    # Sync, and notify SNS, after commit (core/handlers.py)
+    OutboxEvent.publish(
+        'topic.saved', 'topic:{}'.format(instance.pk),
+        id=instance.pk, created=created)
 
-        # Save or update its copy to MongoDB, if it's defined
-        data = make_data(instance)
-        update_syncdb_async('topics', data)
+    if created:
+        instance.subscribe(instance.owner)
+        TopicRollup.objects.get_or_create(topic=instance)
 
+    if instance.body:
 
         html = mistune.markdown(instance.body)
 
@@ -203,29 +118,67 @@ def topic_post_save(sender, instance, created, *args, **kwargs):
                 need.delete()
 
 
-@receiver(models.signals.post_save, sender=Topic)
-def send_sns_notification(sender, instance, created, *args, **kwargs):
-    if not created:
+@receiver(models.signals.post_save, sender=Transaction)
+def transaction_post_save(sender, instance, created, *args, **kwargs):
+    # Save or update its copy to MongoDB, after commit (core/handlers.py)
+    OutboxEvent.publish(
+        'transaction.saved', 'transaction:{}'.format(instance.pk),
+        id=instance.pk, created=created)
+
+
+# Rollups of hours of topic subtrees (see TopicRollup). Certificates,
+# matched in bulk, when a comment is saved, are refreshed with it.
+
+@receiver(models.signals.post_save, sender=Comment)
+@receiver(models.signals.post_delete, sender=Comment)
+@receiver(models.signals.post_save, sender=Reserve)
+@receiver(models.signals.post_delete, sender=Reserve)
+def rollup_topic(sender, instance, *args, **kwargs):
+    if instance.topic_id:
+        TopicRollup.refresh(instance.topic_id)
+
+
+@receiver(models.signals.post_save, sender=ContributionCertificate)
+@receiver(models.signals.post_delete, sender=ContributionCertificate)
+def rollup_certificate_topic(sender, instance, *args, **kwargs):
+    if not instance.matched:
         return
 
-    arn = getattr(settings, 'TOPIC_CREATED_ARN')
-    if not arn:
+    topic_id = CommentSnapshot.objects.filter(
+        pk=instance.comment_snapshot_id).values_list(
+            'comment__topic_id', flat=True).first()
+
+    if topic_id:
+        TopicRollup.refresh(topic_id)
+
+
+@receiver(models.signals.m2m_changed, sender=Topic.parents.through)
+def rollup_parents_changed(sender, instance, action, reverse, pk_set, *args, **kwargs):
+    if action == 'pre_clear':
+        instance._cleared_links = set(
+            (instance.children if reverse else instance.parents).values_list(
+                'pk', flat=True))
         return
 
-    region = getattr(settings, 'AWS_DEFAULT_REGION')
-    if not region:
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_cleared_links', set())
+    elif action not in ('post_add', 'post_remove'):
         return
 
-    client = boto3.client('sns', region_name=region)
-    message = {"topic_id": instance.pk}
-    client.publish(
-        TopicArn=arn,
-        Message=json.dumps(message)
-    )
+    # The subtrees of the parents of the links, and of their ancestors.
+    parents = [instance.pk] if reverse else pk_set
+    TopicRollup.rebuild(
+        topic_id for parent in parents
+        for topic_id in TopicRollup.ancestor_ids(parent))
 
 
-@receiver(models.signals.post_save, sender=Transaction)
-def transaction_post_save(sender, instance, created, *args, **kwargs):
-    # Save or update its copy to MongoDB, if it's defined
-    data = make_data(instance)
-    update_syncdb_async('transactions', data)
+@receiver(models.signals.pre_delete, sender=Topic)
+def rollup_topic_pre_delete(sender, instance, *args, **kwargs):
+    instance._rollup_ancestors = [
+        topic_id for topic_id in TopicRollup.ancestor_ids(instance.pk)
+        if topic_id != instance.pk]
+
+
+@receiver(models.signals.post_delete, sender=Topic)
+def rollup_topic_post_delete(sender, instance, *args, **kwargs):
+    TopicRollup.rebuild(getattr(instance, '_rollup_ancestors', ()))
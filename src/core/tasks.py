@@ -0,0 +1,174 @@
+from itertools import groupby
+
+from celery import shared_task
+from django.conf import settings
+from django.core.signing import Signer
+
+from core.models import Comment, TopicSubscription, PendingNotification
+from mail import send_mails, send_personalized_mail
+from users.models import User
+
+
+SIGNED_EMAIL = '%SIGNED_EMAIL%'
+
+
+def site():
+    protocol = 'https'
+    server = next(iter(settings.ALLOWED_HOSTS or []), None)
+    if server == '*':
+        protocol = 'http'
+        server = '0.0.0.0:8000'
+
+    return protocol, server
+
+
+def render_comment(comment):
+    protocol, server = site()
+
+    return """Comment by {author}:<br>
+<br>
+{body}<br>
+<br>
+To reply, visit: {protocol}://{client}/#/{lang}/@/topic/{topic_id}/comment/{comment_id}<br>""".format(
+        protocol=protocol,
+        body=comment.text[5:],
+        client=settings.CLIENT_DOMAIN,
+        lang=comment.topic.title[2:4],
+        topic_id=comment.topic.pk,
+        comment_id=comment.pk,
+        author=comment.owner.username)
+
+
+def render_unsubscribe(topic, signed_email):
+    protocol, server = site()
+
+    return """To unsubscribe from this topic, visit:<br>
+https://{server}/unsubscribe/{topic_id}?sign={signed_email}<br>""".format(
+        server=server,
+        topic_id=topic.pk,
+        signed_email=signed_email)
+
+
+@shared_task
+def notify_subscribers_task(comment_id):
+    """
+    E-mails a new comment to the subscribers of its topic, except for
+    its author. The body is rendered once, and only the unsubscribe
+    link differs per recipient.
+
+    Subscribers who chose a digest get the comment in their next digest.
+    """
+    comment = Comment.objects.select_related(
+        'topic', 'owner').filter(pk=comment_id).first()
+
+    if not comment:
+        return
+
+    subscriptions = TopicSubscription.objects.filter(
+        topic=comment.topic).exclude(
+            user=comment.owner).exclude(user__email='')
+
+    for user_id in subscriptions.exclude(
+            user__digest=User.IMMEDIATE).values_list('user', flat=True):
+        PendingNotification.objects.get_or_create(
+            user_id=user_id, comment=comment)
+
+    emails = subscriptions.filter(
+        user__digest=User.IMMEDIATE).values_list('user__email', flat=True)
+
+    if not emails:
+        return
+
+    signer = Signer()
+
+    subject = '{} - {}'.format(settings.EMAIL_SUBJECT_PREFIX, comment.topic.title[5:])
+
+    body = '{}<br>\n--<br>\n{}'.format(
+        render_comment(comment),
+        render_unsubscribe(comment.topic, SIGNED_EMAIL))
+
+    send_personalized_mail(
+        subject,
+        body,
+        settings.DEFAULT_FROM_EMAIL,
+        [(email, {SIGNED_EMAIL: signer.sign(email)}) for email in emails],
+        [settings.DEFAULT_FROM_EMAIL],
+    )
+
+
+def notify_subscribers_async(*args):
+    return notify_subscribers_task.apply_async(args)
+
+
+def send_digests(user_ids):
+    """
+    E-mails one digest to each of the users, of all their pending
+    notifications, grouped by topic, and removes them.
+    """
+    signer = Signer()
+
+    notifications = list(PendingNotification.objects.filter(
+        user__in=user_ids).select_related(
+            'user', 'comment', 'comment__topic', 'comment__owner').order_by(
+                'user', 'comment__topic', 'comment'))
+
+    mails = []
+
+    for user, items in groupby(notifications, lambda n: n.user):
+        items = list(items)
+        sections = []
+
+        for topic, comments in groupby(
+                [n.comment for n in items], lambda c: c.topic):
+            sections.append('<b>{}</b><br>\n<br>\n{}<br>\n{}'.format(
+                topic.title[5:],
+                '<br>\n'.join(render_comment(c) for c in comments),
+                render_unsubscribe(topic, signer.sign(user.email))))
+
+        subject = '{} - {} new comments'.format(
+            settings.EMAIL_SUBJECT_PREFIX, len(items))
+
+        mails.append(
+            (subject, '<br>\n--<br>\n'.join(sections), user.email))
+
+    send_mails(
+        mails,
+        settings.DEFAULT_FROM_EMAIL,
+        [settings.DEFAULT_FROM_EMAIL],
+    )
+
+    PendingNotification.objects.filter(
+        pk__in=[n.pk for n in notifications]).delete()
+
+    return len(mails)
+
+
+@shared_task
+def send_digests_task(*digests):
+    """
+    Sends the digests of users with the digest types, in batches of
+    DIGEST_BATCH_SIZE users.
+    """
+    user_ids = list(PendingNotification.objects.filter(
+        user__digest__in=digests).order_by('user').values_list(
+            'user', flat=True).distinct())
+
+    for i in range(0, len(user_ids), settings.DIGEST_BATCH_SIZE):
+        send_digests(user_ids[i:i + settings.DIGEST_BATCH_SIZE])
+
+
+@shared_task
+def send_hourly_digests_task():
+    """
+    Also sends the leftovers of users, who switched to immediate
+    notifications. Scheduled in src/celery/celery.py.
+    """
+    send_digests_task(User.IMMEDIATE, User.HOURLY)
+
+
+@shared_task
+def send_daily_digests_task():
+    """
+    Scheduled in src/celery/celery.py, at DIGEST_DAILY_HOUR.
+    """
+    send_digests_task(User.DAILY)
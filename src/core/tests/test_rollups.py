@@ -0,0 +1,97 @@
+from decimal import Decimal
+
+from rest_framework.reverse import reverse
+from test_plus.test import TestCase
+
+from core.models import Topic, Comment, TopicRollup
+from trade.models import Reserve
+
+
+class TestTopicRollups(TestCase):
+    """
+    goal -> idea -> plan
+         -> idea2 ->
+    """
+
+    def setUp(self):
+        self.thinker = self.make_user('thinker')
+
+        self.goal = Topic.objects.create(
+            title='.:en:Goal', type=Topic.GOAL, owner=self.thinker)
+        self.idea = Topic.objects.create(
+            title='.:en:Idea', type=Topic.IDEA, owner=self.thinker)
+        self.idea2 = Topic.objects.create(
+            title='.:en:Idea 2', type=Topic.IDEA, owner=self.thinker)
+        self.plan = Topic.objects.create(
+            title='.:en:Plan', type=Topic.PLAN, owner=self.thinker)
+
+        self.idea.parents.add(self.goal)
+        self.idea2.parents.add(self.goal)
+        self.plan.parents.add(self.idea, self.idea2)
+
+    def rollup(self, topic):
+        return TopicRollup.objects.get(topic=topic)
+
+    def test_comments_roll_up_once(self):
+        Comment.objects.create(
+            topic=self.plan, text='.:en:Work {3}{?1}', owner=self.thinker)
+        Comment.objects.create(
+            topic=self.idea, text='.:en:Think {2}', owner=self.thinker)
+
+        self.assertEqual(self.rollup(self.plan).declared, Decimal(4))
+        self.assertEqual(self.rollup(self.idea).declared, Decimal(6))
+        self.assertEqual(self.rollup(self.idea2).declared, Decimal(4))
+        self.assertEqual(self.rollup(self.goal).declared, Decimal(6))
+        self.assertEqual(self.rollup(self.goal).own_declared, Decimal(0))
+
+    def test_updated_and_deleted_comment(self):
+        comment = Comment.objects.create(
+            topic=self.plan, text='.:en:Work {3}', owner=self.thinker)
+
+        comment.text = '.:en:Work {5}'
+        comment.save()
+        self.assertEqual(self.rollup(self.goal).declared, Decimal(5))
+
+        comment.delete()
+        self.assertEqual(self.rollup(self.goal).declared, Decimal(0))
+
+    def test_reserves(self):
+        Reserve.objects.create(
+            user=self.thinker, topic=self.plan, hours=Decimal(-2))
+
+        self.assertEqual(self.rollup(self.goal).funds, Decimal(-2))
+
+    def test_parents_changed(self):
+        Comment.objects.create(
+            topic=self.plan, text='.:en:Work {3}', owner=self.thinker)
+
+        self.plan.parents.clear()
+        self.assertEqual(self.rollup(self.goal).declared, Decimal(0))
+
+        self.idea.children.add(self.plan)
+        self.assertEqual(self.rollup(self.goal).declared, Decimal(3))
+
+    def test_deleted_topic(self):
+        Comment.objects.create(
+            topic=self.plan, text='.:en:Work {3}', owner=self.thinker)
+
+        self.plan.delete()
+        self.assertEqual(self.rollup(self.goal).declared, Decimal(0))
+
+    def test_rebuild(self):
+        Comment.objects.create(
+            topic=self.plan, text='.:en:Work {3}', owner=self.thinker)
+        TopicRollup.objects.update(declared=0, own_declared=0)
+
+        TopicRollup.rebuild(
+            Topic.objects.values_list('pk', flat=True), own=True)
+        self.assertEqual(self.rollup(self.goal).declared, Decimal(3))
+
+    def test_serialized(self):
+        Comment.objects.create(
+            topic=self.plan, text='.:en:Work {3}', owner=self.thinker)
+
+        response = self.client.get(
+            reverse('topic-detail', args=(self.goal.pk,)))
+
+        self.assertEqual(Decimal(response.data['rollup']['declared']), 3)
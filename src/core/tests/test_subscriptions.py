@@ -0,0 +1,102 @@
+from django.core import mail
+from django.core.signing import Signer
+from test_plus.test import TestCase
+
+from core.models import (
+    Topic, Comment, TopicSubscription, PendingNotification
+)
+from core.tasks import (
+    notify_subscribers_task, send_daily_digests_task, send_hourly_digests_task
+)
+from users.models import User
+
+
+class TestSubscriptions(TestCase):
+
+    def setUp(self):
+        self.thinker = self.make_user('thinker')
+        self.doer = self.make_user('doer')
+        self.reader = self.make_user('reader')
+
+        self.topic = Topic.objects.create(
+            title='.:en:Subscriptions', owner=self.thinker)
+
+    def subscribers(self):
+        return set(TopicSubscription.objects.filter(
+            topic=self.topic).values_list('user', flat=True))
+
+    def test_owner_and_commenters_are_subscribed(self):
+
+        self.assertEqual(self.subscribers(), {self.thinker.pk})
+
+        Comment.objects.create(
+            topic=self.topic, text='.:en:Hello', owner=self.doer)
+
+        self.assertEqual(self.subscribers(), {self.thinker.pk, self.doer.pk})
+
+    def test_unsubscribe_until_next_comment(self):
+
+        self.topic.unsubscribe(self.thinker)
+        self.assertEqual(self.subscribers(), set())
+
+        Comment.objects.create(
+            topic=self.topic, text='.:en:Back', owner=self.thinker)
+
+        self.assertEqual(self.subscribers(), {self.thinker.pk})
+        self.assertFalse(self.topic.unsubscribed.exists())
+
+    def test_one_batch_per_comment(self):
+
+        Comment.objects.create(
+            topic=self.topic, text='.:en:Hello', owner=self.reader)
+        comment = Comment.objects.create(
+            topic=self.topic, text='.:en:Claim {1}', owner=self.doer)
+
+        mail.outbox = []
+        notify_subscribers_task(comment.pk)
+
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            sorted([self.thinker.email, self.reader.email]))
+
+        signer = Signer()
+        for message in mail.outbox:
+            self.assertIn('Claim {1}', message.body)
+            self.assertIn(
+                'sign={}'.format(signer.sign(message.to[0])), message.body)
+
+    def test_digests(self):
+
+        self.reader.digest = User.DAILY
+        self.reader.save()
+
+        Comment.objects.create(
+            topic=self.topic, text='.:en:Hello', owner=self.reader)
+
+        for text in ['.:en:First', '.:en:Second']:
+            comment = Comment.objects.create(
+                topic=self.topic, text=text, owner=self.doer)
+            mail.outbox = []
+            notify_subscribers_task(comment.pk)
+
+            self.assertEqual(
+                [message.to[0] for message in mail.outbox],
+                [self.thinker.email])
+
+        # Saved again.
+        notify_subscribers_task(comment.pk)
+
+        self.assertEqual(
+            PendingNotification.objects.filter(user=self.reader).count(), 2)
+
+        mail.outbox = []
+        send_hourly_digests_task()
+        self.assertEqual(mail.outbox, [])
+
+        send_daily_digests_task()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [self.reader.email])
+        self.assertIn('First', mail.outbox[0].body)
+        self.assertIn('Second', mail.outbox[0].body)
+        self.assertFalse(PendingNotification.objects.exists())
@@ -939,3 +939,32 @@ class TestTopic(TestCase):
             ContributionCertificate.user_unmatched(self.investor),
             Decimal('0.0')
         )
+
+    def test_annotated_hours(self):
+        """
+        Queryset annotations, used by the list endpoints, should be
+        equal to the values of the model methods.
+        """
+        payment = Payment.objects.create(
+            request={
+                "amount": "150",
+                "currency": "usd",
+            },
+            platform=0, provider=0, owner=self.investor3,
+            topic=self.topic
+        )
+
+        self.comment.invest(4.0, 'eur', self.investor)
+        self.comment2.invest(1.0, 'eur', self.investor2)
+        self.comment2.invest(5.0, 'eur', self.investor3)
+
+        topic = Topic.objects.with_hours().get(pk=self.topic.pk)
+
+        self.assertEqual(topic.matched_hours, self.topic.matched())
+        self.assertEqual(topic.declared_hours, self.topic.declared())
+        self.assertEqual(topic.funds_hours, self.topic.funds())
+
+        for comment in Comment.objects.with_hours().filter(topic=self.topic):
+            self.assertEqual(comment.matched_hours, comment.matched())
+            self.assertEqual(comment.donated_hours, comment.donated())
+            self.assertEqual(comment.remains_hours, comment.remains())
@@ -0,0 +1,62 @@
+from unittest import mock
+
+from django.core.management import call_command
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+from test_plus.test import TestCase
+
+from core.models import Topic, Comment
+from users.models import User
+
+
+class TestTranslations(TestCase):
+
+    def setUp(self):
+        self.thinker = self.make_user('thinker')
+        self.topic = Topic.objects.create(
+            title='.:en:Water\n.:ru:Вода',
+            body='.:en\nPipes\n.:ru\nТрубы',
+            owner=self.thinker)
+
+    def test_split_on_save(self):
+        self.topic.refresh_from_db()
+
+        self.assertEqual(self.topic.translations['title'],
+                         {'en': 'Water', 'ru': 'Вода'})
+        self.assertEqual(set(self.topic.translations['body']), {'en', 'ru'})
+        self.assertEqual(set(self.topic.languages), {'en', 'ru'})
+
+    def test_not_split_on_other_updates(self):
+        with mock.patch('generic.models.splitter.split') as split:
+            self.topic.save(update_fields=['comment_count'])
+        self.assertFalse(split.called)
+
+    def test_update_translations(self):
+        comment = Comment.objects.create(
+            topic=self.topic, text='.:en:Hello', owner=self.thinker)
+        Comment.objects.filter(pk=comment.pk).update(translations={})
+
+        call_command('update_translations')
+
+        comment.refresh_from_db()
+        self.assertEqual(comment.translations, {'text': {'en': 'Hello'}})
+
+
+class TestTranslationsAPI(APITestCase):
+
+    def setUp(self):
+        self.topic = Topic.objects.create(
+            title='.:en:Water\n.:ru:Вода',
+            owner=User.objects.create_user('thinker', password='password'))
+
+    def test_read_from_translations(self):
+        with mock.patch('api.v1.core.fields.splitter.split') as split:
+            response = self.client.get(
+                reverse('topic-detail', args=(self.topic.pk,)), {'lang': 'ru'})
+        self.assertFalse(split.called)
+        self.assertEqual(response.data['title'], 'Вода')
+
+    def test_first_language(self):
+        response = self.client.get(
+            reverse('topic-detail', args=(self.topic.pk,)), {'lang': 'de'})
+        self.assertEqual(response.data['title'], 'Water')
@@ -0,0 +1,72 @@
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from core.models import Topic
+from users.models import User
+
+
+class TopicTreeTestCase(APITestCase):
+    """
+        goal
+       /    \\
+    idea    idea2
+       \\    /
+        plan
+         |
+        task
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user('thinker', password='password')
+
+        def topic(title, type, *parents):
+            topic = Topic.objects.create(
+                title='.:en:{}'.format(title), type=type, owner=self.user)
+            topic.parents.add(*parents)
+            return topic
+
+        self.goal = topic('Goal', Topic.GOAL)
+        self.idea = topic('Idea', Topic.IDEA, self.goal)
+        self.idea2 = topic('Idea 2', Topic.IDEA, self.goal)
+        self.plan = topic('Plan', Topic.PLAN, self.idea, self.idea2)
+        self.task = topic('Task', Topic.TASK, self.plan)
+
+    def test_descendants(self):
+        nodes = list(self.goal.walk())
+
+        self.assertEqual(
+            [(node.pk, node.depth) for node in nodes],
+            [(self.goal.pk, 0), (self.idea.pk, 1), (self.idea2.pk, 1),
+             (self.plan.pk, 2), (self.task.pk, 3)])
+        self.assertEqual(
+            nodes[3].parent_ids, sorted([self.idea.pk, self.idea2.pk]))
+
+    def test_ancestors(self):
+        nodes = list(self.task.walk(ancestors=True, max_depth=2))
+
+        self.assertEqual(
+            [node.pk for node in nodes],
+            [self.task.pk, self.plan.pk, self.idea.pk, self.idea2.pk])
+
+    def test_cycle(self):
+        self.goal.parents.add(self.task)
+
+        self.assertEqual(len(list(self.goal.walk())), 5)
+
+    def test_tree_endpoint(self):
+        response = self.client.get(
+            reverse('topic-tree', args=(self.goal.pk,)), {'lang': 'en'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [node['title'] for node in response.data],
+            ['Goal', 'Idea', 'Idea 2', 'Plan', 'Task'])
+        self.assertEqual(response.data[-1]['depth'], 3)
+
+    def test_ancestors_endpoint(self):
+        response = self.client.get(
+            reverse('topic-ancestors', args=(self.plan.pk,)), {'depth': 1})
+
+        self.assertEqual(
+            [node['id'] for node in response.data],
+            [self.plan.pk, self.idea.pk, self.idea2.pk])
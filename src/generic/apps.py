@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class GenericConfig(AppConfig):
     name = 'generic'
+
+    def ready(self):
+        import generic.signals
@@ -0,0 +1,17 @@
+from django.apps import apps
+from django.core.management import BaseCommand
+
+from generic.models import GenericTranslationModel, LanguageCount
+
+
+class Command(BaseCommand):
+    help = 'recount the languages of the translation models that count them'
+
+    def handle(self, *args, **options):
+
+        for model in apps.get_models():
+            if issubclass(model, GenericTranslationModel) and \
+                    model.count_languages:
+                LanguageCount.rebuild(model)
+
+        print('Done.')
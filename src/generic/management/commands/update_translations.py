@@ -0,0 +1,43 @@
+from django.apps import apps
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from generic.models import GenericTranslationModel
+
+
+class Command(BaseCommand):
+    help = 'store the split translations of rows saved before they were stored on save'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='all rows, not only the ones without translations')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+
+        for model in apps.get_models():
+            if not issubclass(model, GenericTranslationModel):
+                continue
+
+            names = [name for name, _ in model._meta.translation_fields]
+            rows = model.objects.order_by('pk').only('pk', *names)
+            if not options['all']:
+                rows = rows.filter(translations={})
+
+            count, last = 0, 0
+            while True:
+                batch = list(rows.filter(pk__gt=last)[:options['batch_size']])
+                if not batch:
+                    break
+
+                with transaction.atomic():
+                    for instance in batch:
+                        translations, languages = instance.split_translations()
+                        model.objects.filter(pk=instance.pk).update(
+                            translations=translations, languages=languages)
+
+                count += len(batch)
+                last = batch[-1].pk
+
+            print('{}: {}'.format(model._meta.label, count))
+
+        print('Done.')
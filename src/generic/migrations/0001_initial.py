@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.15 on 2018-09-16 17:20
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def count_languages(apps, schema_editor):
+    LanguageCount = apps.get_model('generic', 'LanguageCount')
+
+    for app_label, model_name in (
+            ('core', 'topic'), ('core', 'comment'), ('meta', 'type')):
+        table = '{}_{}'.format(app_label, model_name)
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT lang, count(*) FROM {}, unnest(languages) lang '
+                'GROUP BY lang'.format(table))
+            LanguageCount.objects.bulk_create([
+                LanguageCount(model='{}.{}'.format(app_label, model_name),
+                              lang=lang, count=count)
+                for lang, count in cursor.fetchall()
+            ])
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('core', '0035_languages_idx'),
+        ('meta', '0014_type_languages_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LanguageCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100)),
+                ('lang', models.CharField(max_length=2)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='languagecount',
+            unique_together=set([('model', 'lang')]),
+        ),
+        migrations.RunPython(count_languages, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,7 @@
 from langsplit import splitter
 
-from django.db import models
-from django.contrib.postgres.fields import ArrayField
+from django.db import connection, models
+from django.contrib.postgres.fields import ArrayField, JSONField
 import django.db.models.options as options
 
 options.DEFAULT_NAMES = options.DEFAULT_NAMES + ('translation_fields',)
@@ -21,13 +21,107 @@ class GenericModel(models.Model):
         abstract = True
 
 
+class LanguageCount(models.Model):
+    """
+    Rows per language of the translation models, that count them (see
+    GenericTranslationModel.count_languages), updated on save and delete.
+    """
+    model = models.CharField(max_length=100)
+    lang = models.CharField(max_length=2)
+    count = models.IntegerField(default=0)
+
+    @classmethod
+    def add(cls, model, deltas):
+        """
+        Adds the {lang: delta} counts of the model, in one statement.
+        """
+        deltas = sorted(
+            (lang, delta) for lang, delta in deltas.items() if delta)
+        if not deltas:
+            return
+
+        params = []
+        for lang, delta in deltas:
+            params += [model._meta.label_lower, lang, delta]
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'INSERT INTO {table} (model, lang, count) VALUES {values} '
+                'ON CONFLICT (model, lang) DO UPDATE '
+                'SET count = {table}.count + EXCLUDED.count'.format(
+                    table=cls._meta.db_table,
+                    values=', '.join(['(%s, %s, %s)'] * len(deltas))),
+                params)
+
+    @classmethod
+    def update(cls, model, old, new):
+        deltas = {}
+        for lang in old or ():
+            deltas[lang] = deltas.get(lang, 0) - 1
+        for lang in new or ():
+            deltas[lang] = deltas.get(lang, 0) + 1
+        cls.add(model, deltas)
+
+    @classmethod
+    def rebuild(cls, model):
+        """
+        Recounts the languages of the model rows.
+        """
+        label = model._meta.label_lower
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT lang, count(*) FROM {}, unnest(languages) lang '
+                'GROUP BY lang'.format(model._meta.db_table))
+            counts = dict(cursor.fetchall())
+
+        cls.objects.filter(model=label).exclude(lang__in=counts).delete()
+        for lang, count in counts.items():
+            cls.objects.update_or_create(
+                model=label, lang=lang, defaults={'count': count})
+
+    @classmethod
+    def facets(cls, *models):
+        """
+        {model name: {lang: count}} of the models.
+        """
+        result = {model._meta.model_name: {} for model in models}
+        labels = {model._meta.label_lower: model._meta.model_name
+                  for model in models}
+
+        for label, lang, count in cls.objects.filter(
+                model__in=labels, count__gt=0).values_list(
+                    'model', 'lang', 'count'):
+            result[labels[label]][lang] = count
+
+        return result
+
+    def __str__(self):
+        return '{} {}: {}'.format(self.model, self.lang, self.count)
+
+    class Meta:
+        unique_together = (('model', 'lang'),)
+
+
 class GenericTranslationModel(GenericModel):
     languages = ArrayField(models.CharField(max_length=2), blank=True)
 
-    def save(self, *args, **kwargs):
+    # Counted in LanguageCount, if True.
+    count_languages = False
+
+    # {field: {lang: text}} of the translation fields, split on save.
+    translations = JSONField(default=dict, blank=True, editable=False)
+
+    def split_translations(self):
+        """
+        Splits the translation fields into their languages, and converts
+        them to the canonical form. Returns the translations and the
+        languages common to the fields.
+        """
         translation_fields = getattr(self._meta, 'translation_fields', ())
+        translations = {}
         lang_keys = []
         for translation_field, translation_title in translation_fields:
+            translations[translation_field] = {}
             try:
                 field_data = splitter.split(
                     getattr(self, translation_field),
@@ -42,19 +136,70 @@ class GenericTranslationModel(GenericModel):
                             title=translation_title
                         ).strip()
                     )
+                    translations[translation_field] = dict(field_data)
                     lang_keys.append(field_data.keys())
             except Exception:
                 pass
 
         if not lang_keys:
-            self.languages = []
+            languages = []
         else:
-            self.languages = list(
+            languages = list(
                 frozenset.intersection(
                     *[frozenset(key_pair) for key_pair in lang_keys]
                 )
             )
-        return super().save(*args, **kwargs)
+        return translations, languages
+
+    def get_translations(self, name):
+        """
+        {lang: text} of the translation field, or None, if not split yet.
+        """
+        return (self.translations or {}).get(name)
+
+    def save(self, *args, **kwargs):
+        translation_fields = getattr(self._meta, 'translation_fields', ())
+        update_fields = kwargs.get('update_fields')
+
+        if update_fields is not None:
+            if not {name for name, _ in translation_fields}.intersection(
+                    update_fields):
+                return super().save(*args, **kwargs)
+            kwargs['update_fields'] = set(update_fields).union(
+                ['translations', 'languages'])
+
+        if self.count_languages:
+            old = self.saved_languages()
+
+        self.translations, self.languages = self.split_translations()
+        result = super().save(*args, **kwargs)
+
+        if self.count_languages:
+            LanguageCount.update(type(self), old, self.languages)
+            self._loaded_languages = list(self.languages)
+
+        return result
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'languages' in field_names:
+            instance._loaded_languages = values[field_names.index('languages')]
+        return instance
+
+    def saved_languages(self):
+        """
+        Languages of the row in the database, or None, if it's new.
+        """
+        if self._state.adding or self.pk is None:
+            return None
+
+        loaded = getattr(self, '_loaded_languages', models.DEFERRED)
+        if loaded is not models.DEFERRED:
+            return loaded
+
+        return type(self).objects.filter(pk=self.pk).values_list(
+            'languages', flat=True).first()
 
     class Meta:
         abstract = True
@@ -0,0 +1,18 @@
+from django.db.models import DEFERRED
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from generic.models import GenericTranslationModel, LanguageCount
+
+
+@receiver(post_delete)
+def uncount_languages(sender, instance, **kwargs):
+    if not isinstance(instance, GenericTranslationModel) or \
+            not instance.count_languages:
+        return
+
+    languages = getattr(instance, '_loaded_languages', DEFERRED)
+    if languages is DEFERRED:
+        languages = instance.languages
+
+    LanguageCount.update(sender, languages, None)
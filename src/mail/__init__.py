@@ -1,6 +1,6 @@
 import logging
 
-from django.core.mail import EmailMultiAlternatives
+from django.core.mail import EmailMultiAlternatives, get_connection
 from celery import shared_task
 
 
@@ -25,3 +25,43 @@ def send_mail_task(subject, body, formatted_email_from, to, reply_to):
 
 def send_mail_async(*args):
     return send_mail_task.apply_async(args)
+
+
+def send_mails(mails, formatted_email_from, reply_to):
+    """
+    Sends mails, a list of (subject, body, email) triples, over one
+    connection.
+    """
+    messages = []
+
+    for subject, body, email in mails:
+        msg = EmailMultiAlternatives(
+            subject,
+            body,
+            formatted_email_from,
+            [email],
+            reply_to=reply_to
+        )
+        msg.attach_alternative(body, "text/html")
+        messages.append(msg)
+
+    return get_connection().send_messages(messages)
+
+
+def send_personalized_mail(subject, body, formatted_email_from, recipients,
+                           reply_to):
+    """
+    Sends the body to each of recipients, a list of (email, replacements)
+    pairs, with the replacements dict applied to the body, over one
+    connection.
+    """
+    mails = []
+
+    for email, replacements in recipients:
+        text = body
+        for key, value in replacements.items():
+            text = text.replace(key, value)
+
+        mails.append((subject, text, email))
+
+    return send_mails(mails, formatted_email_from, reply_to)
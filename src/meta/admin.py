@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from meta.models import Type, Schema, Instance
+from meta.models import Type, Schema, Instance, IngestJob, IngestPart
 from meta.forms import TypeForm, SchemaForm, InstanceForm
 
 
@@ -16,3 +16,16 @@ class SchemaAdmin(admin.ModelAdmin):
 class InstanceModelAdmin(admin.ModelAdmin):
     form = InstanceForm
 
+
+
+class IngestPartInline(admin.TabularInline):
+    model = IngestPart
+    fields = ('start', 'end', 'offset', 'updated_date')
+    readonly_fields = fields
+    extra = 0
+
+
+@admin.register(IngestJob)
+class IngestJobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'owner', 'status', 'lines', 'loaded', 'failed', 'updated_date')
+    inlines = (IngestPartInline,)
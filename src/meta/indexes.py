@@ -0,0 +1,62 @@
+"""
+Partial GIN (jsonb_path_ops) indexes of Instance.info and Instance.data,
+one per field of a hot schema, for the containment filters of the API
+(e.g., /instances/?schema=1&info__Q82799=Max, see JSONContainsFilter).
+
+They are built concurrently, without locking the table for writes, by
+manage.py index_instances.
+"""
+import re
+
+from django.db import connection
+
+
+FIELDS = ('info', 'data')
+
+NAME_RE = re.compile(r'^instance_(?P<field>info|data)_(?P<schema_id>\d+)_idx$')
+
+
+def index_name(schema_id, field):
+    return 'instance_{}_{}_idx'.format(field, int(schema_id))
+
+
+def indexes():
+    """
+    {(schema_id, field): valid} of the indexes, where an index is not
+    valid, if building it failed.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, i.indisvalid FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE i.indrelid = 'meta_instance'::regclass")
+        rows = cursor.fetchall()
+
+    result = {}
+    for name, valid in rows:
+        match = NAME_RE.match(name)
+        if match:
+            result[int(match.group('schema_id')), match.group('field')] = valid
+    return result
+
+
+def drop_index(schema_id, field):
+    with connection.cursor() as cursor:
+        cursor.execute('DROP INDEX CONCURRENTLY IF EXISTS {}'.format(
+            index_name(schema_id, field)))
+
+
+def create_index(schema_id, field):
+    """
+    Builds the index, unless it exists, out of a transaction.
+    """
+    assert field in FIELDS
+
+    if indexes().get((int(schema_id), field)) is False:
+        drop_index(schema_id, field)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS {} ON meta_instance '
+            'USING gin ({} jsonb_path_ops) WHERE schema_id = {}'.format(
+                index_name(schema_id, field), field, int(schema_id)))
@@ -0,0 +1,29 @@
+from django.core.management import BaseCommand
+
+from meta.indexes import FIELDS, create_index, drop_index, indexes
+
+
+class Command(BaseCommand):
+    help = 'build (or drop) the GIN indexes of the JSON fields of the instances of hot schemas, or list them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('schemas', nargs='*', type=int, help='pks of the schemas, none to only list the indexes')
+        parser.add_argument('--field', action='append', choices=FIELDS, help='info (default), or data')
+        parser.add_argument('--drop', action='store_true')
+
+    def handle(self, *args, **options):
+        fields = options['field'] or ['info']
+
+        for schema_id in options['schemas']:
+            for field in fields:
+                if options['drop']:
+                    drop_index(schema_id, field)
+                else:
+                    create_index(schema_id, field)
+                print('{} {}: {}'.format(
+                    field, schema_id, 'dropped' if options['drop'] else 'built'))
+
+        for (schema_id, field), valid in sorted(indexes().items()):
+            print('{} {}{}'.format(field, schema_id, '' if valid else ' (invalid)'))
+
+        print('Done.')
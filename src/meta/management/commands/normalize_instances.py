@@ -0,0 +1,34 @@
+from django.core.management import BaseCommand
+
+from meta.models import Schema
+from meta.normalization import normalize
+from meta.tasks import normalize_schemas_async
+
+
+class Command(BaseCommand):
+    help = 'normalize Instance.data into Instance.info, by the specification of the schema of the instances'
+
+    def add_arguments(self, parser):
+        parser.add_argument('schemas', nargs='*', type=int, help='pks of the schemas, all if none')
+        parser.add_argument('--all', action='store_true', help='all instances, not only the ones whose data or schema version changed')
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--workers', type=int, default=None)
+        parser.add_argument('--async', action='store_true', help='queue the chunks for the Celery workers')
+
+    def handle(self, *args, **options):
+        schemas = Schema.objects.order_by('pk')
+        if options['schemas']:
+            schemas = schemas.filter(pk__in=options['schemas'])
+
+        for schema in schemas:
+            if options['async']:
+                normalize_schemas_async(schema.pk, options['all'])
+                print('{}: queued'.format(schema))
+                continue
+
+            normalized, failed = normalize(
+                schema, force=options['all'],
+                chunk_size=options['batch_size'], workers=options['workers'])
+            print('{}: {} normalized, {} failed'.format(schema, normalized, failed))
+
+        print('Done.')
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.15 on 2018-09-15 10:12
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meta', '0011_auto_20180217_1033'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='instance',
+            index=models.Index(fields=['created_date', 'id'], name='instance_created_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.15 on 2018-09-16 17:20
+from __future__ import unicode_literals
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meta', '0013_translations'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='type',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['languages'], name='type_languages_idx'),
+        ),
+    ]
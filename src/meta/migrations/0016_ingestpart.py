@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.15 on 2018-09-19 09:40
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meta', '0015_ingestjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingestjob',
+            name='path',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='ingestjob',
+            name='processed',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='ingestjob',
+            name='size',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='ingestjob',
+            name='started_date',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='IngestPart',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+                ('updated_date', models.DateTimeField(auto_now=True)),
+                ('start', models.BigIntegerField()),
+                ('end', models.BigIntegerField()),
+                ('offset', models.BigIntegerField()),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='parts', to='meta.IngestJob')),
+            ],
+            options={
+                'verbose_name': 'Ingest Part',
+                'verbose_name_plural': 'Ingest Parts',
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.15 on 2018-09-27 14:20
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meta', '0017_instance_info_hash'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ingestjob',
+            name='status',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Pending'), (4, 'Preparing'), (1, 'Running'), (2, 'Done'), (3, 'Failed')], default=0),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 
 from django.contrib.postgres.fields import JSONField
+from django.contrib.postgres.indexes import GinIndex
+from django.utils.timezone import now
 from django.utils.translation import ugettext_lazy as _
 
 from generic.models import GenericTranslationModel, GenericModel
@@ -69,6 +71,8 @@ class Type(GenericTranslationModel):
     source = models.TextField(null=True, blank=True)
     data = JSONField(null=True, blank=True)
 
+    count_languages = True
+
     def __str__(self):
         return '[{}] {}'.format(self.pk, self.name)
 
@@ -79,6 +83,9 @@ class Type(GenericTranslationModel):
         )
         verbose_name = _("Type")
         verbose_name_plural = _("Types")
+        indexes = [
+            GinIndex(fields=['languages'], name='type_languages_idx'),
+        ]
 
 
 class Schema(GenericModel):
@@ -149,6 +156,8 @@ class Instance(GenericTranslationModel):
     schema = models.ForeignKey(Schema, null=True, blank=True)
     data = JSONField(default={}, null=True, blank=True) # Raw data
     info = JSONField(default={}, null=True, blank=True) # Normalized data
+    # md5(schema.version || data) as of info, see meta/normalization.py
+    info_hash = models.CharField(max_length=32, null=True, blank=True, editable=False)
 
     owner = models.ForeignKey(User, blank=True, null=True)
 
@@ -161,3 +170,100 @@ class Instance(GenericTranslationModel):
         )
         verbose_name = _("Instance")
         verbose_name_plural = _("Instances")
+        indexes = [
+            models.Index(fields=['created_date', 'id'], name='instance_created_idx'),
+        ]
+
+
+class IngestJob(GenericModel):
+    """
+    A bulk upload of instances, stored at path, and loaded in the
+    background by its parts, byte ranges of the decompressed file, that
+    checkpoint their offsets with each chunk of lines they save, so that
+    the parts of crashed workers resume where they stopped (see
+    meta/tasks.py, and api/v1/meta/ingest.py).
+    """
+    PENDING = 0
+    RUNNING = 1
+    DONE = 2
+    FAILED = 3
+    PREPARING = 4
+
+    STATUSES = [
+        (PENDING, _('Pending')),
+        (PREPARING, _('Preparing')),
+        (RUNNING, _('Running')),
+        (DONE, _('Done')),
+        (FAILED, _('Failed')),
+    ]
+
+    owner = models.ForeignKey(User, related_name='ingest_jobs')
+    status = models.PositiveSmallIntegerField(choices=STATUSES, default=PENDING)
+
+    path = models.TextField(blank=True)
+    size = models.BigIntegerField(default=0)  # of the decompressed file
+    processed = models.BigIntegerField(default=0)  # bytes
+
+    lines = models.PositiveIntegerField(default=0)
+    loaded = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    chunks = models.PositiveIntegerField(default=0)
+
+    # [{"offset": 1024, "errors": {...}}, ...], up to INGEST_MAX_ERRORS,
+    # where offset is the byte offset of the line in the decompressed file.
+    errors = JSONField(default=list, blank=True)
+    started_date = models.DateTimeField(null=True, blank=True)
+    finished_date = models.DateTimeField(null=True, blank=True)
+
+    def elapsed(self):
+        if not self.started_date:
+            return 0.
+        end = self.finished_date or now()
+        return max((end - self.started_date).total_seconds(), 0.)
+
+    def rows_per_second(self):
+        elapsed = self.elapsed()
+        return self.lines / elapsed if elapsed else 0.
+
+    def eta(self):
+        """
+        Seconds left, at the rate of the bytes processed so far.
+        """
+        elapsed = self.elapsed()
+        if self.status != self.RUNNING or not self.processed or not elapsed:
+            return None
+        return (self.size - self.processed) * elapsed / self.processed
+
+    def __str__(self):
+        return 'Ingest job {} [{}]: {} loaded, {} failed'.format(
+            self.pk, dict(self.STATUSES).get(self.status),
+            self.loaded, self.failed)
+
+    class Meta:
+        verbose_name = _("Ingest Job")
+        verbose_name_plural = _("Ingest Jobs")
+
+
+class IngestPart(GenericModel):
+    """
+    Lines from start to end (byte offsets, at line boundaries) of the
+    file of a job, loaded up to offset, and the attempts to load it since
+    it last moved.
+    """
+    job = models.ForeignKey(IngestJob, related_name='parts')
+    start = models.BigIntegerField()
+    end = models.BigIntegerField()
+    offset = models.BigIntegerField()
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    def is_done(self):
+        return self.offset >= self.end
+
+    def __str__(self):
+        return 'Part {} of ingest job {}: {}/{}'.format(
+            self.pk, self.job_id, self.offset - self.start,
+            self.end - self.start)
+
+    class Meta:
+        verbose_name = _("Ingest Part")
+        verbose_name_plural = _("Ingest Parts")
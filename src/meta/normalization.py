@@ -0,0 +1,152 @@
+"""
+Normalization of Instance.data into Instance.info, by the specification
+of the schema of the instances (see meta.utils.standardize), a chunk of
+NORMALIZE_CHUNK_SIZE instances at a time:
+
+- normalize() reads the chunks in pk order, normalizes them in a pool of
+  processes, and writes them back, for the normalize_instances command;
+- normalize_range() normalizes a chunk in place, for the tasks of
+  meta/tasks.py, where the Celery workers are the pool.
+
+Instance.info_hash is md5(schema.version || data) of the data normalized,
+so that running it again only normalizes the instances whose data or
+version of the schema changed since.
+"""
+import json
+import logging
+import multiprocessing
+import os
+from collections import deque
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+from django.db.models.expressions import RawSQL
+
+from meta.models import Instance
+from meta.utils import normalize_rows
+
+
+logger = logging.getLogger(__name__)
+
+HASH_SQL = 'md5(%s || "meta_instance"."data"::text)'
+
+
+def instances(schema, force=False):
+    """
+    Instances of the schema, with their data_hash, that are not normalized
+    as of their data and the version of the schema, or all, if forced.
+    """
+    queryset = Instance.objects.filter(
+        schema=schema, data__isnull=False
+    ).annotate(
+        data_hash=RawSQL(HASH_SQL, (schema.version,))
+    )
+    if not force:
+        queryset = queryset.exclude(info_hash=F('data_hash'))
+    return queryset.order_by('pk')
+
+
+def chunks(queryset, size):
+    """
+    Lists of (pk, data, data_hash) of up to size instances of the queryset.
+    """
+    last = 0
+    while True:
+        rows = list(queryset.filter(pk__gt=last).values_list(
+            'pk', 'data', 'data_hash')[:size])
+        if not rows:
+            return
+        yield rows
+        last = rows[-1][0]
+
+
+def ranges(queryset, size):
+    """
+    (first, last) pks of chunks of up to size instances of the queryset.
+    """
+    pks = queryset.values_list('pk', flat=True)
+    last = 0
+    while True:
+        chunk = list(pks.filter(pk__gt=last)[:size])
+        if not chunk:
+            return
+        yield chunk[0], chunk[-1]
+        last = chunk[-1]
+
+
+def write(rows):
+    """
+    Updates info and info_hash of [(pk, info, data_hash)], in one query,
+    without save(), so updated_date stays the one of the data.
+    """
+    if not rows:
+        return
+
+    params = []
+    for pk, info, data_hash in rows:
+        params.extend((pk, json.dumps(info), data_hash))
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'UPDATE meta_instance SET info = v.info, info_hash = v.hash '
+            'FROM (VALUES {}) AS v (id, info, hash) '
+            'WHERE meta_instance.id = v.id'.format(
+                ', '.join(['(%s, %s::jsonb, %s)'] * len(rows))),
+            params)
+
+
+def report(schema, failed):
+    if failed:
+        logger.warning(
+            'Normalization of %s failed for instances %s.', schema, failed)
+
+
+def normalize_range(schema, first, last, force=False):
+    """
+    Normalizes the instances of the schema from first to last pk.
+    Returns the number of instances normalized, and of failed.
+    """
+    rows = list(instances(schema, force).filter(
+        pk__gte=first, pk__lte=last).values_list('pk', 'data', 'data_hash'))
+
+    normalized, failed = normalize_rows(schema.specification, rows)
+    write(normalized)
+    report(schema, failed)
+    return len(normalized), len(failed)
+
+
+def normalize(schema, force=False, chunk_size=None, workers=None):
+    """
+    Normalizes the instances of the schema, in a pool of workers processes,
+    with up to two chunks per process in memory.
+    Returns the number of instances normalized, and of failed.
+    """
+    chunk_size = chunk_size or settings.NORMALIZE_CHUNK_SIZE
+    workers = workers or settings.NORMALIZE_WORKERS or os.cpu_count() or 1
+    counts = [0, 0]
+
+    def done(result):
+        normalized, failed = result.get()
+        write(normalized)
+        report(schema, failed)
+        counts[0] += len(normalized)
+        counts[1] += len(failed)
+
+    # Spawned, rather than forked with the connection to the database,
+    # the processes only import meta.utils.
+    pool = multiprocessing.get_context('spawn').Pool(workers)
+    try:
+        pending = deque()
+        for rows in chunks(instances(schema, force), chunk_size):
+            pending.append(pool.apply_async(
+                normalize_rows, (schema.specification, rows)))
+            if len(pending) >= 2 * workers:
+                done(pending.popleft())
+
+        while pending:
+            done(pending.popleft())
+    finally:
+        pool.terminate()
+
+    return tuple(counts)
@@ -0,0 +1,86 @@
+import datetime
+
+from celery import shared_task
+from django.conf import settings
+from django.db.models import F
+from django.utils.timezone import now
+
+from meta.models import IngestJob, IngestPart, Schema
+from meta.normalization import instances, normalize_range, ranges
+
+
+# Redelivered, if the worker dies, see the checkpoints in api/v1/meta/ingest.py.
+
+@shared_task(acks_late=True, reject_on_worker_lost=True)
+def prepare_ingest_task(job_id):
+    from api.v1.meta.ingest import prepare
+
+    job = prepare(job_id)
+
+    for part_id in job.parts.filter(offset__lt=F('end')).values_list(
+            'pk', flat=True):
+        load_ingest_part_async(part_id)
+
+
+def prepare_ingest_async(*args):
+    return prepare_ingest_task.apply_async(args)
+
+
+@shared_task(acks_late=True, reject_on_worker_lost=True)
+def load_ingest_part_task(part_id):
+    from api.v1.meta.ingest import load_part
+
+    load_part(part_id)
+
+
+def load_ingest_part_async(*args):
+    return load_ingest_part_task.apply_async(args)
+
+
+@shared_task
+def resume_ingest_jobs_task():
+    """
+    Queues again the jobs and parts of lost tasks, not updated for
+    INGEST_STALE_AFTER seconds.
+    """
+    stale = now() - datetime.timedelta(seconds=settings.INGEST_STALE_AFTER)
+
+    for job_id in IngestJob.objects.filter(
+            status__in=[IngestJob.PENDING, IngestJob.PREPARING],
+            updated_date__lt=stale).exclude(
+                path='').values_list('pk', flat=True):
+        prepare_ingest_async(job_id)
+
+    for part_id in IngestPart.objects.filter(
+            job__status=IngestJob.RUNNING, offset__lt=F('end'),
+            updated_date__lt=stale).values_list('pk', flat=True):
+        load_ingest_part_async(part_id)
+
+
+@shared_task
+def normalize_schemas_task(schema_id=None, force=False):
+    """
+    Queues a normalize_instances_task per chunk of the instances of the
+    schema, or of every schema, whose info is not up to date.
+    """
+    schemas = Schema.objects.order_by('pk')
+    if schema_id is not None:
+        schemas = schemas.filter(pk=schema_id)
+
+    for schema in schemas:
+        for first, last in ranges(
+                instances(schema, force), settings.NORMALIZE_CHUNK_SIZE):
+            normalize_instances_async(schema.pk, first, last, force)
+
+
+def normalize_schemas_async(*args):
+    return normalize_schemas_task.apply_async(args)
+
+
+@shared_task(acks_late=True, reject_on_worker_lost=True)
+def normalize_instances_task(schema_id, first, last, force=False):
+    normalize_range(Schema.objects.get(pk=schema_id), first, last, force)
+
+
+def normalize_instances_async(*args):
+    return normalize_instances_task.apply_async(args)
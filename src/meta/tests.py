@@ -1,3 +1,103 @@
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 
-# Create your tests here.
+from meta.models import Instance, Schema
+from meta.normalization import instances, normalize_range, ranges
+from meta.utils import (
+    compile_schema, converter, normalize, normalize_data, normalize_rows,
+    standardize
+)
+
+
+METADATA = [{
+    '': [['obj'], ['https://www.wikidata.org/wiki/Q7565']],
+    'address': {
+        '': [['obj'], ['https://www.wikidata.org/wiki/Q319608']],
+        'number': {'': [['int', 'lambda _: int(_)'],
+                        ['https://www.wikidata.org/wiki/Q1413235']]},
+        'street': {'': [['str'], ['https://www.wikidata.org/wiki/Q24574749']]}},
+    'children': [{
+        '': [['obj'], ['https://www.wikidata.org/wiki/Q7569']],
+        'age': {'': [['int', 'lambda _: float(_)'],
+                     ['https://www.wikidata.org/wiki/Q185836']]},
+        'name': {'': [['str'], ['https://www.wikidata.org/wiki/Q82799']]}}],
+    'name': {'': [['str'], ['https://www.wikidata.org/wiki/Q82799']]}}]
+
+
+class StandardizeTestCase(SimpleTestCase):
+
+    def test_standardize(self):
+        data = [{
+            'address': {'number': '14', 'street': 'Leonardo str.'},
+            'children': [{'age': '1.0', 'name': 'Mike'},
+                         {'age': 15, 'name': 'Tom'}],
+            'name': 'Max',
+            'unknown': {'number': '1'},
+        }]
+
+        self.assertEqual(standardize(data, METADATA), [{
+            'Q319608': {'Q1413235': 14, 'Q24574749': 'Leonardo str.'},
+            'Q7569': [{'Q185836': 1, 'Q82799': 'Mike'},
+                      {'Q185836': 15, 'Q82799': 'Tom'}],
+            'Q82799': 'Max',
+            'unknown': {'number': '1'},
+        }])
+        self.assertEqual(normalize(METADATA + data), standardize(data, METADATA))
+
+    def test_converter(self):
+        self.assertEqual(converter(['int', 'lambda _: _.replace(",", "")'])('1,234'), 1234)
+        # Types that are not Python types are kept as they are.
+        self.assertEqual(converter(['obj', 'lambda _: _.strip()'])(' a '), 'a')
+        self.assertIsNone(converter(['obj']))
+
+    def test_cached(self):
+        self.assertIs(compile_schema(METADATA), compile_schema(list(METADATA)))
+
+
+class NormalizeTestCase(TestCase):
+
+    def setUp(self):
+        self.schema = Schema.objects.create(
+            name='people', version='1', specification=METADATA)
+
+    def create(self, **data):
+        return Instance.objects.create(schema=self.schema, data=data)
+
+    def normalize(self):
+        counts = [0, 0]
+        for first, last in ranges(instances(self.schema), 2):
+            normalized, failed = normalize_range(self.schema, first, last)
+            counts = [counts[0] + normalized, counts[1] + failed]
+        return counts
+
+    def test_normalize_data(self):
+        self.assertEqual(normalize_data({'name': 'Max'}, METADATA), {'Q82799': 'Max'})
+        self.assertEqual(normalize_data([{'name': 'Max'}], METADATA), [{'Q82799': 'Max'}])
+
+        normalized, failed = normalize_rows(
+            METADATA, [(1, {'address': {'number': 'x'}}, ''), (2, {'name': 1}, '')])
+        self.assertEqual(normalized, [(2, {'Q82799': '1'}, '')])
+        self.assertEqual(failed, [1])
+
+    def test_incremental(self):
+        max_ = self.create(name='Max', address={'number': '14'})
+        lin = self.create(name='Lin')
+        self.create(address={'number': 'not a number'})
+        updated_date = Instance.objects.get(pk=max_.pk).updated_date
+
+        self.assertEqual(self.normalize(), [2, 1])
+        max_.refresh_from_db()
+        self.assertEqual(max_.info, {'Q82799': 'Max', 'Q319608': {'Q1413235': 14}})
+        self.assertEqual(max_.updated_date, updated_date)
+
+        # Only the failed instance is left.
+        self.assertEqual(self.normalize(), [0, 1])
+
+        lin.data = {'name': 'Lin', 'children': [{'name': 'Sonnie'}]}
+        lin.save()
+        self.assertEqual(self.normalize(), [1, 1])
+        lin.refresh_from_db()
+        self.assertEqual(lin.info['Q7569'], [{'Q82799': 'Sonnie'}])
+
+        self.schema.version = '2'
+        self.schema.save()
+        self.assertEqual(self.normalize(), [2, 1])
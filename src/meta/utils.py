@@ -1,75 +1,135 @@
-from boltons.iterutils import remap
-from functools import reduce
-import operator
+from functools import lru_cache
+import json
 
-def dictget(d, mapList):
-    '''
-    Given:
-    >>> d = {'a': [{'b': 'c'}, {'e': 'f'}, {'g': 'h'}]}
 
-    Returns:
-    >>> dictget(d, ['a', 2, 'b'])
-    >>> 'c'
+class Plan(object):
     '''
-    return reduce(operator.getitem, mapList, d)
-
-def metapath(path):
+    Compiled metadata of a node of the data: the key to rename it to, the
+    converter of its value, if it is not a container, and the plans of its
+    fields (dict metadata) or of its items (list metadata).
     '''
-    Given:
-    >>> p = [1, 'a', 2, 'b', 3]
-
-    Returns:
-    >>> metapath(p)
-    >>> [0, 'a', 0, 'b', 0]
+    __slots__ = ('key', 'convert', 'fields', 'item')
+
+    def __init__(self, key=None, convert=None, fields=None, item=None):
+        self.key = key
+        self.convert = convert
+        self.fields = fields
+        self.item = item
+
+    def visit(self, key, value):
+        if isinstance(value, (dict, list, tuple)):
+            value = self.apply(value)
+            if not isinstance(key, str):
+                return key, value
+        elif self.convert is not None:
+            value = self.convert(value)
+
+        return self.key or key, value
+
+    def apply(self, value):
+        '''
+        The container, with its children standardized.
+        '''
+        if isinstance(value, dict):
+            fields = self.fields or {}
+            result = {}
+            for key, item in value.items():
+                plan = fields.get(key)
+                if plan is not None:
+                    key, item = plan.visit(key, item)
+                result[key] = item
+            return result
+
+        if self.item is None:
+            return value
+        return type(value)(
+            self.item.visit(index, item)[1] for index, item in enumerate(value))
+
+
+def converter(schema):
     '''
-    metapath = []
-    for item in path:
-        if isinstance(item, int):
-            metapath.append(0)
-        else:
-            metapath.append(item)
-    return metapath
+    The conversion of the [type, lambda] schema of a value, with the type
+    and the lambda evaluated once, for all the values.
 
-
-def convert(key, value, meta):
-    '''
     Given:
-    >>> key = 'something'
-    >>> value = '1,234'
-    >>> meta = {'': [('int', lambda _: _.replace(',')), ['https://www.wikidata.org/wiki/Q82799']]}
+    >>> schema = ['int', 'lambda _: _.replace(",", "")']
 
     Returns:
-    >>> key = 'Q82799'
-    >>> value = 1234
+    >>> converter(schema)('1,234')
+    >>> 1234
+    '''
+    if not schema:
+        return None
+
+    function = eval(schema[1]) if len(schema) > 1 else None
+    try:
+        cast = eval(schema[0])
+    except Exception:
+        cast = None
+    if not callable(cast):
+        cast = None
+
+    if function is None and cast is None:
+        return None
+
+    def convert(value):
+        if function is not None:
+            value = function(value)
+        if cast is not None:
+            try:
+                value = cast(value)
+            except Exception:
+                pass
+        return value
+
+    return convert
+
+
+def compile_node(meta):
+    '''
+    Plan of a node of the metadata, with its own [schema, types] under ''.
     '''
+    if isinstance(meta, list):
+        item = compile_node(meta[0]) if meta else None
+        own = meta[0].get('') if meta and isinstance(meta[0], dict) else None
+        key, _ = compile_own(own)
+        return Plan(key=key, item=item)
 
-    schema, types = list(meta.keys()) + list(meta.values())
+    if not isinstance(meta, dict):
+        return Plan()
 
+    key, convert = compile_own(meta.get(''))
+    return Plan(key=key, convert=convert, fields={
+        name: compile_node(value) for name, value in meta.items() if name != ''})
 
-    if schema:
 
-        for index, operation in enumerate(schema):
-            if index == 0:
-                continue
-            elif index == 1:
-                value = eval(operation)(value)
+def compile_own(own):
+    try:
+        schema, types = own
+    except (TypeError, ValueError):
+        return None, None
+
+    key = types[0].rsplit('/', 1)[-1] if types else None
+    return key, converter(schema)
 
-        try:
-            value = eval(schema[0])(value)
-        except:
-            pass
 
-    if types:
+@lru_cache(maxsize=128)
+def compile_json(specification):
+    return compile_node(json.loads(specification))
 
-        for index, typeurl in enumerate(types):
-            if index == 0:
-                key = typeurl.rsplit('/',1)[-1]
 
-    return key, value
+def compile_schema(specification):
+    '''
+    Plan of the metadata, like Schema.specification, compiled once and
+    cached by its JSON.
+    '''
+    return compile_json(json.dumps(specification))
+
 
 def standardize(data, metadata, if_schema_value_type=tuple):
     '''
-    Combine data with schema and types in metadata by zipping tree.
+    Combine data with schema and types in metadata by zipping tree, with
+    the Plan of the metadata, so nothing is looked up or evaluated per value.
 
     Given:
     >>> data = [{'address': {'number': 14, 'street': 'Leonardo str.'},
@@ -106,44 +166,37 @@ def standardize(data, metadata, if_schema_value_type=tuple):
   'Q82799': 'Dim'}]
     '''
 
-    def visit(path, key, value):
-        try:
-            meta = dictget(metadata, metapath(path))[key if not isinstance(key, int) else 0]
-        except:
-            return key, value
-
-        if not any([isinstance(value, t) for t in [dict, list, tuple]]):
-
-            k, v = list(meta.values())[0]
-            metamap = {tuple(k): v}
+    return compile_schema(metadata).apply(data)
 
-            return convert(key, value, metamap)
-        else:
-            if isinstance(key, str):
-                try:
-                    k, v = list(meta)[0]['']
-                except:
-                    try:
-                        k, v = meta['']
-                    except:
-                        pass
 
-                try:
-                    metamap = {tuple(k): v}
-
-                    key, _ = convert(key, value, metamap)
-                except:
-                    pass
+def normalize(data):
+    return standardize(data[1:], metadata=data[0:1])
 
-                return key, value
 
-            return key, value
+def normalize_data(data, specification):
+    '''
+    Instance.info of Instance.data, a record or a list of records,
+    standardized with Schema.specification.
+    '''
+    if isinstance(data, list):
+        return standardize(data, specification)
+    return standardize([data], specification)[0]
 
 
-    remapped = remap(data, visit=visit)
-    return remapped
+def normalize_rows(specification, rows):
+    '''
+    Given [(pk, data, data_hash)], returns [(pk, info, data_hash)] of the
+    rows normalized, and the [pk] of the rows that failed.
 
+    Runs in the pool of meta/normalization.py, without the database.
+    '''
+    normalized, failed = [], []
 
-def normalize(data):
-    return standardize(data[1:], metadata=data[0:1])
+    for pk, data, data_hash in rows:
+        try:
+            normalized.append(
+                (pk, normalize_data(data, specification), data_hash))
+        except Exception:
+            failed.append(pk)
 
+    return normalized, failed
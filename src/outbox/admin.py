@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from outbox.models import OutboxEvent
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'aggregate', 'handler', 'created_date',
+                    'sent_date', 'attempts', 'next_attempt_date',
+                    'parked_date')
+    list_filter = ('kind',)
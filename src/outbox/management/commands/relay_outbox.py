@@ -0,0 +1,48 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.utils.timezone import now
+
+from outbox.models import OutboxEvent
+from outbox.relay import relay_batch, relay_lock, unpark
+
+
+class Command(BaseCommand):
+    help = 'deliver outbox events to Celery, Channels and SNS'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true', dest='once', default=False,
+            help='deliver the pending events, and exit')
+        parser.add_argument(
+            '--unpark', action='store_true', dest='unpark', default=False,
+            help='queue the parked events again, before delivering')
+        parser.add_argument(
+            '--batch-size', type=int, dest='batch_size',
+            default=settings.OUTBOX_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+
+        if options['unpark']:
+            print('Unparked {}.'.format(unpark()))
+
+        with relay_lock():
+            while True:
+                delivered, failed = relay_batch(options['batch_size'])
+
+                if delivered + failed:
+                    print('Delivered {}, failed {}.'.format(delivered, failed))
+
+                if delivered < options['batch_size']:
+                    if options['once']:
+                        break
+
+                    OutboxEvent.objects.filter(
+                        sent_date__lt=now() - timedelta(
+                            days=settings.OUTBOX_RETENTION_DAYS)).delete()
+
+                    time.sleep(settings.OUTBOX_POLL_INTERVAL)
+
+        print('Done.')
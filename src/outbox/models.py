@@ -0,0 +1,53 @@
+from django.db import models
+from django.contrib.postgres.fields import JSONField
+from django.utils.translation import ugettext_lazy as _
+
+from generic.models import GenericModel
+
+
+class OutboxEvent(GenericModel):
+    """
+    A side effect (e-mail, websocket broadcast, sync, SNS) of a database
+    change, saved in the same transaction as the change, and delivered by
+    the relay (manage.py relay_outbox) after the transaction commits.
+
+    A change is published as one event per handler of its kind, so that
+    the handlers fail, and are retried, on their own.
+
+    Events of the same aggregate (e.g., 'comment:12') and handler are
+    delivered in the order they were published, at least once. A failed
+    event is retried after a backoff, and after OUTBOX_MAX_ATTEMPTS
+    attempts, it is parked, and the later events are delivered without it.
+    """
+    kind = models.CharField(max_length=64)
+    aggregate = models.CharField(max_length=128)
+    handler = models.CharField(max_length=255)
+    payload = JSONField(default=dict)
+
+    sent_date = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+    next_attempt_date = models.DateTimeField(null=True, blank=True)
+    parked_date = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return "{} of {} for {}".format(self.kind, self.aggregate, self.handler)
+
+    @classmethod
+    def publish(cls, kind, aggregate, **payload):
+        from outbox.relay import HANDLERS, handler_name
+
+        return cls.objects.bulk_create(
+            cls(kind=kind, aggregate=aggregate, handler=handler_name(handler),
+                payload=payload)
+            for handler in HANDLERS.get(kind, []))
+
+    class Meta:
+        verbose_name = _("Outbox Event")
+        verbose_name_plural = _("Outbox Events")
+        ordering = ('pk',)
+        indexes = [
+            models.Index(fields=['sent_date', 'id'], name='outbox_pending_idx'),
+            models.Index(fields=['aggregate', 'handler', 'id'],
+                         name='outbox_aggregate_idx'),
+        ]
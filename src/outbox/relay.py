@@ -0,0 +1,181 @@
+import logging
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils.timezone import now
+
+from outbox.models import OutboxEvent
+
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+FLUSHES = []
+
+# Key of the PostgreSQL advisory lock, held by the active relay.
+RELAY_LOCK_KEY = 7310001
+
+
+def handles(kind):
+    """
+    Registers the decorated function to be called with the payload of
+    every event of the kind, e.g.:
+
+    >>> @handles('comment.saved')
+    ... def broadcast(id, created):
+    ...     pass
+    """
+    def register(func):
+        HANDLERS.setdefault(kind, []).append(func)
+        return func
+    return register
+
+
+def flushes(func):
+    """
+    Registers the decorated function to be called after the handlers of
+    each batch, before its events are marked sent, to send what they
+    buffered (e.g., the websocket.dispatcher queues).
+    """
+    FLUSHES.append(func)
+    return func
+
+
+def handler_name(func):
+    return '{}.{}'.format(func.__module__, func.__qualname__)
+
+
+def get_handler(event):
+    for handler in HANDLERS.get(event.kind, []):
+        if handler_name(handler) == event.handler:
+            return handler
+    raise LookupError('No handler {} of {}'.format(event.handler, event.kind))
+
+
+def retry_delay(attempts):
+    """
+    Seconds until the next attempt, after the given number of attempts.
+    """
+    return min(settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1),
+               settings.OUTBOX_MAX_RETRY_DELAY)
+
+
+def pending_events():
+    """
+    The events to deliver now: not sent, not parked, due, and not behind
+    an event of their aggregate and handler waiting for its next attempt.
+    """
+    waiting = OutboxEvent.objects.filter(
+        aggregate=OuterRef('aggregate'),
+        handler=OuterRef('handler'),
+        pk__lt=OuterRef('pk'),
+        sent_date__isnull=True,
+        parked_date__isnull=True,
+        next_attempt_date__gt=now())
+
+    return OutboxEvent.objects.filter(
+        Q(next_attempt_date__isnull=True) | Q(next_attempt_date__lte=now()),
+        sent_date__isnull=True,
+        parked_date__isnull=True,
+    ).annotate(
+        waiting=Exists(waiting)
+    ).filter(waiting=False)
+
+
+def relay_batch(batch_size):
+    """
+    Delivers up to batch_size pending events, oldest first, and returns
+    (delivered, failed) counts of events.
+
+    When an event fails, it is retried after retry_delay(), and the later
+    events of its aggregate and handler wait for it, to keep their order.
+    After it failed OUTBOX_MAX_ATTEMPTS times, it is parked instead, and
+    they go on.
+    """
+    events = pending_events().order_by('pk')[:batch_size]
+
+    delivered = []
+    failed = 0
+    blocked = set()
+
+    for event in events:
+        key = (event.aggregate, event.handler)
+        if key in blocked:
+            continue
+
+        try:
+            get_handler(event)(**event.payload)
+
+        except Exception as exc:
+            failed += 1
+            logger.exception('Delivering %s failed', event)
+            if not retry_later(event, exc):
+                blocked.add(key)
+
+        else:
+            delivered.append(event)
+
+    try:
+        for flush in FLUSHES:
+            flush()
+
+    except Exception as exc:
+        logger.exception('Flushing %s events failed', len(delivered))
+        for event in delivered:
+            retry_later(event, exc)
+        return 0, failed + len(delivered)
+
+    OutboxEvent.objects.filter(pk__in=[event.pk for event in delivered]).update(
+        sent_date=now(), attempts=F('attempts') + 1)
+
+    return len(delivered), failed
+
+
+def retry_later(event, exc):
+    """
+    Counts the failed attempt of the event, and schedules the next one,
+    or parks it, after OUTBOX_MAX_ATTEMPTS. Returns whether it's parked.
+    """
+    attempts = event.attempts + 1
+
+    if attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        logger.error('Parked %s after %s attempts', event, attempts)
+        parked_date, next_attempt_date = now(), None
+    else:
+        parked_date = None
+        next_attempt_date = now() + timedelta(seconds=retry_delay(attempts))
+
+    OutboxEvent.objects.filter(pk=event.pk).update(
+        attempts=F('attempts') + 1, last_error=repr(exc),
+        next_attempt_date=next_attempt_date, parked_date=parked_date)
+
+    return parked_date is not None
+
+
+def unpark(**filters):
+    """
+    Puts the parked events (of the filters) back in the queue, with their
+    attempts reset, and returns how many.
+    """
+    return OutboxEvent.objects.filter(
+        parked_date__isnull=False, **filters
+    ).update(parked_date=None, next_attempt_date=None, attempts=0)
+
+
+@contextmanager
+def relay_lock():
+    """
+    Waits until no other relay is running, so that one relay at a time
+    delivers events, in order.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_lock(%s)', [RELAY_LOCK_KEY])
+
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_unlock(%s)', [RELAY_LOCK_KEY])
@@ -0,0 +1,146 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import override_settings
+from django.utils.timezone import now
+from test_plus.test import TestCase
+
+from core.models import Topic, Comment
+from outbox.models import OutboxEvent
+from outbox.relay import HANDLERS, relay_batch, unpark
+
+
+class TestOutbox(TestCase):
+
+    def setUp(self):
+        self.thinker = self.make_user('thinker')
+        self.calls = []
+
+        for patcher in (mock.patch.dict(HANDLERS, clear=True),
+                        mock.patch('outbox.relay.FLUSHES', [])):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def record(self, id, created, fields=None):
+        self.calls.append((id, created))
+
+    def test_saves_publish_events(self):
+
+        HANDLERS['topic.saved'] = [self.record]
+        HANDLERS['comment.saved'] = [self.record]
+
+        topic = Topic.objects.create(title='Outbox', owner=self.thinker)
+        comment = Comment.objects.create(
+            topic=topic, text='First', owner=self.thinker)
+
+        self.assertTrue(OutboxEvent.objects.filter(
+            kind='topic.saved', aggregate='topic:{}'.format(topic.pk)).exists())
+        self.assertEqual(
+            OutboxEvent.objects.get(kind='comment.saved').payload,
+            {'id': comment.pk, 'created': True, 'fields': None})
+
+    def test_relay_delivers_once(self):
+
+        HANDLERS['comment.saved'] = [self.record]
+
+        topic = Topic.objects.create(title='Outbox', owner=self.thinker)
+        comment = Comment.objects.create(
+            topic=topic, text='First', owner=self.thinker)
+
+        relay_batch(100)
+        relay_batch(100)
+
+        self.assertEqual(self.calls, [(comment.pk, True)])
+        self.assertFalse(
+            OutboxEvent.objects.filter(sent_date__isnull=True).exists())
+
+    def test_failure_keeps_aggregate_order(self):
+
+        def flaky(id, created):
+            if id == 1 and not self.calls:
+                self.calls.append('failed')
+                raise ConnectionError('broker is unavailable')
+            self.calls.append(id)
+
+        HANDLERS['test'] = [flaky]
+
+        OutboxEvent.publish('test', 'a', id=1, created=True)
+        OutboxEvent.publish('test', 'a', id=2, created=False)
+        OutboxEvent.publish('test', 'b', id=3, created=True)
+
+        self.assertEqual(relay_batch(100), (1, 1))
+        self.assertEqual(self.calls, ['failed', 3])
+
+        failed = OutboxEvent.objects.get(payload__id=1)
+        self.assertGreater(failed.next_attempt_date, now())
+        self.assertEqual(relay_batch(100), (0, 0))
+
+        OutboxEvent.objects.filter(pk=failed.pk).update(
+            next_attempt_date=now() - timedelta(seconds=1))
+        self.assertEqual(relay_batch(100), (2, 0))
+        self.assertEqual(self.calls, ['failed', 3, 1, 2])
+
+        self.assertEqual(
+            OutboxEvent.objects.get(aggregate='b').attempts, 1)
+        self.assertEqual(
+            OutboxEvent.objects.filter(aggregate='a').first().attempts, 2)
+
+    def test_handlers_fail_alone(self):
+
+        def broken(id, created):
+            raise ConnectionError('broker is unavailable')
+
+        HANDLERS['test'] = [broken, self.record]
+
+        OutboxEvent.publish('test', 'a', id=1, created=True)
+        OutboxEvent.publish('test', 'a', id=2, created=False)
+
+        self.assertEqual(relay_batch(100), (2, 1))
+        self.assertEqual(self.calls, [(1, True), (2, False)])
+        self.assertEqual(relay_batch(100), (0, 0))
+        self.assertEqual(
+            list(OutboxEvent.objects.filter(sent_date__isnull=True)
+                 .values_list('attempts', flat=True)), [1, 0])
+
+    def test_sent_after_flush(self):
+
+        def flush():
+            raise ConnectionError('channel layer is unavailable')
+
+        HANDLERS['test'] = [self.record]
+        OutboxEvent.publish('test', 'a', id=1, created=True)
+
+        with mock.patch('outbox.relay.FLUSHES', [flush]):
+            self.assertEqual(relay_batch(100), (0, 1))
+
+        event = OutboxEvent.objects.get()
+        self.assertIsNone(event.sent_date)
+        self.assertEqual(event.attempts, 1)
+        self.assertIsNotNone(event.next_attempt_date)
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2, OUTBOX_RETRY_DELAY=0)
+    def test_parks_poison_events(self):
+
+        def poison(id, created):
+            if id == 1:
+                raise ValueError('poison')
+            self.calls.append(id)
+
+        HANDLERS['test'] = [poison]
+
+        OutboxEvent.publish('test', 'a', id=1, created=True)
+        OutboxEvent.publish('test', 'a', id=2, created=False)
+        OutboxEvent.publish('test', 'b', id=1, created=True)
+
+        self.assertEqual(relay_batch(100), (0, 2))
+        self.assertEqual(relay_batch(100), (1, 2))
+        self.assertEqual(self.calls, [2])
+        self.assertEqual(relay_batch(100), (0, 0))
+
+        parked = OutboxEvent.objects.filter(parked_date__isnull=False)
+        self.assertEqual(parked.count(), 2)
+        self.assertIn('poison', parked.first().last_error)
+
+        self.assertEqual(unpark(aggregate='b'), 1)
+        self.assertEqual(relay_batch(100), (0, 1))
+        self.assertEqual(OutboxEvent.objects.get(aggregate='b').attempts, 1)
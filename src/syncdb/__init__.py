@@ -1,26 +1,148 @@
 import logging
 
-from celery import shared_task
-from pymongo import MongoClient
+from celery import current_app, shared_task
 from constance import config
+from django.conf import settings
+from django.core.cache import cache
+
+from syncdb.buffer import SyncBuffer, get_client
 
 
 logger = logging.getLogger(__name__)
 
+_buffer = None
+_client = None
+
+# Broker queue of the changes, drained by flush_syncdb_task.
+SYNCDB_QUEUE = 'syncdb'
+
+# While set, a drain task is already queued, so changes don't enqueue another.
+FLUSH_SCHEDULED_KEY = 'syncdb:flush-scheduled'
+
+# Held by the running drain task, expiring in case its worker is lost.
+FLUSH_LOCK_KEY = 'syncdb:flush-lock'
+FLUSH_LOCK_TIMEOUT = 600
+
+
+def set_client(client):
+    """
+    Makes the sync buffer write to the given client (e.g., a
+    syncdb.memory.MemoryClient) instead of config.DATA_SYNC_SERVER.
+    """
+    global _client, _buffer
+    _client = client
+    _buffer = None
+
+
+def client():
+    return _client or get_client(config.DATA_SYNC_SERVER)
+
+
+def get_buffer():
+    global _buffer
+
+    if _buffer is None:
+        _buffer = SyncBuffer(
+            client, config.DATA_SYNC_DB,
+            batch_size=settings.SYNCDB_BATCH_SIZE,
+            max_age=settings.SYNCDB_FLUSH_AGE)
+
+    return _buffer
+
+
+def stats():
+    """
+    Throughput and lag of the sync buffer of this process.
+    """
+    return get_buffer().stats()
+
+
+def connection():
+    """
+    A connection to the Celery broker, from the pool of the app.
+    """
+    return current_app.pool.acquire(block=True)
+
+
+def update_syncdb_async(table, data):
+    """
+    Queues the change in SYNCDB_QUEUE, and the drain task, unless it is
+    queued already, SYNCDB_FLUSH_AGE seconds later, so that it takes all
+    the changes queued meanwhile.
+    """
+    with connection() as conn:
+        queue = conn.SimpleQueue(SYNCDB_QUEUE)
+        try:
+            queue.put({'table': table, 'data': data})
+        finally:
+            queue.close()
+
+    if cache.add(FLUSH_SCHEDULED_KEY, True, settings.SYNCDB_FLUSH_AGE):
+        flush_syncdb_task.apply_async(countdown=settings.SYNCDB_FLUSH_AGE)
+
+
+def drain(batch_size):
+    """
+    Writes the queued changes, batch_size messages and one flush at a
+    time, and acknowledges the messages of a batch once it is written,
+    so that the changes of a lost worker are delivered again. Returns
+    how many changes were written.
+    """
+    buffer = get_buffer()
+    drained = 0
+
+    with connection() as conn:
+        queue = conn.SimpleQueue(SYNCDB_QUEUE)
+        try:
+            while True:
+                messages = []
+                while len(messages) < batch_size:
+                    try:
+                        messages.append(queue.get(block=False))
+                    except queue.Empty:
+                        break
+
+                if not messages:
+                    break
+
+                try:
+                    for message in messages:
+                        buffer.add(message.payload['table'],
+                                   message.payload['data'])
+                    buffer.flush()
+                except Exception:
+                    for message in messages:
+                        message.requeue()
+                    raise
 
-@shared_task
-def update_syncdb_task(table, data):
+                for message in messages:
+                    message.ack()
+                drained += len(messages)
 
-    db_client = MongoClient(config.DATA_SYNC_SERVER)
-    db = db_client[config.DATA_SYNC_DB]
+                if len(messages) < batch_size:
+                    break
+        finally:
+            queue.close()
 
-    location = data.get('-')
+    return drained
 
-    if location:
 
-        db[table].update(
-            {'-': location}, {'$set': data}, upsert=True)
+@shared_task(bind=True, max_retries=settings.SYNCDB_MAX_RETRIES)
+def flush_syncdb_task(self):
+    """
+    Drains SYNCDB_QUEUE. One drain runs at a time, so that the changes of
+    a document are written in order.
+    """
+    cache.delete(FLUSH_SCHEDULED_KEY)
 
+    if not cache.add(FLUSH_LOCK_KEY, True, FLUSH_LOCK_TIMEOUT):
+        return
 
-def update_syncdb_async(*args):
-    return update_syncdb_task.apply_async(args)
+    try:
+        drain(settings.SYNCDB_BATCH_SIZE)
+    except Exception as exc:
+        raise self.retry(
+            exc=exc,
+            countdown=settings.SYNCDB_RETRY_DELAY * 2 ** self.request.retries)
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
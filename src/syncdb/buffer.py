@@ -0,0 +1,150 @@
+import logging
+import os
+import threading
+import time
+
+from pymongo import MongoClient, UpdateOne
+
+
+logger = logging.getLogger(__name__)
+
+_clients = {}
+
+
+def get_client(server):
+    """
+    One MongoClient per process and server. MongoClient is not fork-safe,
+    so a client created before a fork is not reused in the child.
+    """
+    key = (os.getpid(), server)
+
+    if key not in _clients:
+        _clients[key] = MongoClient(server, connect=False)
+
+    return _clients[key]
+
+
+class SyncBuffer(object):
+    """
+    Collects changes for the sync database, coalesced per (table, '-')
+    location, and writes them with one bulk_write per table, when
+    batch_size locations are queued, or the oldest change is max_age
+    seconds old.
+
+    The changes queued in a process are lost if it is killed before
+    they are flushed, so syncdb.drain() flushes before it acknowledges
+    the messages of the changes.
+    """
+
+    def __init__(self, client_factory, db_name, batch_size=500, max_age=5.):
+        self.client_factory = client_factory
+        self.db_name = db_name
+        self.batch_size = batch_size
+        self.max_age = max_age
+
+        self.lock = threading.RLock()
+        self.pending = {}
+        self.oldest = None
+        self.timer = None
+
+        self.started = time.time()
+        self.received = 0
+        self.coalesced = 0
+        self.written = 0
+        self.flushes = 0
+        self.errors = 0
+        self.last_lag = 0.
+        self.max_lag = 0.
+
+    def add(self, table, data):
+        location = data.get('-')
+
+        if not location:
+            return
+
+        with self.lock:
+            self.received += 1
+            key = (table, location)
+
+            if key in self.pending:
+                self.coalesced += 1
+                self.pending[key].update(data)
+            else:
+                self.pending[key] = dict(data)
+
+            if self.oldest is None:
+                self.oldest = time.time()
+                self.schedule()
+
+            if len(self.pending) >= self.batch_size or self.age() >= self.max_age:
+                self.flush()
+
+    def age(self):
+        return time.time() - self.oldest if self.oldest is not None else 0.
+
+    def schedule(self):
+        self.timer = threading.Timer(self.max_age, self.flush)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def flush(self):
+        """
+        Writes the queued changes, and returns how many were written.
+        On failure, the changes stay queued for the next flush.
+        """
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+
+            if not self.pending:
+                return 0
+
+            tables = {}
+            for (table, location), data in self.pending.items():
+                tables.setdefault(table, []).append(
+                    UpdateOne({'-': location}, {'$set': data}, upsert=True))
+
+            db = self.client_factory()[self.db_name]
+            lag = self.age()
+
+            try:
+                for table, requests in tables.items():
+                    db[table].bulk_write(requests, ordered=False)
+            except Exception:
+                self.errors += 1
+                logger.exception('syncdb flush failed')
+                self.schedule()
+                raise
+
+            written = len(self.pending)
+
+            self.pending = {}
+            self.oldest = None
+            self.written += written
+            self.flushes += 1
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+
+            logger.info(
+                'syncdb wrote %s documents in %s tables, lag %.2fs',
+                written, len(tables), lag)
+
+            return written
+
+    def stats(self):
+        with self.lock:
+            elapsed = max(time.time() - self.started, 1e-9)
+
+            return {
+                'received': self.received,
+                'coalesced': self.coalesced,
+                'written': self.written,
+                'flushes': self.flushes,
+                'errors': self.errors,
+                'queued': len(self.pending),
+                'lag': self.age(),
+                'last_lag': self.last_lag,
+                'max_lag': self.max_lag,
+                'written_per_second': self.written / elapsed,
+            }
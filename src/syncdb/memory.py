@@ -0,0 +1,42 @@
+class MemoryCollection(object):
+    """
+    Stand-in for a pymongo collection: keeps documents by their '-'
+    location, and supports the upserts that SyncBuffer writes.
+    """
+
+    def __init__(self):
+        self.documents = {}
+        self.bulk_writes = 0
+
+    def bulk_write(self, requests, ordered=True):
+        self.bulk_writes += 1
+
+        for request in requests:
+            location = request._filter['-']
+            document = self.documents.setdefault(location, {'-': location})
+            document.update(request._doc['$set'])
+
+    def find_one(self, query):
+        return self.documents.get(query.get('-'))
+
+    def count(self):
+        return len(self.documents)
+
+
+class MemoryDatabase(dict):
+
+    def __missing__(self, name):
+        self[name] = MemoryCollection()
+        return self[name]
+
+
+class MemoryClient(dict):
+    """
+    Stand-in for pymongo.MongoClient, for use without a mongod:
+
+    >>> syncdb.set_client(MemoryClient())
+    """
+
+    def __missing__(self, name):
+        self[name] = MemoryDatabase()
+        return self[name]
@@ -0,0 +1,113 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+from kombu import Connection
+
+from syncdb import flush_syncdb_task, set_client, update_syncdb_async
+from syncdb.buffer import SyncBuffer
+from syncdb.memory import MemoryClient
+
+
+class TestSyncBuffer(SimpleTestCase):
+
+    def setUp(self):
+        self.client = MemoryClient()
+        self.buffer = SyncBuffer(
+            lambda: self.client, 'infdb', batch_size=3, max_age=60)
+        self.addCleanup(self.buffer.flush)
+
+    def test_coalesces_per_location(self):
+
+        self.buffer.add('topics', {'-': 'topic/1', 'title': 'One'})
+        self.buffer.add('topics', {'-': 'topic/1', 'body': 'Body'})
+        self.buffer.add('topics', {'-': 'topic/1', 'title': 'Uno'})
+        self.buffer.add('comments', {'-': 'comment/1', 'text': 'Hi'})
+
+        self.assertEqual(self.buffer.flush(), 2)
+
+        topics = self.client['infdb']['topics']
+        self.assertEqual(topics.bulk_writes, 1)
+        self.assertEqual(
+            topics.find_one({'-': 'topic/1'}),
+            {'-': 'topic/1', 'title': 'Uno', 'body': 'Body'})
+
+        stats = self.buffer.stats()
+        self.assertEqual(stats['received'], 4)
+        self.assertEqual(stats['coalesced'], 2)
+        self.assertEqual(stats['written'], 2)
+        self.assertEqual(stats['queued'], 0)
+
+    def test_flushes_by_count(self):
+
+        for n in range(7):
+            self.buffer.add('topics', {'-': 'topic/{}'.format(n)})
+
+        topics = self.client['infdb']['topics']
+        self.assertEqual(topics.bulk_writes, 2)
+        self.assertEqual(topics.count(), 6)
+        self.assertEqual(self.buffer.stats()['queued'], 1)
+
+    def test_flushes_by_age(self):
+
+        self.buffer.max_age = 0
+        self.buffer.add('topics', {'-': 'topic/1'})
+
+        self.assertEqual(self.client['infdb']['topics'].count(), 1)
+
+    def test_ignores_data_without_location(self):
+
+        self.buffer.add('topics', {'title': 'Nowhere'})
+
+        self.assertEqual(self.buffer.flush(), 0)
+
+
+class TestSyncTask(TestCase):
+
+    def setUp(self):
+        self.client = MemoryClient()
+        set_client(self.client)
+        self.addCleanup(set_client, None)
+
+        # An in-process broker, shared by the connections of the test.
+        self.broker = Connection('memory://')
+        self.addCleanup(self.broker.release)
+
+        patcher = mock.patch('syncdb.connection', self.broker.clone)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = mock.patch('syncdb.flush_syncdb_task.apply_async')
+        self.scheduled = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def queued(self):
+        queue = self.broker.SimpleQueue('syncdb')
+        self.addCleanup(queue.close)
+        return queue.qsize()
+
+    def test_one_write_per_batch(self):
+
+        for n in range(5):
+            update_syncdb_async('topics', {'-': 'topic/{}'.format(n % 3)})
+
+        self.assertEqual(self.scheduled.call_count, 1)
+        self.assertEqual(self.queued(), 5)
+
+        with self.settings(SYNCDB_BATCH_SIZE=4):
+            flush_syncdb_task.apply()
+
+        topics = self.client['infdb']['topics']
+        self.assertEqual(topics.count(), 3)
+        self.assertEqual(topics.bulk_writes, 2)
+        self.assertEqual(self.queued(), 0)
+
+    def test_failed_write_stays_queued(self):
+
+        update_syncdb_async('topics', {'-': 'topic/1', 'title': 'One'})
+
+        with mock.patch.object(
+                self.client['infdb']['topics'], 'bulk_write',
+                side_effect=ConnectionError('sync database is down')):
+            flush_syncdb_task.apply()
+
+        self.assertEqual(self.queued(), 1)
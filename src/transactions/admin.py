@@ -8,7 +8,10 @@ from transactions.models import (
     CurrencyPriceSnapshot,
     Interaction,
     Transaction,
-    ContributionCertificate
+    ContributionCertificate,
+    UserBalance,
+    DailySpend,
+    SnapshotAnchor,
 )
 
 
@@ -50,3 +53,18 @@ class TransactionAdmin(admin.ModelAdmin):
 @admin.register(ContributionCertificate)
 class ContributionCertificateAdmin(admin.ModelAdmin):
     pass
+
+
+@admin.register(UserBalance)
+class UserBalanceAdmin(admin.ModelAdmin):
+    pass
+
+
+@admin.register(DailySpend)
+class DailySpendAdmin(admin.ModelAdmin):
+    pass
+
+
+@admin.register(SnapshotAnchor)
+class SnapshotAnchorAdmin(admin.ModelAdmin):
+    pass
@@ -0,0 +1,150 @@
+"""
+Cost of matching the certificates of a comment, when its claim is edited,
+with the configured database (the PostgreSQL one, in config/settings/base.py).
+
+    cd src && DJANGO_SETTINGS_MODULE=config.settings.local \\
+        python -m transactions.benchmark --investments 200
+
+Invests in a new comment from as many users, then matches all of their
+certificates the way it was done before (a create() per child, and a save()
+per broken parent, with the balance signals), and the way it's done now
+(transactions.mixins.save_matches), and prints the time and queries of each.
+Everything is rolled back at the end.
+"""
+import argparse
+import os
+import sys
+import time
+from decimal import Decimal
+
+
+def setup():
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.local')
+
+    import django
+    django.setup()
+
+
+def row_by_row(certs, amount, interaction):
+    """
+    The pair-by-pair loop, that proceed_interaction() used to run.
+    """
+    from transactions.models import ContributionCertificate
+
+    def create(parent, hours, matched):
+        ContributionCertificate.objects.create(
+            type=parent.type,
+            transaction=parent.transaction,
+            interaction=interaction,
+            comment_snapshot=parent.comment_snapshot,
+            hours=hours,
+            matched=matched,
+            received_by=parent.received_by,
+            broken=False,
+            parent=parent,
+        )
+
+    for cert1, cert2 in zip(certs[0::2], certs[1::2]):
+        if not ((cert1.transaction == cert2.transaction) and
+                (cert1.type == ContributionCertificate.DOER) and
+                (cert2.type == ContributionCertificate.INVESTOR) and
+                (cert1.hours == cert2.hours)):
+            break
+
+        certs_hours = cert1.hours + cert2.hours
+
+        if amount >= certs_hours:
+            create(cert1, cert1.hours, True)
+            create(cert2, cert2.hours, True)
+        else:
+            hours_to_match = amount / Decimal(2)
+            create(cert1, hours_to_match, True)
+            create(cert2, hours_to_match, True)
+
+            hours_to_donate = (certs_hours - amount) / Decimal(2)
+            create(cert1, hours_to_donate, False)
+            create(cert2, hours_to_donate, False)
+
+        cert1.broken = True
+        cert1.save()
+        cert2.broken = True
+        cert2.save()
+
+        if amount < certs_hours:
+            break
+        amount -= certs_hours
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--investments', type=int, default=200)
+    parser.add_argument('--hours', type=Decimal, default=Decimal('0.05'))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    setup()
+
+    from django.db import connection, transaction
+    from django.test.utils import CaptureQueriesContext
+
+    from core.models import Topic, Comment
+    from transactions.mixins import save_matches
+    from transactions.models import (
+        ContributionCertificate,
+        Currency,
+        CurrencyPriceSnapshot,
+        HourPriceSnapshot,
+        Interaction,
+    )
+    from users.models import User
+
+    if not (Currency.objects.filter(label='EUR').exists() and
+            HourPriceSnapshot.objects.filter(name='FRED').exists() and
+            CurrencyPriceSnapshot.objects.filter(name='FIXER').exists()):
+        parser.error('The EUR currency, and FRED and FIXER prices are needed.')
+
+    with transaction.atomic():
+        doer = User.objects.create_user('benchmark-doer')
+        topic = Topic.objects.create(title='Benchmark', owner=doer)
+        comment = Comment.objects.create(
+            topic=topic, owner=doer,
+            text='{?%s} benchmark' % (args.hours * args.investments))
+
+        for i in range(args.investments):
+            investor = User.objects.create_user('benchmark-investor-{}'.format(i))
+            if comment.invest(args.hours, 'eur', investor) is None:
+                parser.error('Investment #{} was refused.'.format(i))
+
+        certs = ContributionCertificate.objects.filter(
+            transaction__comment=comment, broken=False, matched=False
+        ).order_by('pk')
+        amount = sum(cert.hours for cert in certs)
+        ix = Interaction.objects.create(
+            comment=comment,
+            snapshot=comment.create_snapshot(),
+            claimed_hours_to_match=amount)
+
+        for name, match in (('row', row_by_row), ('bulk', save_matches)):
+            best = None
+
+            for _ in range(args.repeat):
+                sid = transaction.savepoint()
+                rows = list(certs)
+
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.time()
+                    match(rows, amount, ix)
+                    elapsed = time.time() - started
+
+                transaction.savepoint_rollback(sid)
+                best = elapsed if best is None else min(best, elapsed)
+
+            print('{:5} {:9.1f} ms  {:6} queries  {:8.3f} ms/certificate'.format(
+                name, 1000 * best, len(queries), 1000 * best / len(rows)))
+
+        transaction.set_rollback(True)
+
+
+if __name__ == '__main__':
+    main()
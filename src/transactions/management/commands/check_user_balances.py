@@ -0,0 +1,34 @@
+from django.core.management import BaseCommand, CommandError
+
+from transactions.models import UserBalance
+
+
+class Command(BaseCommand):
+    help = 'compare materialized user balances with the aggregates they mirror'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix', action='store_true', dest='fix', default=False,
+            help='rebuild the inconsistent balances')
+
+    def handle(self, *args, **options):
+
+        inconsistent = 0
+
+        for balance in UserBalance.objects.select_related('user').order_by('pk').iterator():
+            diff = balance.inconsistencies()
+            if not diff:
+                continue
+
+            inconsistent += 1
+            for field, (stored, computed) in sorted(diff.items()):
+                print('{}: {} is {}, should be {}'.format(
+                    balance.user, field, stored, computed))
+
+            if options['fix']:
+                UserBalance.rebuild(balance.user_id)
+
+        if inconsistent and not options['fix']:
+            raise CommandError('{} inconsistent balances.'.format(inconsistent))
+
+        print('Done.')
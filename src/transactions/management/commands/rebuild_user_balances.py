@@ -0,0 +1,22 @@
+from django.core.management import BaseCommand
+
+from users.models import User
+from transactions.models import UserBalance
+
+
+class Command(BaseCommand):
+    help = 'rebuild materialized user balances from certificates, comments and reserves'
+
+    def add_arguments(self, parser):
+        parser.add_argument('users', nargs='*', type=int, help='user ids (default: all)')
+
+    def handle(self, *args, **options):
+
+        users = User.objects.all().order_by('pk')
+        if options['users']:
+            users = users.filter(pk__in=options['users'])
+
+        for user_id in users.values_list('pk', flat=True).iterator():
+            UserBalance.rebuild(user_id)
+
+        print('Done.')
@@ -0,0 +1,80 @@
+"""
+Merkle trees over snapshot data, used to anchor a batch of snapshots
+in one blockchain transaction (see SnapshotAnchor).
+
+Leaves and nodes are hashed with different prefixes, and an odd node
+at the end of a level is promoted to the next level as is.
+"""
+import hashlib
+import json
+
+
+def canonical(data):
+    return json.dumps(
+        data, sort_keys=True, separators=(',', ':'), ensure_ascii=False
+    ).encode('utf-8')
+
+
+def leaf_hash(data):
+    return hashlib.sha256(b'\x00' + canonical(data)).hexdigest()
+
+
+def node_hash(left, right):
+    return hashlib.sha256(
+        b'\x01' + bytes.fromhex(left) + bytes.fromhex(right)).hexdigest()
+
+
+def tree(leaves):
+    """
+    Given leaf hashes, returns the list of tree levels, from the leaves
+    up to the root level.
+    """
+    if not leaves:
+        raise ValueError('Cannot build a Merkle tree without leaves.')
+
+    levels = [list(leaves)]
+
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        levels.append([
+            node_hash(level[i], level[i + 1]) if i + 1 < len(level)
+            else level[i]
+            for i in range(0, len(level), 2)
+        ])
+
+    return levels
+
+
+def root(levels):
+    return levels[-1][0]
+
+
+def proof(levels, index):
+    """
+    Inclusion proof of the leaf at index: a list of [side, hash] pairs,
+    from the leaf level up, where side is 'l' or 'r' of the sibling.
+    """
+    path = []
+
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            path.append(['l' if sibling < index else 'r', level[sibling]])
+        index //= 2
+
+    return path
+
+
+def verify(leaf, path, expected_root):
+    """
+    Checks that the leaf hash, combined with the proof, gives the root.
+    """
+    current = leaf
+
+    for side, sibling in path:
+        if side == 'l':
+            current = node_hash(sibling, current)
+        else:
+            current = node_hash(current, sibling)
+
+    return current == expected_root
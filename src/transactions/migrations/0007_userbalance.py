@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.15 on 2018-09-03 10:12
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('transactions', '0006_remove_transaction_will_deduce_reserve_by'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserBalance',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+                ('updated_date', models.DateTimeField(auto_now=True)),
+                ('matched', models.DecimalField(decimal_places=8, default=0.0, max_digits=20)),
+                ('unmatched', models.DecimalField(decimal_places=8, default=0.0, max_digits=20)),
+                ('claimed', models.DecimalField(decimal_places=8, default=0.0, max_digits=20)),
+                ('reserve', models.DecimalField(decimal_places=8, default=0.0, max_digits=20)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='user_balance', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'User Balance',
+                'verbose_name_plural': 'User Balances',
+            },
+        ),
+    ]
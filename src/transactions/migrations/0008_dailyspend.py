@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.15 on 2018-09-05 14:37
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('transactions', '0007_userbalance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySpend',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+                ('updated_date', models.DateTimeField(auto_now=True)),
+                ('day', models.DateField()),
+                ('hours', models.DecimalField(decimal_places=8, default=0.0, max_digits=20)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_spends', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Daily Spend',
+                'verbose_name_plural': 'Daily Spends',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailyspend',
+            unique_together=set([('user', 'day')]),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['payment_sender', 'created_date'], name='transaction_sender_date_idx'),
+        ),
+    ]
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.15 on 2018-09-12 16:20
+from __future__ import unicode_literals
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0008_dailyspend'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SnapshotAnchor',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+                ('updated_date', models.DateTimeField(auto_now=True)),
+                ('root', models.CharField(max_length=64)),
+                ('size', models.PositiveIntegerField()),
+                ('blockchain', models.PositiveSmallIntegerField()),
+                ('blockchain_tx', models.TextField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Snapshot Anchor',
+                'verbose_name_plural': 'Snapshot Anchors',
+            },
+        ),
+        migrations.AddField(
+            model_name='commentsnapshot',
+            name='merkle_anchor',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='commentsnapshots', to='transactions.SnapshotAnchor'),
+        ),
+        migrations.AddField(
+            model_name='commentsnapshot',
+            name='merkle_leaf',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='commentsnapshot',
+            name='merkle_proof',
+            field=django.contrib.postgres.fields.jsonb.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='currencypricesnapshot',
+            name='merkle_anchor',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='currencypricesnapshots', to='transactions.SnapshotAnchor'),
+        ),
+        migrations.AddField(
+            model_name='currencypricesnapshot',
+            name='merkle_leaf',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='currencypricesnapshot',
+            name='merkle_proof',
+            field=django.contrib.postgres.fields.jsonb.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='hourpricesnapshot',
+            name='merkle_anchor',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='hourpricesnapshots', to='transactions.SnapshotAnchor'),
+        ),
+        migrations.AddField(
+            model_name='hourpricesnapshot',
+            name='merkle_leaf',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='hourpricesnapshot',
+            name='merkle_proof',
+            field=django.contrib.postgres.fields.jsonb.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='topicsnapshot',
+            name='merkle_anchor',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='topicsnapshots', to='transactions.SnapshotAnchor'),
+        ),
+        migrations.AddField(
+            model_name='topicsnapshot',
+            name='merkle_leaf',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='topicsnapshot',
+            name='merkle_proof',
+            field=django.contrib.postgres.fields.jsonb.JSONField(blank=True, null=True),
+        ),
+    ]
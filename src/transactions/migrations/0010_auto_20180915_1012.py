@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.15 on 2018-09-15 10:12
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0009_snapshotanchor'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contributioncertificate',
+            index=models.Index(fields=['created_date', 'id'], name='certificate_created_idx'),
+        ),
+    ]
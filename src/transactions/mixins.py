@@ -1,6 +1,8 @@
 from decimal import Decimal
 
 from django.db.models import Sum
+from django.db.transaction import atomic
+from django.utils.timezone import now
 
 from transactions.utils import instance_to_save_dict
 from transactions.models import (
@@ -10,8 +12,108 @@ from transactions.models import (
     Currency,
     Interaction,
     Transaction,
+    UserBalance,
 )
 from trade.models import Reserve
+from changes.models import Change
+
+
+def match_certificates(certs, amount, interaction):
+    """
+    Going in pairs (DOER, INVESTOR) over unmatched, unbroken certificates,
+    ordered by pk, splits them into matched and unmatched children certi-
+    ficates, until the amount of claimed hours to match is covered.
+
+    Works in memory, and returns (created, broken): unsaved children
+    certificates in creation order, and the parent certificates to mark
+    as broken.
+    """
+
+    def child(parent, hours, matched):
+        return ContributionCertificate(
+            type=parent.type,
+            transaction_id=parent.transaction_id,
+            interaction=interaction,
+            comment_snapshot_id=parent.comment_snapshot_id,
+            hours=hours,
+            matched=matched,
+            received_by_id=parent.received_by_id,
+            broken=False,
+            parent=parent,
+        )
+
+    created = []
+    broken = []
+
+    for cert1, cert2 in zip(certs[0::2], certs[1::2]):
+
+        # Iterating over certificate pairs.
+        # PAIR INTEGRITY CHECKS - PAIR MUST BE SYMMETRIC:
+        if not ((cert1.transaction_id == cert2.transaction_id) and
+                (cert1.type == ContributionCertificate.DOER) and
+                (cert2.type == ContributionCertificate.INVESTOR) and
+                (cert1.hours == cert2.hours)):
+            # Don't proceed if these conditions not satisfied.
+            break
+
+        certs_hours = cert1.hours + cert2.hours
+        broken.extend([cert1, cert2])
+
+        if amount >= certs_hours:
+
+            # Create matched certs. (2)
+            created.append(child(cert1, cert1.hours, matched=True))
+            created.append(child(cert2, cert2.hours, matched=True))
+
+            # reduce number of hours covered
+            amount -= certs_hours
+
+        else:
+            # Create matched and unmatched certs. (4)
+            hours_to_match = amount / Decimal(2)
+
+            created.append(child(cert1, hours_to_match, matched=True))
+            created.append(child(cert2, hours_to_match, matched=True))
+
+            hours_to_donate = (certs_hours - amount) / Decimal(2)
+
+            created.append(child(cert1, hours_to_donate, matched=False))
+            created.append(child(cert2, hours_to_donate, matched=False))
+
+            # Break the iteration
+            break
+
+    return created, broken
+
+
+def save_matches(certs, amount, interaction):
+    """
+    Matches the certificates (see match_certificates), and writes the
+    children and the broken parents, with one query each.
+    """
+    created, broken = match_certificates(certs, amount, interaction)
+
+    ContributionCertificate.objects.bulk_create(created)
+    ContributionCertificate.objects.filter(
+        pk__in=[cert.pk for cert in broken]
+    ).update(broken=True, updated_date=now())
+
+    # Bulk writes skip the signals, that maintain balances,
+    # and log changes.
+    UserBalance.apply_entries(
+        added=[entry for cert in created
+               for entry in cert.balance_entries()],
+        removed=[entry for cert in broken
+                 for entry in cert.balance_entries()])
+
+    Change.record(
+        ContributionCertificate,
+        [cert.pk for cert in created], Change.CREATED)
+    Change.record(
+        ContributionCertificate,
+        [cert.pk for cert in broken], Change.UPDATED)
+
+    return created, broken
 
 
 class TopicTransactionMixin():
@@ -202,128 +304,13 @@ class CommentTransactionMixin():
             """ Going in pairs over all unmatched, unbroken certificates
             ContributionCertificates of the comment, and creating matched and unmatched children certificates.
             """
-
-            cert1 = None
-            for i, cert2 in enumerate(
-                    ContributionCertificate.objects.filter(
-                        transaction__comment=self,
-                        broken=False,
-                        matched=False,
-                    ).order_by('pk').all()):
-                if i % 2 == 0:
-                    cert1 = cert2
-                    continue
-
-                # Iterating over certificate pairs.
-                # PAIR INTEGRITY CHECKS - PAIR MUST BE SYMMETRIC:
-                if not ((cert1.transaction == cert2.transaction) & \
-                    (cert1.type == ContributionCertificate.DOER) & \
-                    (cert2.type == ContributionCertificate.INVESTOR) & \
-                    (cert1.hours == cert2.hours)):
-                    # Don't proceed if these conditions not satisfied.
-                    break
-
-                certs_hours = cert1.hours + cert2.hours
-
-                if amount >= certs_hours:
-
-                    # Create matched certs. (2)
-                    ContributionCertificate.objects.create(
-                        type=ContributionCertificate.DOER,
-                        transaction=cert1.transaction,
-                        interaction=ix,
-                        comment_snapshot=cert1.comment_snapshot,
-                        hours=cert1.hours,
-                        matched=True,
-                        received_by=cert1.received_by,
-                        broken=False,
-                        parent=cert1,
-                    )
-                    ContributionCertificate.objects.create(
-                        type=ContributionCertificate.INVESTOR,
-                        transaction=cert2.transaction,
-                        interaction=ix,
-                        comment_snapshot=cert2.comment_snapshot,
-                        hours=cert2.hours,
-                        matched=True,
-                        received_by=cert2.received_by,
-                        broken=False,
-                        parent=cert2,
-                    )
-
-                    # Mark original cert as broken
-                    cert1.broken = True
-                    cert1.save()
-                    cert2.broken = True
-                    cert2.save()
-
-                    # reduce number of hours covered
-                    amount -= certs_hours
-
-                elif amount < certs_hours:
-                    # Create matched and unmatched certs. (4)
-
-                    hours_to_match = amount / Decimal(2)
-
-                    ContributionCertificate.objects.create(
-                        type=ContributionCertificate.DOER,
-                        transaction=cert1.transaction,
-                        interaction=ix,
-                        comment_snapshot=cert1.comment_snapshot,
-                        hours=hours_to_match,
-                        matched=True,
-                        received_by=cert1.received_by,
-                        broken=False,
-                        parent=cert1,
-                    )
-                    ContributionCertificate.objects.create(
-                        type=ContributionCertificate.INVESTOR,
-                        transaction=cert2.transaction,
-                        interaction=ix,
-                        comment_snapshot=cert2.comment_snapshot,
-                        hours=hours_to_match,
-                        matched=True,
-                        received_by=cert2.received_by,
-                        broken=False,
-                        parent=cert2,
-                    )
-
-                    hours_to_donate = (certs_hours - amount) / Decimal(2)
-
-                    ContributionCertificate.objects.create(
-                        type=ContributionCertificate.DOER,
-                        transaction=cert1.transaction,
-                        interaction=ix,
-                        comment_snapshot=cert1.comment_snapshot,
-                        hours=hours_to_donate,
-                        matched=False,
-                        received_by=cert1.received_by,
-                        broken=False,
-                        parent=cert1,
-                    )
-                    ContributionCertificate.objects.create(
-                        type=ContributionCertificate.INVESTOR,
-                        transaction=cert2.transaction,
-                        interaction=ix,
-                        comment_snapshot=cert2.comment_snapshot,
-                        hours=hours_to_donate,
-                        matched=False,
-                        received_by=cert2.received_by,
-                        broken=False,
-                        parent=cert2,
-                    )
-
-                    # Mark original cert as broken
-                    cert1.broken = True
-                    cert1.save()
-                    cert2.broken = True
-                    cert2.save()
-
-                    # reduce number of hours covered
-                    # AMOUNT = Decimal(0.0)
-                    amount -= hours_to_donate
-
-                    # Break the iteration
-                    break
+            with atomic():
+                certs = ContributionCertificate.objects.filter(
+                    transaction__comment=self,
+                    broken=False,
+                    matched=False,
+                ).order_by('pk')
+
+                save_matches(list(certs), amount, ix)
 
             self.set_hours()
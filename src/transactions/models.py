@@ -1,25 +1,147 @@
 import datetime
+from collections import defaultdict
 from decimal import Decimal
 
-from django.db import models
-from django.db.models import Sum
+from django.db import models, IntegrityError
+from django.db.transaction import atomic, on_commit
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
 from django.contrib.postgres.fields import JSONField
 from django.utils.translation import ugettext_lazy as _
 from django.conf import settings
 
-from generic.models import GenericModel
-from users.models import User
+from generic.models import GenericManager, GenericModel
+from users.models import CryptoKeypair, User
+from transactions import merkle
 from transactions.utils import blockchain_save
 
 
+class SnapshotQuerySet(models.QuerySet):
+
+    def pending(self):
+        """
+        Snapshots to be saved in a known blockchain, but not anchored yet.
+        """
+        return self.filter(
+            blockchain__in=[
+                key for key, _ in CryptoKeypair.KEY_TYPES
+                if key != CryptoKeypair.NONE],
+            blockchain_tx__isnull=True)
+
+
 class GenericSnapshot(GenericModel):
     blockchain = models.PositiveSmallIntegerField(blank=True, null=True)
     blockchain_tx = models.TextField(blank=True, null=True)
 
+    merkle_anchor = models.ForeignKey(
+        'transactions.SnapshotAnchor', null=True, blank=True,
+        related_name='%(class)ss')
+    merkle_leaf = models.CharField(max_length=64, blank=True, null=True)
+    merkle_proof = JSONField(blank=True, null=True)
+
+    objects = GenericManager.from_queryset(SnapshotQuerySet)()
+
+    def signer(self):
+        """
+        The user, whose keypair signs the blockchain transaction.
+        """
+        raise NotImplementedError
+
+    def save(self, blockchain=False, *args, **kwargs):
+        """
+        Save in a blockchain ID= blockchain.
+
+        The snapshot is saved locally right away, and anchored in the
+        blockchain by a Celery task after the database transaction
+        commits (see transactions/tasks.py), and .blockchain_tx is
+        filled in then.
+        """
+        if blockchain:
+            self.blockchain = blockchain
+
+        result = super().save(*args, **kwargs)
+
+        if blockchain and not self.blockchain_tx:
+            from transactions.tasks import anchor_snapshots_async
+            on_commit(anchor_snapshots_async)
+
+        return result
+
+    def anchor(self):
+        """
+        Saves the snapshot data in the blockchain, synchronously.
+        """
+        self.blockchain_tx = blockchain_save(
+            user=self.signer(), blockchain=self.blockchain, data=self.data)
+        super().save(update_fields=['blockchain_tx'])
+
+    def verify_anchor(self):
+        """
+        Checks the snapshot data against the Merkle root it is anchored by.
+        """
+        if not self.merkle_anchor_id:
+            return False
+
+        return self.merkle_leaf == merkle.leaf_hash(self.data) and \
+            merkle.verify(
+                self.merkle_leaf, self.merkle_proof, self.merkle_anchor.root)
+
     class Meta:
         abstract = True
 
 
+class SnapshotAnchor(GenericModel):
+    """
+    Merkle root of a batch of snapshots, saved in the blockchain with one
+    transaction instead of one per snapshot. Every snapshot of the batch
+    stores its leaf hash and inclusion proof.
+    """
+    root = models.CharField(max_length=64)
+    size = models.PositiveIntegerField()
+    blockchain = models.PositiveSmallIntegerField()
+    blockchain_tx = models.TextField(blank=True, null=True)
+
+    def __str__(self):
+        return "Anchor {} of {} snapshots".format(self.root, self.size)
+
+    @classmethod
+    def anchor(cls, snapshots):
+        """
+        Anchors the snapshots (of one blockchain) with one transaction.
+        """
+        if len({snapshot.blockchain for snapshot in snapshots}) != 1:
+            raise ValueError('Snapshots of one blockchain are anchored together.')
+
+        leaves = [merkle.leaf_hash(snapshot.data) for snapshot in snapshots]
+        levels = merkle.tree(leaves)
+        root = merkle.root(levels)
+        blockchain = snapshots[0].blockchain
+
+        txid = blockchain_save(
+            user=None, blockchain=blockchain,
+            data={'merkle_root': root, 'size': len(leaves)})
+
+        anchor = cls.objects.create(
+            root=root, size=len(leaves),
+            blockchain=blockchain, blockchain_tx=txid)
+
+        for index, snapshot in enumerate(snapshots):
+            snapshot.merkle_anchor = anchor
+            snapshot.merkle_leaf = leaves[index]
+            snapshot.merkle_proof = merkle.proof(levels, index)
+            snapshot.blockchain_tx = txid
+            type(snapshot).objects.filter(pk=snapshot.pk).update(
+                merkle_anchor=anchor,
+                merkle_leaf=snapshot.merkle_leaf,
+                merkle_proof=snapshot.merkle_proof,
+                blockchain_tx=txid)
+
+        return anchor
+
+    class Meta:
+        verbose_name = _("Snapshot Anchor")
+        verbose_name_plural = _("Snapshot Anchors")
+
+
 class TopicSnapshot(GenericSnapshot):
     """
     Whenever topic is changed, we store its here, and a copy in BigChainDB.
@@ -30,17 +152,8 @@ class TopicSnapshot(GenericSnapshot):
     def __str__(self):
         return "Topic snapshot for {}".format(self.topic)
 
-    def save(self, blockchain=False, *args, **kwargs):
-        """
-        Save in a blockchain ID= blockchain.
-        """
-        if blockchain:
-            txid = blockchain_save(
-                user=self.topic.owner, blockchain=blockchain, data=self.data)
-            self.blockchain = blockchain
-            self.blockchain_tx = txid
-
-        return super().save(*args, **kwargs)
+    def signer(self):
+        return self.topic.owner
 
     class Meta:
         verbose_name = _("Topic Snapshot")
@@ -60,17 +173,8 @@ class CommentSnapshot(GenericSnapshot):
     def __str__(self):
         return "Comment snapshot for {}".format(self.comment)
 
-    def save(self, blockchain=False, *args, **kwargs):
-        """
-        Save in a blockchain ID= blockchain.
-        """
-        if blockchain:
-            txid = blockchain_save(
-                user=self.comment.owner, blockchain=blockchain, data=self.data)
-            self.blockchain = blockchain
-            self.blockchain_tx = txid
-
-        return super().save(*args, **kwargs)
+    def signer(self):
+        return self.comment.owner
 
     class Meta:
         verbose_name = _("Comment Snapshot")
@@ -308,9 +412,12 @@ class Transaction(GenericModel):
         """
         Save comment created date to parent object.
         """
+        created = not self.pk
         self.set_hours()
         super().save(*args, **kwargs)
         self.create_contribution_certificates()
+        if created:
+            DailySpend.add(self)
 
     def hour_amount(self):
         if self.hour_price:
@@ -320,27 +427,38 @@ class Transaction(GenericModel):
     class Meta:
         verbose_name = _("Transaction")
         verbose_name_plural = _("Transactions")
+        indexes = [
+            models.Index(
+                fields=['payment_sender', 'created_date'],
+                name='transaction_sender_date_idx'),
+        ]
 
     @classmethod
-    def user_paid_today(cls, user):
+    def user_paid_on(cls, user, day):
         """
-        Returns amount of matched hours that a given user has sent today.
+        Returns amount of hours that a given user has sent on a given
+        (UTC) day, aggregated by the database.
         """
+        morning = datetime.datetime.combine(day, datetime.time.min)
 
-        today = datetime.datetime.utcnow()
-        today_morning = today.replace(hour=0, minute=0, second=0, microsecond=0)
-        today_evening = today_morning + datetime.timedelta(days=1, microseconds=-1)
-
-        amount = Decimal(0.)
-
-        for tx in cls.objects.filter(
+        return Decimal(
+            cls.objects.filter(
                 payment_sender=user,
-                created_date__gt=today_morning,
-                created_date__lt=today_evening):
-            if tx.hour_unit_cost:
-                amount += tx.payment_amount / tx.hour_unit_cost
+                hour_unit_cost__gt=0,
+                created_date__gte=morning,
+                created_date__lt=morning + datetime.timedelta(days=1),
+            ).aggregate(
+                total=Sum(ExpressionWrapper(
+                    F('payment_amount') / F('hour_unit_cost'),
+                    output_field=DecimalField()))
+            ).get('total') or 0)
 
-        return amount
+    @classmethod
+    def user_paid_today(cls, user):
+        """
+        Returns amount of matched hours that a given user has sent today.
+        """
+        return DailySpend.spent_on(user, datetime.datetime.utcnow().date())
 
     @classmethod
     def user_quota_remains_today(cls, user):
@@ -348,6 +466,79 @@ class Transaction(GenericModel):
         return max(Decimal(0.), daily_quota - cls.user_paid_today(user))
 
 
+class DailySpend(GenericModel):
+    """
+    Hours sent by a user in transactions during a UTC day.
+
+    A row is seeded from Transaction.user_paid_on() the first time the
+    user pays in the day, and afterwards incremented by every new
+    Transaction, so that quota checks are a single lookup. Days without
+    a row are summed from the transactions, without writing one.
+    """
+    user = models.ForeignKey(User, related_name='daily_spends')
+    day = models.DateField()
+    hours = models.DecimalField(
+        default=0., decimal_places=8, max_digits=20, blank=False)
+
+    def __str__(self):
+        return "{} spent {} on {}".format(self.user, self.hours, self.day)
+
+    @classmethod
+    def seed(cls, user, day):
+        """
+        Returns (row, created), computing a new row from transactions.
+        """
+        user_id = getattr(user, 'pk', user)
+
+        try:
+            return cls.objects.get(user_id=user_id, day=day), False
+        except cls.DoesNotExist:
+            pass
+
+        try:
+            with atomic():
+                return cls.objects.create(
+                    user_id=user_id, day=day,
+                    hours=Transaction.user_paid_on(user_id, day)), True
+        except IntegrityError:
+            return cls.objects.get(user_id=user_id, day=day), False
+
+    @classmethod
+    def spent_on(cls, user, day):
+        """
+        Returns the hours sent by the user on the day.
+        """
+        user_id = getattr(user, 'pk', user)
+
+        hours = cls.objects.filter(
+            user_id=user_id, day=day).values_list('hours', flat=True).first()
+
+        if hours is None:
+            return Transaction.user_paid_on(user_id, day)
+        return Decimal(hours)
+
+    @classmethod
+    def add(cls, tx, sign=1):
+        """
+        Counts a newly saved (or, with sign=-1, deleted) Transaction
+        in its sender's day.
+        """
+        if not tx.hour_unit_cost:
+            return
+
+        row, created = cls.seed(tx.payment_sender_id, tx.created_date.date())
+
+        if not created:
+            # A seeded row already reflects the transaction.
+            cls.objects.filter(pk=row.pk).update(
+                hours=F('hours') + sign * tx.payment_amount / tx.hour_unit_cost)
+
+    class Meta:
+        unique_together = (("user", "day"),)
+        verbose_name = _("Daily Spend")
+        verbose_name_plural = _("Daily Spends")
+
+
 class ContributionCertificate(GenericModel):
     """
     ContributionCertificates are proofs of co-creation, grounded in
@@ -388,6 +579,16 @@ class ContributionCertificate(GenericModel):
     broken = models.BooleanField(default=False)
     parent = models.ForeignKey('self', blank=True, null=True)
 
+    def balance_entries(self):
+        """
+        Entries of the certificate in UserBalance, see UserBalance.apply_entries().
+        """
+        if self.broken:
+            return []
+        return [(self.received_by_id,
+                 'matched' if self.matched else 'unmatched',
+                 self.hours)]
+
     @classmethod
     def user_matched(cls, user):
         """
@@ -413,3 +614,125 @@ class ContributionCertificate(GenericModel):
     class Meta:
         verbose_name = _("Contribution Certificate")
         verbose_name_plural = _("Contribution Certificates")
+        indexes = [
+            models.Index(fields=['created_date', 'id'], name='certificate_created_idx'),
+        ]
+
+
+class UserBalance(GenericModel):
+    """
+    Materialized per-user balance, kept up to date incrementally by the
+    write paths of ContributionCertificate, Comment and Reserve (see
+    transactions/signals.py), so that reading a balance is one row,
+    instead of an aggregate over all the user's history.
+
+    The authoritative values are still the aggregates (see .compute()),
+    and the row can be rebuilt from them at any time:
+
+        ./manage.py rebuild_user_balances
+        ./manage.py check_user_balances
+    """
+    FIELDS = ('matched', 'unmatched', 'claimed', 'reserve')
+
+    user = models.OneToOneField(User, related_name='user_balance')
+
+    matched = models.DecimalField(
+        default=0., decimal_places=8, max_digits=20, blank=False)
+    unmatched = models.DecimalField(
+        default=0., decimal_places=8, max_digits=20, blank=False)
+    claimed = models.DecimalField(
+        default=0., decimal_places=8, max_digits=20, blank=False)
+    reserve = models.DecimalField(
+        default=0., decimal_places=8, max_digits=20, blank=False)
+
+    def __str__(self):
+        return "Balance of {}".format(self.user)
+
+    @classmethod
+    def apply(cls, user_id, **deltas):
+        """
+        Adds the given deltas, e.g., matched=Decimal('0.5'), to the
+        user's balance row, creating the row if it does not exist yet.
+        """
+        deltas = {
+            field: Decimal(value)
+            for field, value in deltas.items() if value}
+
+        if not deltas:
+            return
+
+        if not cls.objects.filter(user_id=user_id).exists():
+            # A new row is computed from scratch, so that the deltas
+            # are already included.
+            cls.rebuild(user_id)
+            return
+
+        cls.objects.filter(user_id=user_id).update(**{
+            field: F(field) + value for field, value in deltas.items()})
+
+    @classmethod
+    def apply_entries(cls, added=(), removed=()):
+        """
+        Applies balance entries, (user_id, field, hours), grouped by user.
+        """
+        deltas = defaultdict(lambda: defaultdict(int))
+
+        for user_id, field, hours in added:
+            deltas[user_id][field] += hours
+        for user_id, field, hours in removed:
+            deltas[user_id][field] -= hours
+
+        for user_id, fields in deltas.items():
+            cls.apply(user_id, **fields)
+
+    @classmethod
+    def compute(cls, user):
+        """
+        Returns the balance of a user, computed from aggregates.
+        """
+        from core.models import Comment
+        from trade.models import Reserve
+
+        return {
+            'matched': ContributionCertificate.user_matched(user),
+            'unmatched': ContributionCertificate.user_unmatched(user),
+            'claimed': Comment.user_claimed(user),
+            'reserve': Reserve.user_reserve_remains(user),
+        }
+
+    @classmethod
+    def rebuild(cls, user):
+        """
+        Recomputes the balance row of a user (User instance or pk).
+        """
+        user_id = getattr(user, 'pk', user)
+        balance, _ = cls.objects.update_or_create(
+            user_id=user_id, defaults=cls.compute(user_id))
+        return balance
+
+    @classmethod
+    def for_user(cls, user):
+        """
+        Returns the balance row of a user, building it, if missing.
+        """
+        try:
+            return user.user_balance
+        except cls.DoesNotExist:
+            user.user_balance = cls.rebuild(user)
+            return user.user_balance
+
+    def inconsistencies(self):
+        """
+        Returns {field: (stored, computed)} for the fields,
+        where the stored value differs from the aggregates.
+        """
+        computed = self.compute(self.user_id)
+        return {
+            field: (getattr(self, field), computed[field])
+            for field in self.FIELDS
+            if Decimal(getattr(self, field)) != computed[field]
+        }
+
+    class Meta:
+        verbose_name = _("User Balance")
+        verbose_name_plural = _("User Balances")
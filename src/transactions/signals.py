@@ -0,0 +1,69 @@
+"""
+Keeps UserBalance and DailySpend rows up to date.
+
+Each write path contributes balance entries, (user_id, field, hours).
+On save, we apply the new entries minus the entries of the stored row,
+and on delete, we subtract the entries of the deleted row.
+"""
+from django.db import models
+from django.dispatch import receiver
+
+from core.models import Comment
+from trade.models import Reserve
+from transactions.models import (
+    ContributionCertificate,
+    DailySpend,
+    Transaction,
+    UserBalance,
+)
+
+
+def comment_entries(comment):
+    return [(comment.owner_id, 'claimed', comment.claimed_hours)]
+
+
+def reserve_entries(reserve):
+    # Same as Reserve.user_purchased() + Reserve.user_expended()
+    if not (reserve.payment_id or reserve.transaction_id):
+        return []
+    return [(reserve.user_id, 'reserve', reserve.hours)]
+
+
+BALANCE_ENTRIES = {
+    ContributionCertificate: ContributionCertificate.balance_entries,
+    Comment: comment_entries,
+    Reserve: reserve_entries,
+}
+
+
+@receiver(models.signals.pre_save, sender=ContributionCertificate)
+@receiver(models.signals.pre_save, sender=Comment)
+@receiver(models.signals.pre_save, sender=Reserve)
+def balance_pre_save(sender, instance, *args, **kwargs):
+    instance._stored_balance_entries = []
+
+    if instance.pk:
+        stored = sender.objects.filter(pk=instance.pk).first()
+        if stored:
+            instance._stored_balance_entries = BALANCE_ENTRIES[sender](stored)
+
+
+@receiver(models.signals.post_save, sender=ContributionCertificate)
+@receiver(models.signals.post_save, sender=Comment)
+@receiver(models.signals.post_save, sender=Reserve)
+def balance_post_save(sender, instance, *args, **kwargs):
+    UserBalance.apply_entries(
+        added=BALANCE_ENTRIES[sender](instance),
+        removed=getattr(instance, '_stored_balance_entries', []))
+
+
+@receiver(models.signals.post_delete, sender=ContributionCertificate)
+@receiver(models.signals.post_delete, sender=Comment)
+@receiver(models.signals.post_delete, sender=Reserve)
+def balance_post_delete(sender, instance, *args, **kwargs):
+    UserBalance.apply_entries(removed=BALANCE_ENTRIES[sender](instance))
+
+
+@receiver(models.signals.post_delete, sender=Transaction)
+def daily_spend_post_delete(sender, instance, *args, **kwargs):
+    DailySpend.add(instance, sign=-1)
@@ -0,0 +1,156 @@
+import logging
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.db.transaction import atomic
+
+from transactions.models import (
+    TopicSnapshot,
+    CommentSnapshot,
+    SnapshotAnchor,
+)
+
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MODELS = (TopicSnapshot, CommentSnapshot)
+
+# While set, a drain task is already queued, so saves don't enqueue another.
+ANCHOR_SCHEDULED_KEY = 'transactions:anchor-snapshots-scheduled'
+
+
+def anchor_pending_snapshots(batch_size):
+    """
+    Anchors up to batch_size pending snapshots in the blockchain,
+    oldest first, and returns how many were anchored.
+
+    Each snapshot is locked (skipping ones locked by another worker)
+    and committed on its own, so a failure leaves the snapshots
+    anchored before it in place, and the rest pending.
+    """
+    anchored = 0
+
+    for model in SNAPSHOT_MODELS:
+        pks = model.objects.pending().order_by('pk').values_list(
+            'pk', flat=True)[:batch_size - anchored]
+
+        for pk in pks:
+            with atomic():
+                snapshot = model.objects.pending().select_for_update(
+                    skip_locked=True).filter(pk=pk).first()
+
+                if snapshot:
+                    snapshot.anchor()
+                    anchored += 1
+
+        if anchored >= batch_size:
+            break
+
+    return anchored
+
+
+def anchor_merkle_batch(batch_size):
+    """
+    Anchors up to batch_size pending snapshots, with a Merkle root
+    transaction per blockchain, and returns how many were anchored.
+
+    Each blockchain is committed on its own, so a failure leaves the
+    roots saved in the other blockchains before it in place.
+    """
+    anchored = 0
+
+    blockchains = set()
+    for model in SNAPSHOT_MODELS:
+        blockchains.update(model.objects.pending().order_by().values_list(
+            'blockchain', flat=True).distinct())
+
+    for blockchain in sorted(blockchains):
+        if anchored >= batch_size:
+            break
+
+        with atomic():
+            snapshots = []
+
+            for model in SNAPSHOT_MODELS:
+                snapshots.extend(
+                    model.objects.pending().filter(
+                        blockchain=blockchain).select_for_update(
+                            skip_locked=True).order_by('pk')[
+                                :batch_size - anchored - len(snapshots)])
+
+                if anchored + len(snapshots) >= batch_size:
+                    break
+
+            if snapshots:
+                SnapshotAnchor.anchor(snapshots)
+
+        anchored += len(snapshots)
+
+    return anchored
+
+
+def pending_snapshots_exist():
+    return any(model.objects.pending().exists() for model in SNAPSHOT_MODELS)
+
+
+@shared_task(bind=True, max_retries=settings.BLOCKCHAIN_ANCHOR_MAX_RETRIES)
+def anchor_snapshots_task(self):
+    """
+    Drains the pending snapshots. If the blockchain is unreachable, it is
+    retried with exponential backoff, and after BLOCKCHAIN_ANCHOR_MAX_RETRIES
+    the snapshots are left to anchor_pending_task.
+    """
+    try:
+        if settings.BLOCKCHAIN_ANCHOR_MODE == 'merkle':
+            anchor_merkle_batch(settings.BLOCKCHAIN_MERKLE_BATCH_SIZE)
+        else:
+            anchor_pending_snapshots(settings.BLOCKCHAIN_ANCHOR_BATCH_SIZE)
+    except Exception as exc:
+        if self.request.retries >= self.max_retries:
+            cache.delete(ANCHOR_SCHEDULED_KEY)
+            logger.error('Anchoring snapshots failed, giving up: %s', exc)
+            return
+
+        logger.warning('Anchoring snapshots failed, retrying: %s', exc)
+        raise self.retry(
+            exc=exc, countdown=retry_delay(self.request.retries))
+
+    # Saves meanwhile didn't enqueue a task, while the key was set.
+    cache.delete(ANCHOR_SCHEDULED_KEY)
+
+    if pending_snapshots_exist():
+        anchor_snapshots_async()
+
+
+def retry_delay(retries):
+    return settings.BLOCKCHAIN_ANCHOR_RETRY_DELAY * 2 ** retries
+
+
+def anchor_snapshots_async(*args):
+    """
+    Enqueues the drain task, unless one is queued (or retrying) already.
+
+    In 'merkle' mode, the task runs after BLOCKCHAIN_ANCHOR_WINDOW seconds,
+    so that the snapshots saved meanwhile share one anchor.
+    """
+    countdown = 0
+    if settings.BLOCKCHAIN_ANCHOR_MODE == 'merkle':
+        countdown = settings.BLOCKCHAIN_ANCHOR_WINDOW
+
+    # Expires after the last retry, in case the worker is lost.
+    timeout = countdown + sum(
+        retry_delay(retries)
+        for retries in range(settings.BLOCKCHAIN_ANCHOR_MAX_RETRIES + 1))
+
+    if cache.add(ANCHOR_SCHEDULED_KEY, True, timeout):
+        return anchor_snapshots_task.apply_async(args, countdown=countdown)
+
+
+@shared_task
+def anchor_pending_task():
+    """
+    Periodic pass, for the snapshots left pending by failed drain tasks.
+    """
+    if pending_snapshots_exist():
+        anchor_snapshots_async()
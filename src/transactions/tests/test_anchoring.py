@@ -0,0 +1,217 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+from test_plus.test import TestCase
+
+from core.models import Topic, Comment
+from transactions import merkle
+from transactions.models import TopicSnapshot, CommentSnapshot, SnapshotAnchor
+from transactions.tasks import (
+    anchor_pending_snapshots, anchor_merkle_batch, anchor_snapshots_task,
+    pending_snapshots_exist
+)
+from transactions.utils import blockchain_save
+from users.models import CryptoKeypair
+
+
+class LocalBigchainDB(object):
+    """
+    In-process stand-in for bigchaindb_driver.BigchainDB.
+    """
+    sent = []
+    fail = False
+
+    def __init__(self, *args, **kwargs):
+        self.transactions = self
+
+    def prepare(self, operation, signers, asset):
+        return {'operation': operation, 'asset': asset}
+
+    def fulfill(self, tx, private_keys):
+        return tx
+
+    def send_commit(self, tx):
+        if self.fail:
+            raise ConnectionError('BigchainDB is unavailable')
+        self.sent.append(tx)
+        return {'id': 'tx{}'.format(len(self.sent))}
+
+
+class TestSnapshotAnchoring(TestCase):
+
+    def setUp(self):
+        self.thinker = self.make_user('thinker')
+        LocalBigchainDB.sent = []
+        LocalBigchainDB.fail = False
+
+        patcher = mock.patch(
+            'transactions.utils.BigchainDB', LocalBigchainDB)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_save_does_not_call_blockchain(self):
+
+        topic = Topic.objects.create(
+            title='Anchor later', owner=self.thinker, blockchain=1)
+
+        snapshot = TopicSnapshot.objects.get(topic=topic)
+
+        self.assertEqual(snapshot.blockchain, 1)
+        self.assertIsNone(snapshot.blockchain_tx)
+        self.assertEqual(LocalBigchainDB.sent, [])
+
+    def test_anchor_pending_snapshots(self):
+
+        for i in range(3):
+            Topic.objects.create(
+                title='Topic {}'.format(i), owner=self.thinker, blockchain=1)
+
+        self.assertEqual(anchor_pending_snapshots(2), 2)
+        self.assertEqual(TopicSnapshot.objects.pending().count(), 1)
+
+        self.assertEqual(anchor_pending_snapshots(2), 1)
+        self.assertEqual(TopicSnapshot.objects.pending().count(), 0)
+        self.assertEqual(len(LocalBigchainDB.sent), 3)
+
+        self.assertTrue(all(
+            TopicSnapshot.objects.values_list('blockchain_tx', flat=True)))
+
+    def test_failure_leaves_snapshots_pending(self):
+
+        Topic.objects.create(title='Offline', owner=self.thinker, blockchain=1)
+        LocalBigchainDB.fail = True
+
+        with self.assertRaises(ConnectionError):
+            anchor_pending_snapshots(10)
+
+        self.assertEqual(TopicSnapshot.objects.pending().count(), 1)
+
+        LocalBigchainDB.fail = False
+        self.assertEqual(anchor_pending_snapshots(10), 1)
+        self.assertEqual(TopicSnapshot.objects.pending().count(), 0)
+
+    def test_task_gives_up(self):
+
+        Topic.objects.create(title='Offline', owner=self.thinker, blockchain=1)
+        LocalBigchainDB.fail = True
+
+        with self.settings(BLOCKCHAIN_ANCHOR_MODE='snapshot'), \
+                mock.patch('transactions.tasks.anchor_pending_snapshots',
+                           side_effect=anchor_pending_snapshots) as drain:
+            anchor_snapshots_task.apply()
+
+        # Retried eagerly, and given up on.
+        self.assertEqual(drain.call_count, anchor_snapshots_task.max_retries + 1)
+        self.assertEqual(TopicSnapshot.objects.pending().count(), 1)
+
+
+class TestMerkle(SimpleTestCase):
+
+    def test_proofs(self):
+
+        for size in range(1, 12):
+            leaves = [merkle.leaf_hash({'n': n}) for n in range(size)]
+            levels = merkle.tree(leaves)
+            root = merkle.root(levels)
+
+            for index, leaf in enumerate(leaves):
+                path = merkle.proof(levels, index)
+                self.assertTrue(merkle.verify(leaf, path, root))
+                self.assertFalse(merkle.verify(
+                    merkle.leaf_hash({'n': -1}), path, root))
+
+    def test_canonical_leaf(self):
+        self.assertEqual(
+            merkle.leaf_hash({'a': 1, 'b': [1, 2]}),
+            merkle.leaf_hash({'b': [1, 2], 'a': 1}))
+
+
+class TestMerkleAnchoring(TestCase):
+
+    def setUp(self):
+        self.thinker = self.make_user('thinker')
+        LocalBigchainDB.sent = []
+        LocalBigchainDB.fail = False
+
+        patcher = mock.patch(
+            'transactions.utils.BigchainDB', LocalBigchainDB)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_one_transaction_per_batch(self):
+
+        for i in range(3):
+            topic = Topic.objects.create(
+                title='Topic {}'.format(i), owner=self.thinker, blockchain=1)
+
+        Comment.objects.create(
+            topic=topic, text='Merkle {1}', owner=self.thinker, blockchain=1)
+
+        self.assertEqual(anchor_merkle_batch(100), 4)
+        self.assertEqual(len(LocalBigchainDB.sent), 1)
+        self.assertEqual(anchor_merkle_batch(100), 0)
+
+        anchor = SnapshotAnchor.objects.get()
+        self.assertEqual(anchor.size, 4)
+        self.assertEqual(
+            LocalBigchainDB.sent[0]['asset']['data']['merkle_root'],
+            anchor.root)
+
+        snapshots = list(TopicSnapshot.objects.all()) + \
+            list(CommentSnapshot.objects.all())
+
+        for snapshot in snapshots:
+            self.assertEqual(snapshot.merkle_anchor, anchor)
+            self.assertEqual(snapshot.blockchain_tx, anchor.blockchain_tx)
+            self.assertTrue(snapshot.verify_anchor())
+
+        snapshot.data['title'] = 'Tampered'
+        self.assertFalse(snapshot.verify_anchor())
+
+    def test_one_root_per_blockchain(self):
+
+        # A second blockchain, next to IPDB.
+        patcher = mock.patch.object(
+            CryptoKeypair, 'KEY_TYPES', CryptoKeypair.KEY_TYPES + [(2, 'Test')])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        for blockchain in (1, 2, 1):
+            Topic.objects.create(
+                title='Chain {}'.format(blockchain), owner=self.thinker,
+                blockchain=blockchain)
+
+        self.assertEqual(anchor_merkle_batch(100), 3)
+        self.assertEqual(len(LocalBigchainDB.sent), 2)
+
+        for anchor in SnapshotAnchor.objects.all():
+            self.assertEqual(
+                set(anchor.topicsnapshots.values_list('blockchain', flat=True)),
+                {anchor.blockchain})
+
+        self.assertEqual(
+            sorted(SnapshotAnchor.objects.values_list('size', flat=True)), [1, 2])
+
+    def test_unknown_blockchain(self):
+
+        Topic.objects.create(title='Nowhere', owner=self.thinker, blockchain=7)
+
+        self.assertFalse(pending_snapshots_exist())
+        self.assertEqual(anchor_merkle_batch(100), 0)
+        self.assertFalse(SnapshotAnchor.objects.exists())
+
+        with self.assertRaises(ValueError):
+            blockchain_save(None, {'merkle_root': ''}, blockchain=7)
+
+    def test_proof_endpoint(self):
+
+        Topic.objects.create(title='Proof', owner=self.thinker, blockchain=1)
+        anchor_merkle_batch(100)
+
+        snapshot = TopicSnapshot.objects.get()
+        response = self.get('topicsnapshot-proof', pk=snapshot.pk)
+
+        self.response_200(response)
+        self.assertTrue(response.data['verified'])
+        self.assertEqual(
+            response.data['root'], SnapshotAnchor.objects.get().root)
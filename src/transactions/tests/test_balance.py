@@ -0,0 +1,172 @@
+import datetime
+import json
+from decimal import Decimal
+
+from test_plus.test import TestCase
+
+from core.models import (
+    Topic,
+    Comment,
+)
+
+from trade.models import Payment
+
+from transactions.models import (
+    Currency,
+    HourPriceSnapshot,
+    CurrencyPriceSnapshot,
+    DailySpend,
+    Transaction,
+    UserBalance,
+)
+
+
+class TestUserBalance(TestCase):
+
+    def setUp(self):
+        self.hur = Currency(label='hur'); self.hur.save()
+        self.eur = Currency(label='eur'); self.eur.save()
+        self.usd = Currency(label='usd'); self.usd.save()
+
+        self.hprice = HourPriceSnapshot(
+            name='FRED',
+            base=self.usd,
+            data=json.loads("""
+{"realtime_start":"2017-07-28","realtime_end":"2017-07-28","observation_start":"1600-01-01","observation_end":"9999-12-31","units":"lin","output_type":1,"file_type":"json","order_by":"observation_date","sort_order":"desc","count":136,"offset":0,"limit":1,"observations":[{"realtime_start":"2017-07-28","realtime_end":"2017-07-28","date":"2017-06-01","value":"26.25"}]}"""),
+            endpoint='https://api.stlouisfed.org/fred/series/observations?series_id=CES0500000003&api_key=0a90ca7b5204b2ed6e998d9f6877187e&limit=1&sort_order=desc&file_type=json',
+        )
+        self.hprice.save()
+        self.cprice = CurrencyPriceSnapshot(
+            name='FIXER',
+            base=self.eur,
+            data=json.loads("""
+{"base":"EUR","date":"2017-07-28","rates":{"AUD":1.4732,"BGN":1.9558,"BRL":3.7015,"CAD":1.4712,"CHF":1.1357,"CNY":7.9087,"CZK":26.048,"DKK":7.4364,"GBP":0.89568,"HKD":9.1613,"HRK":7.412,"HUF":304.93,"IDR":15639.0,"ILS":4.1765,"INR":75.256,"JPY":130.37,"KRW":1317.6,"MXN":20.809,"MYR":5.0229,"NOK":9.3195,"NZD":1.5694,"PHP":59.207,"PLN":4.2493,"RON":4.558,"RUB":69.832,"SEK":9.5355,"SGD":1.5947,"THB":39.146,"TRY":4.1462,"USD":1.1729,"ZAR":15.281}}"""),
+            endpoint='https://api.fixer.io/latest?base=eur',
+        )
+        self.cprice.save()
+
+        self.thinker = self.make_user('thinker')
+        self.doer = self.make_user('doer')
+        self.investor = self.make_user('investor')
+
+        self.topic = Topic.objects.create(
+            title='Improve test module',
+            body='implement class that autogenerates users',
+            owner=self.thinker,
+        )
+
+        self.comment = Comment(
+            topic=self.topic,
+            text="""
+            - {?8} for testing.
+            """,
+            owner=self.doer
+        )
+        self.comment.save()
+
+    def assertConsistent(self, *users):
+        for user in users:
+            balance = UserBalance.objects.get(user=user)
+            self.assertEqual(balance.inconsistencies(), {})
+
+    def test_balance_follows_investment(self):
+        self.comment.invest(1.0, 'eur', self.investor)
+
+        self.assertEqual(
+            UserBalance.objects.get(user=self.investor).unmatched,
+            Decimal('0.5')
+        )
+        self.assertConsistent(self.doer, self.investor)
+
+    def test_balance_follows_comment_update(self):
+        self.comment.invest(1.0, 'eur', self.investor)
+
+        self.comment.text = """
+        - {0.4}{?7.6} for testing.
+        """
+        self.comment.save()
+
+        self.assertEqual(
+            UserBalance.objects.get(user=self.doer).matched,
+            Decimal('0.2')
+        )
+        self.assertEqual(
+            UserBalance.objects.get(user=self.doer).claimed,
+            Decimal('0.4')
+        )
+        self.assertConsistent(self.doer, self.investor)
+
+    def test_balance_follows_reserve(self):
+        Payment.objects.create(
+            request={
+                "amount": "150",
+                "currency": "usd",
+            },
+            platform=0, provider=0, owner=self.investor
+        )
+        self.comment.invest(6.0, 'eur', self.investor)
+
+        self.assertEqual(
+            UserBalance.objects.get(user=self.investor).reserve,
+            Decimal('3.71428571')
+        )
+        self.assertConsistent(self.investor)
+
+    def test_balance_follows_comment_delete(self):
+        self.comment.invest(1.0, 'eur', self.investor)
+        self.comment.delete()
+
+        self.assertEqual(
+            UserBalance.objects.get(user=self.investor).unmatched,
+            Decimal('0.0')
+        )
+        self.assertConsistent(self.doer, self.investor)
+
+    def test_rebuild(self):
+        self.comment.invest(1.0, 'eur', self.investor)
+        UserBalance.objects.filter(user=self.investor).update(unmatched=0)
+
+        self.assertNotEqual(
+            UserBalance.objects.get(user=self.investor).inconsistencies(), {})
+
+        UserBalance.rebuild(self.investor)
+        self.assertConsistent(self.investor)
+
+    def test_daily_spend_counter(self):
+        today = datetime.datetime.utcnow().date()
+
+        self.comment.invest(1.0, 'eur', self.investor)
+        self.comment.invest(0.5, 'eur', self.investor)
+
+        self.assertEqual(
+            DailySpend.objects.get(user=self.investor, day=today).hours,
+            Decimal('1.5')
+        )
+        self.assertEqual(
+            Transaction.user_paid_on(self.investor, today),
+            Decimal('1.5')
+        )
+        self.assertEqual(
+            Transaction.user_quota_remains_today(self.investor),
+            Decimal('2.5')
+        )
+
+    def test_daily_spend_seeded_from_transactions(self):
+        today = datetime.datetime.utcnow().date()
+
+        self.comment.invest(1.0, 'eur', self.investor)
+        DailySpend.objects.all().delete()
+
+        self.assertEqual(
+            Transaction.user_paid_today(self.investor),
+            Decimal('1.0')
+        )
+        # Reads don't write.
+        self.assertFalse(
+            DailySpend.objects.filter(user=self.investor, day=today).exists())
+
+        self.comment.invest(0.5, 'eur', self.investor)
+        self.assertEqual(
+            DailySpend.objects.get(user=self.investor, day=today).hours,
+            Decimal('1.5')
+        )
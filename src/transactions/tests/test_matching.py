@@ -0,0 +1,166 @@
+import json
+import random
+from decimal import Decimal
+
+from django.db import connection
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+from test_plus.test import TestCase
+
+from core.models import (
+    Topic,
+    Comment,
+)
+from transactions.mixins import match_certificates
+from transactions.models import (
+    Currency,
+    HourPriceSnapshot,
+    CurrencyPriceSnapshot,
+    ContributionCertificate,
+    UserBalance,
+)
+
+
+def legacy_match_certificates(certs, amount):
+    """
+    The pair-by-pair loop, that proceed_interaction() used to run,
+    recording (type, parent, hours, matched) instead of writing.
+    """
+    created = []
+    broken = []
+
+    cert1 = None
+    for i, cert2 in enumerate(certs):
+        if i % 2 == 0:
+            cert1 = cert2
+            continue
+
+        if not ((cert1.transaction_id == cert2.transaction_id) &
+                (cert1.type == ContributionCertificate.DOER) &
+                (cert2.type == ContributionCertificate.INVESTOR) &
+                (cert1.hours == cert2.hours)):
+            break
+
+        certs_hours = cert1.hours + cert2.hours
+
+        if amount >= certs_hours:
+            created.append((cert1.type, cert1, cert1.hours, True))
+            created.append((cert2.type, cert2, cert2.hours, True))
+            broken.extend([cert1, cert2])
+            amount -= certs_hours
+
+        elif amount < certs_hours:
+            hours_to_match = amount / Decimal(2)
+            created.append((cert1.type, cert1, hours_to_match, True))
+            created.append((cert2.type, cert2, hours_to_match, True))
+
+            hours_to_donate = (certs_hours - amount) / Decimal(2)
+            created.append((cert1.type, cert1, hours_to_donate, False))
+            created.append((cert2.type, cert2, hours_to_donate, False))
+            broken.extend([cert1, cert2])
+            break
+
+    return created, broken
+
+
+class TestMatchCertificates(SimpleTestCase):
+
+    def make_pairs(self, rnd, count):
+        certs = []
+        for i in range(count):
+            hours = Decimal(rnd.randint(1, 400)) / Decimal(100)
+            for cert_type, user_id in [(ContributionCertificate.DOER, 1),
+                                       (ContributionCertificate.INVESTOR, 2 + i)]:
+                certs.append(ContributionCertificate(
+                    pk=len(certs) + 1,
+                    type=cert_type,
+                    transaction_id=i + 1,
+                    comment_snapshot_id=1,
+                    hours=hours,
+                    matched=False,
+                    received_by_id=user_id,
+                ))
+        return certs
+
+    def test_same_as_legacy(self):
+        rnd = random.Random(42)
+
+        for _ in range(200):
+            certs = self.make_pairs(rnd, rnd.randint(0, 30))
+            amount = Decimal(rnd.randint(0, 3000)) / Decimal(100)
+
+            created, broken = match_certificates(certs, amount, None)
+            expected, expected_broken = legacy_match_certificates(certs, amount)
+
+            self.assertEqual(
+                [(c.type, c.parent, c.hours, c.matched) for c in created],
+                expected)
+            self.assertEqual(broken, expected_broken)
+
+    def test_asymmetric_pair_stops(self):
+        certs = self.make_pairs(random.Random(0), 3)
+        certs[3].hours += 1
+
+        created, broken = match_certificates(certs, Decimal(100), None)
+
+        self.assertEqual(broken, certs[:2])
+        self.assertEqual(len(created), 2)
+
+
+class TestInteractionQueries(TestCase):
+
+    def setUp(self):
+        self.eur = Currency(label='eur'); self.eur.save()
+        self.usd = Currency(label='usd'); self.usd.save()
+
+        HourPriceSnapshot(
+            name='FRED',
+            base=self.usd,
+            data=json.loads("""
+{"realtime_start":"2017-07-28","realtime_end":"2017-07-28","observation_start":"1600-01-01","observation_end":"9999-12-31","units":"lin","output_type":1,"file_type":"json","order_by":"observation_date","sort_order":"desc","count":136,"offset":0,"limit":1,"observations":[{"realtime_start":"2017-07-28","realtime_end":"2017-07-28","date":"2017-06-01","value":"26.25"}]}"""),
+            endpoint='https://api.stlouisfed.org/fred/series/observations?series_id=CES0500000003&api_key=0a90ca7b5204b2ed6e998d9f6877187e&limit=1&sort_order=desc&file_type=json',
+        ).save()
+        CurrencyPriceSnapshot(
+            name='FIXER',
+            base=self.eur,
+            data=json.loads("""
+{"base":"EUR","date":"2017-07-28","rates":{"USD":1.1729}}"""),
+            endpoint='https://api.fixer.io/latest?base=eur',
+        ).save()
+
+        self.doer = self.make_user('doer')
+        self.investor = self.make_user('investor')
+
+        self.topic = Topic.objects.create(
+            title='Improve test module',
+            body='implement class that autogenerates users',
+            owner=self.doer,
+        )
+
+    def edit_claim_queries(self, investments):
+        comment = Comment(
+            topic=self.topic,
+            text='{?8} for testing.',
+            owner=self.doer
+        )
+        comment.save()
+
+        for _ in range(investments):
+            comment.invest(0.05, 'eur', self.investor)
+
+        comment.text = '{%s}{?1} for testing.' % (Decimal('0.05') * investments)
+
+        with CaptureQueriesContext(connection) as queries:
+            comment.save()
+
+        self.assertEqual(comment.matched(), Decimal('0.05') * investments)
+        self.assertEqual(
+            UserBalance.objects.get(user=self.investor).inconsistencies(), {})
+
+        return len(queries)
+
+    def test_queries_do_not_grow_with_investments(self):
+        self.assertEqual(
+            self.edit_claim_queries(2),
+            self.edit_claim_queries(20),
+        )
@@ -1,6 +1,7 @@
 import json
 import urllib
 from bigchaindb_driver import BigchainDB
+from bigchaindb_driver.crypto import generate_keypair
 
 from django.core import serializers
 from django.conf import settings
@@ -25,6 +26,11 @@ def instance_to_save_dict(instance):
 
 
 def blockchain_save(user, data, blockchain=False):
+    """
+    Saves data in the blockchain, signed by the user's keypair, or
+    by a one-off keypair, if user is None (e.g., for Merkle roots).
+    Raises ValueError for a blockchain not in CryptoKeypair.KEY_TYPES.
+    """
 
     if settings.IPDB_APP_ID and settings.IPDB_APP_KEY:
         headers = {
@@ -42,17 +48,21 @@ def blockchain_save(user, data, blockchain=False):
 
     if blockchain in dict(CryptoKeypair.KEY_TYPES).keys():
 
-        cryptokey_qs = CryptoKeypair.objects.filter(
-            user=user,
-            type=blockchain,
-            private_key__isnull=False
-        )
+        if user is None:
+            keypair = generate_keypair()
 
-        if not cryptokey_qs.exists():
-            keypair = CryptoKeypair.objects.make_one(user=user)
-            keypair.save()
         else:
-            keypair = cryptokey_qs.last()
+            cryptokey_qs = CryptoKeypair.objects.filter(
+                user=user,
+                type=blockchain,
+                private_key__isnull=False
+            )
+
+            if not cryptokey_qs.exists():
+                keypair = CryptoKeypair.objects.make_one(user=user)
+                keypair.save()
+            else:
+                keypair = cryptokey_qs.last()
 
         tx = bdb.transactions.prepare(
             operation='CREATE',
@@ -75,3 +85,5 @@ def blockchain_save(user, data, blockchain=False):
         )
 
         return txid
+
+    raise ValueError('Unknown blockchain: {}'.format(blockchain))
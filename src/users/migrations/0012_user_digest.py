@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.15 on 2018-09-12 10:25
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0011_auto_20180628_0751'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='digest',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Immediate'), (1, 'Hourly'), (2, 'Daily')], default=0),
+        ),
+    ]
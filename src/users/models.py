@@ -23,12 +23,25 @@ def username_hash(email):
 
 
 class User(AbstractUser, GenericModel):
+    IMMEDIATE = 0
+    HOURLY = 1
+    DAILY = 2
+
+    DIGEST_TYPES = [
+        (IMMEDIATE, _('Immediate')),
+        (HOURLY, _('Hourly')),
+        (DAILY, _('Daily')),
+    ]
 
     # First Name and Last Name do not cover name patterns
     # around the globe.
     name = models.CharField(_('Name of User'), blank=True, max_length=255)
     about = models.TextField(blank=True)
 
+    # How often to e-mail comment notifications.
+    digest = models.PositiveSmallIntegerField(
+        choices=DIGEST_TYPES, default=IMMEDIATE)
+
     def __str__(self):
         return self.username
 
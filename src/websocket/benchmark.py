@@ -0,0 +1,107 @@
+"""
+Fan-out cost of comment broadcasts, through the Redis of the configured
+channel layer (in config/settings/base.py), with a layer of its own, under
+the "benchmark:" prefix, so that it never touches the live channels.
+
+    cd src && DJANGO_SETTINGS_MODULE=config.settings.local \\
+        python -m websocket.benchmark --sockets 10000
+
+Adds fake reply channels to the general and a topic group, then sends
+comment events the way it was done before (the generic serializer output,
+JSON-encoded twice, per group), and the way it's done now (a compact event,
+encoded once per format), and prints the time and payload sizes.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+
+def setup():
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.local')
+
+    import django
+    django.setup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sockets', type=int, default=10000)
+    parser.add_argument('--events', type=int, default=20)
+    parser.add_argument('--topic', type=int, default=1)
+    args = parser.parse_args()
+
+    setup()
+
+    from asgi_redis import RedisChannelLayer
+    from channels import Group
+    from django.conf import settings
+    from django.core import serializers
+
+    from core.models import Comment
+    from websocket import events
+    from websocket.consumers import get_general_label, get_label
+
+    layer = RedisChannelLayer(
+        prefix='benchmark:', **settings.CHANNEL_LAYERS['default']['CONFIG'])
+    comment = Comment.objects.filter(topic_id=args.topic).last()
+
+    if comment is None:
+        parser.error('Topic #{} has no comments.'.format(args.topic))
+
+    labels = []
+    for format in events.formats():
+        labels += [get_general_label(format), get_label(args.topic, format)]
+
+    # Half of the sockets follow all comments, half the topic ones.
+    channels = [
+        layer.new_channel('websocket.send?') for _ in range(args.sockets)]
+
+    def group(label):
+        return Group(label, channel_layer=layer)
+
+    for i, channel in enumerate(channels):
+        group(labels[i % 2]).add(channel)
+
+    def legacy():
+        data = serializers.serialize('json', [comment])
+        message = {'text': json.dumps(data)}
+        group(get_general_label()).send(message)
+        group(get_label(args.topic)).send(message)
+        return len(message['text'])
+
+    def compact():
+        event = events.comment_event(comment, False)
+        size = 0
+        for format in events.formats():
+            message = events.encode(event, format)
+            group(get_general_label(format)).send(message)
+            group(get_label(args.topic, format)).send(message)
+            size = size or len(message.get('text') or message.get('bytes'))
+        return size
+
+    try:
+        for name, send in (('legacy', legacy), ('compact', compact)):
+            started = time.time()
+            for _ in range(args.events):
+                size = send()
+            elapsed = time.time() - started
+
+            print('{:8} {:8.2f} ms/event  {:6} bytes/message  {:10.0f} deliveries/s'.format(
+                name, 1000 * elapsed / args.events, size,
+                args.sockets * args.events / elapsed))
+
+            # Only the keys under the "benchmark:" prefix.
+            layer.flush()
+
+            for i, channel in enumerate(channels):
+                group(labels[i % 2]).add(channel)
+
+    finally:
+        layer.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,25 @@
-import json
-
-from django.core import serializers
+import atexit
+from urllib.parse import parse_qs
 
 from channels import Group
 from channels.auth import channel_session
+from django.conf import settings
+
+from websocket.dispatcher import CoalescingDispatcher
+from websocket.events import JSON, comment_event, encode, formats
+
+_dispatcher = None
 
 
-def get_general_label():
+def get_general_label(format=JSON):
+    if format != JSON:
+        return 'comments.%s' % format
     return 'comments'
 
 
-def get_label(group_id):
+def get_label(group_id, format=JSON):
+    if format != JSON:
+        return 'comments-%s.%s' % (group_id, format)
     return 'comments-%s' % group_id
 
 
@@ -21,11 +30,20 @@ def ws_connect(message):
     if path_items[0] != 'comments':
         return
 
+    query_string = message.content.get('query_string', '')
+    if isinstance(query_string, bytes):
+        query_string = query_string.decode()
+
+    query = parse_qs(query_string)
+    format = query.get('format', [JSON])[0]
+    if format not in formats():
+        format = JSON
+
     if len(path_items) > 1:
         channel_id = path_items[1]
-        label = get_label(channel_id)
+        label = get_label(channel_id, format)
     else:
-        label = get_general_label()
+        label = get_general_label(format)
 
     Group(label).add(message.reply_channel)
     message.channel_session['channel_label'] = label
@@ -34,14 +52,55 @@ def ws_connect(message):
     message.reply_channel.send({"accept": True})
 
 
-def ws_send_comment_changed(comment, created):
-    data = serializers.serialize('json', [
-        comment,
-    ])
-    message = {'text': json.dumps(data)}
+def send_event(topic_id, event):
+    """
+    Sends the event, encoded once per format, to the topic groups, or
+    to the general groups, if topic_id is None.
+    """
+    for format in formats():
+        message = encode(event, format)
+
+        if topic_id is None:
+            Group(get_general_label(format)).send(message)
+        else:
+            Group(get_label(topic_id, format)).send(message)
+
+
+def get_dispatcher():
+    global _dispatcher
+
+    if _dispatcher is None:
+        _dispatcher = CoalescingDispatcher(
+            send_event,
+            window=settings.WEBSOCKET_COALESCE_WINDOW,
+            max_queue=settings.WEBSOCKET_MAX_QUEUE)
+        atexit.register(_dispatcher.flush)
+
+    return _dispatcher
+
+
+def flush_dispatcher():
+    if _dispatcher is not None:
+        _dispatcher.flush()
+
+
+def ws_send_comment_changed(comment, created, fields=None):
+    """
+    Sends the comment event to the general and the topic groups, after
+    WEBSOCKET_COALESCE_WINDOW seconds, coalesced with the other events
+    of the window, or right away, if it is 0.
+    """
+    event = comment_event(comment, created, fields)
+
+    if settings.WEBSOCKET_COALESCE_WINDOW:
+        get_dispatcher().add(event)
+        return
+
+    for format in formats():
+        message = encode(event, format)
 
-    Group(get_general_label()).send(message)
-    Group(get_label(comment.topic.id)).send(message)
+        Group(get_general_label(format)).send(message)
+        Group(get_label(comment.topic_id, format)).send(message)
 
 
 @channel_session
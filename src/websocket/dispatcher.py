@@ -0,0 +1,111 @@
+import logging
+import threading
+from collections import OrderedDict
+
+from websocket.events import VERSION
+
+
+logger = logging.getLogger(__name__)
+
+
+def merge(previous, event):
+    """
+    One event of a comment, saved twice within a window.
+    """
+    merged = dict(event)
+    merged['data'] = dict(previous['data'], **event['data'])
+    if previous['op'] == 'create':
+        merged['op'] = 'create'
+    return merged
+
+
+def batch(events):
+    if len(events) == 1:
+        return events[0]
+    return {'v': VERSION, 'e': 'batch', 'events': events}
+
+
+class CoalescingDispatcher(object):
+    """
+    Queues comment events for window seconds, then sends one message per
+    topic group, and one to the general group, via send(label, event),
+    where label is a topic id, or None for the general group.
+
+    Events of a comment replace its earlier queued ones (coalesced), and
+    a queue over max_queue events drops its oldest ones (dropped).
+
+    The queues are in memory: the outbox relay flushes them after each
+    batch, before marking its events sent (see core/handlers.py), so that
+    a crashed relay loses no event, but sends it again.
+    """
+
+    def __init__(self, send, window=0.25, max_queue=100):
+        self.send = send
+        self.window = window
+        self.max_queue = max_queue
+
+        self.lock = threading.RLock()
+        self.queues = {}
+        self.timer = None
+
+        self.received = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.sent = 0
+
+    def add(self, event):
+        with self.lock:
+            self.received += 1
+            queue = self.queues.setdefault(event['topic'], OrderedDict())
+
+            if event['id'] in queue:
+                event = merge(queue.pop(event['id']), event)
+                self.coalesced += 1
+
+            queue[event['id']] = event
+
+            while len(queue) > self.max_queue:
+                queue.popitem(last=False)
+                self.dropped += 1
+
+            if self.timer is None:
+                self.timer = threading.Timer(self.window, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def flush(self):
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+
+            queues, self.queues = self.queues, {}
+
+            if not queues:
+                return
+
+            general = []
+
+            for topic, queue in queues.items():
+                events = list(queue.values())
+                general.extend(events)
+                self.send(topic, batch(events))
+                self.sent += 1
+
+            if len(general) > self.max_queue:
+                self.dropped += len(general) - self.max_queue
+                general = general[-self.max_queue:]
+
+            self.send(None, batch(general))
+            self.sent += 1
+
+            logger.debug('websocket dispatcher: %s', self.stats())
+
+    def stats(self):
+        return {
+            'received': self.received,
+            'coalesced': self.coalesced,
+            'dropped': self.dropped,
+            'sent': self.sent,
+            'queued': sum(len(queue) for queue in self.queues.values()),
+        }
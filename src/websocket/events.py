@@ -0,0 +1,77 @@
+"""
+Compact, versioned events sent to websocket clients.
+
+A comment event looks like:
+
+    {"v": 1, "e": "comment", "op": "update", "id": 12, "topic": 3,
+     "data": {"text": "...", "updated_date": "..."}}
+
+where "data" holds all the fields on "create", and only the changed
+ones on "update", if they are known. It is encoded once per format, as
+a JSON text frame, or, for clients connected with ?format=msgpack, as
+a msgpack binary frame.
+"""
+import datetime
+import json
+from decimal import Decimal
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+
+VERSION = 1
+
+COMMENT_FIELDS = (
+    'text', 'claimed_hours', 'assumed_hours', 'owner_id', 'parent_id',
+    'languages', 'blockchain', 'created_date', 'updated_date',
+)
+
+JSON = 'json'
+MSGPACK = 'msgpack'
+
+
+def plain(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return value
+
+
+def comment_event(comment, created, fields=None):
+    """
+    Event of the saved comment, with the given fields (attnames), or all.
+    """
+    if created or fields is None:
+        fields = COMMENT_FIELDS
+    else:
+        fields = [name for name in COMMENT_FIELDS
+                  if name in fields or name == 'updated_date']
+
+    return {
+        'v': VERSION,
+        'e': 'comment',
+        'op': 'create' if created else 'update',
+        'id': comment.pk,
+        'topic': comment.topic_id,
+        'data': {
+            name.replace('_id', ''): plain(getattr(comment, name))
+            for name in fields
+        },
+    }
+
+
+def formats():
+    return (JSON, MSGPACK) if msgpack else (JSON,)
+
+
+def encode(event, format=JSON):
+    """
+    Channels message of the event, in the format.
+    """
+    if format == MSGPACK:
+        return {'bytes': msgpack.packb(event, use_bin_type=True)}
+
+    return {'text': json.dumps(event, separators=(',', ':'))}
@@ -0,0 +1,57 @@
+from django.test import SimpleTestCase
+
+from websocket.dispatcher import CoalescingDispatcher
+
+
+def event(id, topic, op='update', **data):
+    return {'v': 1, 'e': 'comment', 'op': op, 'id': id, 'topic': topic,
+            'data': data}
+
+
+class TestCoalescingDispatcher(SimpleTestCase):
+
+    def setUp(self):
+        self.sent = []
+        self.dispatcher = CoalescingDispatcher(
+            lambda label, message: self.sent.append((label, message)),
+            window=60, max_queue=3)
+        self.addCleanup(self.dispatcher.flush)
+
+    def test_superseded_edits_are_coalesced(self):
+
+        self.dispatcher.add(event(1, 10, op='create', text='a', hours='1'))
+        self.dispatcher.add(event(1, 10, text='b'))
+        self.dispatcher.add(event(1, 10, text='c'))
+        self.dispatcher.flush()
+
+        self.assertEqual(self.sent, [
+            (10, event(1, 10, op='create', text='c', hours='1')),
+            (None, event(1, 10, op='create', text='c', hours='1')),
+        ])
+        self.assertEqual(self.dispatcher.stats()['coalesced'], 2)
+
+    def test_one_message_per_topic(self):
+
+        self.dispatcher.add(event(1, 10, text='a'))
+        self.dispatcher.add(event(2, 10, text='b'))
+        self.dispatcher.add(event(3, 20, text='c'))
+        self.dispatcher.flush()
+
+        messages = dict(self.sent)
+        self.assertEqual(messages[10]['e'], 'batch')
+        self.assertEqual(
+            [e['id'] for e in messages[10]['events']], [1, 2])
+        self.assertEqual(messages[20]['id'], 3)
+        self.assertEqual(
+            [e['id'] for e in messages[None]['events']], [1, 2, 3])
+
+    def test_queue_is_capped(self):
+
+        for id in range(5):
+            self.dispatcher.add(event(id, 10, text=str(id)))
+        self.dispatcher.flush()
+
+        messages = dict(self.sent)
+        self.assertEqual(
+            [e['id'] for e in messages[10]['events']], [2, 3, 4])
+        self.assertEqual(self.dispatcher.stats()['dropped'], 2)
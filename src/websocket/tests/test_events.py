@@ -0,0 +1,65 @@
+import json
+from unittest import mock
+
+from django.test import override_settings
+from test_plus.test import TestCase
+
+from core.models import Topic, Comment
+from websocket import events
+from websocket.consumers import ws_send_comment_changed
+
+
+class TestCommentEvents(TestCase):
+
+    def setUp(self):
+        self.thinker = self.make_user('thinker')
+        self.topic = Topic.objects.create(
+            title='.:en:Events', owner=self.thinker)
+        self.comment = Comment.objects.create(
+            topic=self.topic, text='.:en:Hello {1}', owner=self.thinker)
+
+    def test_create_event(self):
+
+        event = events.comment_event(self.comment, True)
+
+        self.assertEqual(event['v'], events.VERSION)
+        self.assertEqual(event['op'], 'create')
+        self.assertEqual(event['topic'], self.topic.pk)
+        self.assertEqual(event['data']['owner'], self.thinker.pk)
+        self.assertEqual(
+            set(event['data']), {name.replace('_id', '')
+                                 for name in events.COMMENT_FIELDS})
+
+        message = events.encode(event)
+        self.assertEqual(json.loads(message['text']), event)
+
+    def test_changed_fields_only(self):
+
+        comment = Comment.objects.get(pk=self.comment.pk)
+        comment.text = '.:en:Hello again {2}'
+        comment.save()
+
+        self.assertIn('text', comment._changed_fields)
+        self.assertIn('claimed_hours', comment._changed_fields)
+        self.assertNotIn('owner_id', comment._changed_fields)
+
+        event = events.comment_event(comment, False, comment._changed_fields)
+
+        self.assertEqual(event['op'], 'update')
+        self.assertIn('text', event['data'])
+        self.assertNotIn('owner', event['data'])
+
+    @override_settings(WEBSOCKET_COALESCE_WINDOW=0)
+    def test_encoded_once_per_format(self):
+
+        with mock.patch('websocket.consumers.Group') as group, \
+                mock.patch('websocket.consumers.encode',
+                           wraps=events.encode) as encode:
+            ws_send_comment_changed(self.comment, True)
+
+        self.assertEqual(encode.call_count, len(events.formats()))
+        self.assertEqual(
+            group.return_value.send.call_count, 2 * len(events.formats()))
+
+        messages = [c[0][0] for c in group.return_value.send.call_args_list]
+        self.assertIs(messages[0], messages[1])